@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+"""Plays many seeded dungeons headlessly and records how each run went.
+
+Each seed is played to the end by a scripted player on a pool of worker
+processes, and one line of stats per run is written out as runs finish.
+For example, to sweep ten thousand seeds:
+
+    python survive/batch.py --count 10000 --output runs.csv
+"""
+
+from game.batch import main
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1 @@
 """Main game logic package for Survive the Dungeon"""
-
-from .run import run
-
-__all__ = ["run"]
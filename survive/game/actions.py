@@ -0,0 +1,157 @@
+"""This module holds the player's actions and the log that records them"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterator, Tuple
+
+from .attributes import ATTRIBUTES, AttributeSet
+
+
+class ActionType(Enum):
+    """ActionType holds all the things the player can do in a step"""
+
+    WAIT = 0
+    MOVE = 1
+    ATTACK = 2
+    HEAVY_ATTACK = 3
+    DEFENSIVE_ATTACK = 4
+    HEAL = 5
+    LOOT = 6
+    TAKE = 7
+    BUY = 8
+    WIELD = 9
+    USE = 10
+    DESTROY = 11
+
+
+@dataclass(frozen=True)
+class Action:
+    """Action is a single player input to the dungeon engine"""
+
+    kind: ActionType
+
+    # direction to move in, for MOVE actions
+    dx: int = 0
+    dy: int = 0
+
+    # index of the item to act on, for TAKE (in the opened chest), BUY (in
+    # the shop) and WIELD, USE and DESTROY (in the player's inventory)
+    item: int = 0
+
+
+# Bytes at the start of every encoded action log.
+ACTION_LOG_MAGIC = b"SURVLOG\0"
+
+# Version of the action log format.
+ACTION_LOG_VERSION = 1
+
+# Magic, version, seed, clutter kinds, hallway clutter kinds, whether the
+# AI uses flow fields, then each of the player's attributes.
+ACTION_LOG_HEADER = struct.Struct(f"<8sHqBB?{len(ATTRIBUTES)}h")
+
+# Kind, move direction and item index of each recorded action.
+ACTION_RECORD = struct.Struct("<BbbH")
+
+
+class ActionLog:
+    """ActionLog records the actions a run was played with
+
+    Along with the seed and the player's attributes, this is everything
+    needed to play the run again exactly as it went. Actions are packed as
+    they're recorded, so even a long run only takes a few bytes per step."""
+
+    def __init__(
+        self,
+        seed: int,
+        player_attributes: AttributeSet,
+        clutter_kinds: int,
+        hall_clutter_kinds: int,
+        flow_field: bool = False,
+    ):
+        self.seed = seed
+        self.player_attributes = {
+            attr: player_attributes.get(attr) for attr in ATTRIBUTES
+        }
+        self.clutter_kinds = clutter_kinds
+        self.hall_clutter_kinds = hall_clutter_kinds
+        self.flow_field = flow_field
+
+        self._records = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._records) // ACTION_RECORD.size
+
+    def record(self, action: Action):
+        """Add an action to the end of the log."""
+        self._records += ACTION_RECORD.pack(
+            action.kind.value, action.dx, action.dy, action.item
+        )
+
+    def attributes(self) -> AttributeSet:
+        """Get the attributes the player started the run with."""
+        attributes = AttributeSet()
+        attributes.attrs.update(self.player_attributes)
+        return attributes
+
+    def actions(self) -> Iterator[Action]:
+        """Get every recorded action, in the order they were taken."""
+        # most runs are the same handful of actions over and over
+        seen: Dict[Tuple[int, int, int, int], Action] = {}
+        for record in ACTION_RECORD.iter_unpack(self._records):
+            action = seen.get(record)
+            if action is None:
+                kind, dx, dy, item = record
+                action = seen[record] = Action(ActionType(kind), dx, dy, item)
+            yield action
+
+    def encode(self) -> bytes:
+        """Encode the log as compressed bytes."""
+        header = ACTION_LOG_HEADER.pack(
+            ACTION_LOG_MAGIC,
+            ACTION_LOG_VERSION,
+            self.seed,
+            self.clutter_kinds,
+            self.hall_clutter_kinds,
+            self.flow_field,
+            *(self.player_attributes[attr] for attr in ATTRIBUTES),
+        )
+        return zlib.compress(header + self._records)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "ActionLog":
+        """Decode a log encoded with encode().
+
+        Raises a ValueError if the data isn't an action log this version
+        can read."""
+        try:
+            raw = zlib.decompress(data)
+        except zlib.error as e:
+            raise ValueError("not an action log") from e
+
+        if len(raw) < ACTION_LOG_HEADER.size:
+            raise ValueError("not an action log")
+
+        (
+            magic,
+            version,
+            seed,
+            clutter_kinds,
+            hall_clutter_kinds,
+            flow_field,
+            *values,
+        ) = ACTION_LOG_HEADER.unpack_from(raw)
+        if magic != ACTION_LOG_MAGIC:
+            raise ValueError("not an action log")
+        if version != ACTION_LOG_VERSION:
+            raise ValueError(f"version {version} action logs aren't supported")
+
+        records = raw[ACTION_LOG_HEADER.size :]
+        if len(records) % ACTION_RECORD.size:
+            raise ValueError("action log is truncated")
+
+        log = cls(seed, AttributeSet(), clutter_kinds, hall_clutter_kinds, flow_field)
+        log.player_attributes = dict(zip(ATTRIBUTES, values))
+        log._records = bytearray(records)
+        return log
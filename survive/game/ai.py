@@ -4,12 +4,17 @@ import typing
 from typing import Callable, List, Optional, Tuple
 
 from . import types
-from .game import game
+from .game import RNG_AI, game
 from .worldmap import Room
 
 if typing.TYPE_CHECKING:
+    import numpy as np
+
     from .creature import Creature
-    from .dungeon import Dungeon
+    from .engine import DungeonEngine
+
+# Offsets to each of the tiles surrounding a tile.
+NEIGHBOURS = ((0, -1), (-1, 0), (1, 0), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
 
 
 class AI:
@@ -17,9 +22,10 @@ class AI:
 
     def __init__(
         self,
-        dungeon: "Dungeon",
+        dungeon: "DungeonEngine",
         pos_walkable_cb: Callable[[Tuple[int, int]], bool],
         attack_cb: Callable[["Creature"], None],
+        flow_field: bool = False,
     ):
         self.dungeon = dungeon
         self.player = dungeon.player
@@ -28,6 +34,12 @@ class AI:
         self.pos_walkable_cb = pos_walkable_cb
         self.attack_cb = attack_cb
 
+        # In flow field mode, creatures chasing the player don't path
+        # individually. Instead, one distance map from the player is built
+        # per tick and each chasing creature steps downhill on it.
+        self.flow_field = flow_field
+        self.chase_field: Optional["np.ndarray"] = None
+
     def attach(self, creature: "Creature"):
         """Attach attaches an AIInstance to the given creature."""
         self.instances.append(AIInstance(self, creature))
@@ -36,6 +48,47 @@ class AI:
         """Detach removes an attached AIInstance."""
         self.instances.remove(instance)
 
+    def plan(self):
+        """Path every creature that needs to chase the player in one batch.
+
+        This runs before the creatures think, so that their individual
+        think() calls find their path to the player already in place."""
+        player_pos = self.player.position
+
+        if self.flow_field:
+            # creatures move around, so only the chests are avoided here
+            self.chase_field = self.worldmap.paths.distance_from(
+                player_pos,
+                [container.position for container in self.dungeon.containers],
+            )
+            return
+
+        # find everything that shares a room with the player in one lookup
+        player_room = self.worldmap.room_id_at(*player_pos)
+        room_ids = self.worldmap.room_ids_at(
+            [instance.creature.position for instance in self.instances]
+        )
+
+        chasers = [
+            instance
+            for instance, room_id in zip(self.instances, room_ids.tolist())
+            if room_id == player_room and instance.moving_to != player_pos
+        ]
+        if not chasers:
+            return
+
+        paths = self.worldmap.paths_to(
+            player_pos,
+            [instance.creature.position for instance in chasers],
+            self.player,
+            self.dungeon.creatures,
+            self.dungeon.containers,
+        )
+
+        for instance, path in zip(chasers, paths):
+            instance.moving_to = player_pos
+            instance.path = path
+
 
 class AIInstance:
     """AIInstance handles AI logic for a single creature"""
@@ -65,7 +118,7 @@ class AIInstance:
 
             self.moving_to = list(
                 room.generate_random_positions(
-                    game().random(), 1, [self.creature.position]
+                    game().rng(RNG_AI), 1, [self.creature.position]
                 )
             )[0]
             self.moving_to = room.room_to_world(self.moving_to)
@@ -90,6 +143,10 @@ class AIInstance:
 
         if player_room == my_room:
             self.leisurely = False
+            if self.ai_state.flow_field:
+                self.chase(player_pos)
+                return
+
             if self.moving_to != player_pos:
                 self.move_to(pos=player_pos)
 
@@ -109,8 +166,36 @@ class AIInstance:
         if self.path:
             # if we're not leisurely moving, we move every think()
             # otherwise we flip a coin!
-            if (not self.leisurely) or (game().random().randint(1, 12) > 8):
+            if (not self.leisurely) or (game().rng(RNG_AI).randint(1, 12) > 8):
                 next_pos = self.path[0]
                 if self.ai_state.pos_walkable_cb(next_pos):
                     self.creature.position = next_pos
                     self.path = self.path[1:]
+
+    def chase(self, player_pos: types.Position):
+        """Step toward the player using the AI's flow field."""
+        self.moving_to = player_pos
+        self.path = []
+
+        x, y = self.creature.position
+
+        # we're next to the player. attack!
+        if max(abs(x - player_pos[0]), abs(y - player_pos[1])) <= 1:
+            self.ai_state.attack_cb(self.creature)
+            return
+
+        field = self.ai_state.chase_field
+        if field is None:
+            return
+
+        here = field[x, y]
+        steps = sorted(
+            (field[x + dx, y + dy], (x + dx, y + dy)) for dx, dy in NEIGHBOURS
+        )
+        for distance, next_pos in steps:
+            if distance >= here:
+                break
+
+            if self.ai_state.pos_walkable_cb(next_pos):
+                self.creature.position = next_pos
+                break
@@ -1,7 +1,8 @@
 """This module exports AttributeSet to handle character attributes."""
 
 import math
-from typing import Dict, List, Literal, Tuple
+import random
+from typing import Dict, List, Literal, Optional, Tuple
 
 from .dice import Dice
 
@@ -31,9 +32,13 @@ class AttributeSet:
         self.attrs["wis"] = 10
         self.attrs["chr"] = 10
 
-    def rollfor(self) -> Dict[Attribute, Tuple[int, str]]:
-        """rollfor rolls dice for all attributes in this set"""
-        dice = Dice()
+    def rollfor(
+        self, rng: Optional[random.Random] = None
+    ) -> Dict[Attribute, Tuple[int, str]]:
+        """rollfor rolls dice for all attributes in this set
+
+        The game's RNG is used unless another is given."""
+        dice = Dice(rng)
 
         rolls = {}
         for key in self.attrs:
@@ -0,0 +1,194 @@
+"""This module plays many seeded dungeons headlessly and records the results."""
+
+import argparse
+import concurrent.futures
+import csv
+import dataclasses
+import os
+import sys
+from typing import List, Optional, Set
+
+import numpy as np
+
+from .attributes import AttributeSet
+from .engine import Action, ActionType, DungeonEngine
+from .game import Game, GameStats, set_game
+from .types import Position
+
+# Fraction of their maximum HP below which the scripted player heals in battle.
+POLICY_HEAL_BELOW = 0.35
+
+# Number of world turns after which a run is abandoned.
+DEFAULT_MAX_TURNS = 2000
+
+# Outcome recorded for runs that hit the turn limit.
+OUTCOME_TIMEOUT = "timeout"
+
+OUTCOMES = {
+    "STATE_WIN": "win",
+    "STATE_DEAD": "dead",
+}
+
+COLUMNS = ["seed", "outcome", "turns"] + [
+    field.name for field in dataclasses.fields(GameStats)
+]
+
+
+class ScriptedPolicy:
+    """ScriptedPolicy plays a dungeon without any input.
+
+    It heads for the nearest creature or unopened chest, attacks anything it
+    bumps into, loots everything it can, and heals when it's losing a
+    battle."""
+
+    def __init__(self, heal_below: float = POLICY_HEAL_BELOW):
+        self.heal_below = heal_below
+
+        # chests are only looted once, even if the inventory was full
+        self._looted: Set[Position] = set()
+
+    def act(self, engine: DungeonEngine) -> Action:
+        """Choose the next action to take in the given dungeon."""
+        player = engine.player
+
+        if engine.battle is not None:
+            if (
+                player.hitpoints < player.maxhitpoints * self.heal_below
+                and engine.heal_item() is not None
+            ):
+                return Action(ActionType.HEAL)
+
+            return Action(ActionType.ATTACK)
+
+        if engine.opened_chest is not None:
+            self._looted.add(engine.opened_chest.position)
+            return Action(ActionType.LOOT)
+
+        step = self.next_step(engine)
+        if step is None:
+            return Action(ActionType.WAIT)
+
+        return Action(
+            ActionType.MOVE, step[0] - player.position[0], step[1] - player.position[1]
+        )
+
+    def next_step(self, engine: DungeonEngine) -> Optional[Position]:
+        """Find the next tile on the way to the nearest target."""
+        targets = [creature.position for creature in engine.creatures]
+        targets.extend(
+            chest.position
+            for chest in engine.containers
+            if not chest.empty() and chest.position not in self._looted
+        )
+        if not targets:
+            return None
+
+        # chests can't be walked over, so steer around them
+        chests = [chest.position for chest in engine.containers]
+
+        paths = engine.worldmap.paths
+        field = paths.distance_from(engine.player.position, chests)
+
+        distances = field[tuple(np.array(targets).T)]
+        nearest = int(np.argmin(distances))
+        if distances[nearest] == np.iinfo(field.dtype).max:
+            return None
+
+        # the path runs from the target back to the player
+        path = paths.paths_to(engine.player.position, [targets[nearest]], chests)[0]
+        if len(path) < 2:
+            return targets[nearest]
+
+        return path[-2]
+
+
+@dataclasses.dataclass
+class RunResult:
+    """RunResult records how a single seeded run went"""
+
+    seed: int
+    outcome: str
+    turns: int
+    stats: GameStats
+
+    def row(self) -> List:
+        """Get the result as a row of output."""
+        return [self.seed, self.outcome, self.turns] + list(
+            dataclasses.astuple(self.stats)
+        )
+
+
+def play(seed: int, max_turns: int = DEFAULT_MAX_TURNS) -> RunResult:
+    """Play a full run of the given seed with the scripted policy."""
+    game = Game(seed=seed)
+    set_game(game)
+
+    engine = DungeonEngine(game, AttributeSet())
+    policy = ScriptedPolicy()
+
+    while engine.outcome is None and engine.turns < max_turns:
+        engine.step(policy.act(engine))
+
+    if engine.outcome is None:
+        engine.update_stats()
+        outcome = OUTCOME_TIMEOUT
+    else:
+        outcome = OUTCOMES[engine.outcome.name]
+
+    return RunResult(seed, outcome, engine.turns, game.stats())
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    """Parse the batch runner's command line."""
+    parser = argparse.ArgumentParser(
+        description="Play seeded dungeons headlessly with a scripted player."
+    )
+    parser.add_argument("--start", type=int, default=0, help="first seed to play")
+    parser.add_argument("--count", type=int, default=100, help="number of seeds")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "--max-turns",
+        type=int,
+        default=DEFAULT_MAX_TURNS,
+        help="give up on a run after this many turns",
+    )
+    parser.add_argument(
+        "--output", default="-", help="CSV file to write results to (- for stdout)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for the batch runner."""
+    args = parse_args(argv)
+
+    seeds = range(args.start, args.start + args.count)
+    max_turns = [args.max_turns] * len(seeds)
+
+    # hand out seeds in chunks so workers aren't waiting on the parent, but
+    # keep the chunks small enough that every worker gets a share
+    chunksize = max(1, len(seeds) // (args.workers * 8))
+
+    if args.output == "-":
+        output = sys.stdout
+    else:
+        output = open(  # pylint: disable=consider-using-with
+            args.output, "w", encoding="utf-8", newline=""
+        )
+
+    try:
+        writer = csv.writer(output)
+        writer.writerow(COLUMNS)
+
+        with concurrent.futures.ProcessPoolExecutor(args.workers) as executor:
+            for result in executor.map(play, seeds, max_turns, chunksize=chunksize):
+                writer.writerow(result.row())
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -1,21 +1,21 @@
 """Battle handles the battle UI logic"""
 
-from typing import List, Optional
+import typing
+from typing import Optional
 
 import pygame
 import pygame_gui
 
-from .combat import Combat, CombatState
-from .creature import Creature
-from .dice import Dice
-from .game import game
-from .item import InstantEffectItem
+from .engine import Action, ActionType
+
+if typing.TYPE_CHECKING:
+    from .engine import DungeonEngine
 
 
 class Battle(pygame_gui.elements.UIWindow):
     """Battle handles a single battle between the player and a creature"""
 
-    def __init__(self, player: Creature, defender: Creature, *args, **kwargs):
+    def __init__(self, engine: "DungeonEngine", *args, **kwargs):
         super().__init__(
             object_id=pygame_gui.core.ObjectID(
                 class_id="@battle_ui",
@@ -26,19 +26,16 @@ class Battle(pygame_gui.elements.UIWindow):
             **kwargs,
         )
 
-        self._player = player
-        self._defender = defender
-
-        self._dice = Dice()
-        self._combat = Combat(self._dice)
-        self._combat_state = CombatState(
-            player=self._player,
-            defender=self._defender,
-            atkmult=1.0,
-            defmult=1.0,
-            needs_turn=False,
-            player_heal=None,
-        )
+        if engine.battle is None:
+            raise ValueError("there's no battle to show")
+
+        self._engine = engine
+        self._combat_state = engine.battle
+        self._player = self._combat_state.player
+        self._defender = self._combat_state.defender
+
+        # the player's choice for the next turn of the battle
+        self._action: Optional[Action] = None
 
         self._build_ui()
 
@@ -48,30 +45,19 @@ class Battle(pygame_gui.elements.UIWindow):
         if not self.alive:
             return
 
-        if self._combat_state.needs_turn:
-            self._player.in_battle = True
-            self._defender.in_battle = True
+        if self._action is not None:
+            self._engine.step(self._action)
+            self._action = None
 
-            self._combat.turn(self._combat_state)
-
-            if self.player_can_heal():
+            if self._engine.player_can_heal():
                 self._player_heal_button.enable()
             else:
                 self._player_heal_button.disable()
 
             self._defender_hp_label.set_text(f"{self._defender.hitpoints} HP remains")
 
-            if not (self._player.alive and self._defender.alive):
-                self.end_battle()
-
-    def end_battle(self):
-        """end_battle ends the battle between the two combatants"""
-        if self._player.alive and not self._defender.alive:
-            game().stats().vanquished += 1
-
-        self._player.in_battle = False
-        self._defender.in_battle = False
-        self.kill()
+            if self._engine.battle is not self._combat_state:
+                self.kill()
 
     def process_event(self, event: pygame.event.Event) -> bool:
         consumed = super().process_event(event)
@@ -81,56 +67,16 @@ class Battle(pygame_gui.elements.UIWindow):
             if components:
                 which = components[-1]
                 if which == "#player_normal_attack":
-                    self._combat_state.atkmult = 1.0
-                    self._combat_state.defmult = 1.0
-                    self._combat_state.needs_turn = True
+                    self._action = Action(ActionType.ATTACK)
                 elif which == "#player_heavy_attack":
-                    self._combat_state.atkmult = 2.0
-                    self._combat_state.defmult = 0.3
-                    self._combat_state.needs_turn = True
+                    self._action = Action(ActionType.HEAVY_ATTACK)
                 elif which == "#player_defensive_attack":
-                    self._combat_state.atkmult = 0.5
-                    self._combat_state.defmult = 1.5
-                    self._combat_state.needs_turn = True
+                    self._action = Action(ActionType.DEFENSIVE_ATTACK)
                 elif which == "#player_heal":
-                    self._combat_state.needs_turn = True
-                    self._combat_state.player_heal = self.get_heal_item()
+                    self._action = Action(ActionType.HEAL)
 
         return consumed
 
-    def player_can_heal(self):
-        """player_can_heal returns whether the player has a healing item"""
-        for item in self._player.inventory.items():
-            if isinstance(item, InstantEffectItem):
-                return item.hpboost > 0
-
-        return False
-
-    def get_heal_item(self) -> Optional[InstantEffectItem]:
-        """get_heal_item gets the most effective healing item the player carries"""
-        hp_needed = self._player.maxhitpoints - self._player.hitpoints
-
-        heals: List[InstantEffectItem] = list(
-            filter(
-                lambda x: isinstance(x, InstantEffectItem) and x.hpboost > 0,
-                self._player.inventory.items(),
-            )
-        )
-        if not heals:
-            return None
-
-        heals = sorted(heals, key=lambda x: x.hpboost)
-
-        last_heal = None
-        for heal in heals:
-            if heal.hpboost >= hp_needed:
-                return heal
-
-            last_heal = heal
-
-        # none that heals all our lost HP, return the highest one we found
-        return last_heal
-
     def _build_ui(self):
         panel_rect = self.get_container().get_rect()
 
@@ -268,7 +214,7 @@ class Battle(pygame_gui.elements.UIWindow):
             tool_tip_text="Use the next available healing item in your inventory.",
         )
 
-        if not self.player_can_heal():
+        if not self._engine.player_can_heal():
             self._player_heal_button.disable()
 
         defender_panel = pygame_gui.elements.UIPanel(
@@ -0,0 +1,202 @@
+"""This module simulates many battles at once to estimate their outcomes"""
+
+import dataclasses
+import math
+from typing import Optional
+
+import numpy as np
+
+from .constants import MAXIMUM_INEFFECTIVE_DAMAGE_MULTIPLIER
+from .creature import Creature
+from .dice import DiceExpr
+
+# Number of turns after which a simulated battle is abandoned.
+DEFAULT_MAX_BATTLE_TURNS = 1000
+
+
+@dataclasses.dataclass(frozen=True)
+class CombatantStats:
+    """CombatantStats holds everything about a creature that matters in battle"""
+
+    hitpoints: int
+    attack_bonus: int
+    defense_bonus: int
+    dex_modifier: int
+    str_modifier: int
+    critical_range: int
+    critical_multiplier: int
+
+    # damage dice of the wielded weapon
+    damage: DiceExpr
+
+    @classmethod
+    def from_creature(cls, creature: Creature) -> "CombatantStats":
+        """Take the current battle stats of the given creature."""
+        return cls(
+            hitpoints=creature.hitpoints,
+            attack_bonus=creature.attack_bonus,
+            defense_bonus=creature.defense_bonus,
+            dex_modifier=creature.attributes.get_modifier("dex"),
+            str_modifier=creature.attributes.get_modifier("str"),
+            critical_range=creature.get_weapon_critical_range(),
+            critical_multiplier=creature.get_weapon_critical_multiplier(),
+            damage=creature.get_weapon_damage(),
+        )
+
+
+def armor_class(defender: CombatantStats, defmult: float = 1.0) -> int:
+    """Get the armor class of the defender with the given defense multiplier."""
+    return int(math.ceil(10 + defender.defense_bonus * defmult + defender.dex_modifier))
+
+
+def resolve_attacks(
+    attacker: CombatantStats,
+    defender: CombatantStats,
+    attack_rolls: np.ndarray,
+    crit_rolls: np.ndarray,
+    damage_rolls: np.ndarray,
+    atkmult: float = 1.0,
+    defmult: float = 1.0,
+) -> np.ndarray:
+    """Work out the damage done by a batch of attacks from the given rolls.
+
+    This follows Combat._attack exactly: crit_rolls are only used by attacks
+    whose d20 roll is in the critical range, and damage_rolls are the totals
+    of the attacker's damage dice."""
+    ac = armor_class(defender, defmult)
+
+    # as in Combat, the defender's strength modifies the attack roll
+    attack_bonus = attacker.attack_bonus + defender.str_modifier
+
+    crit = attack_rolls >= attacker.critical_range
+    effective = (attack_rolls + attack_bonus) > ac
+    ineffective = (
+        (attack_rolls + attack_bonus) / ac
+    ) * MAXIMUM_INEFFECTIVE_DAMAGE_MULTIPLIER
+
+    multiplier = np.where(effective, 1.0, ineffective)
+    multiplier = np.where(
+        crit,
+        np.where((crit_rolls + attack_bonus) > ac, attacker.critical_multiplier, 1.0),
+        multiplier,
+    )
+
+    return np.ceil(damage_rolls * (multiplier * atkmult)).astype(np.int64)
+
+
+def swing(
+    rng: np.random.Generator,
+    attacker: CombatantStats,
+    defender: CombatantStats,
+    count: int,
+    atkmult: float = 1.0,
+    defmult: float = 1.0,
+) -> np.ndarray:
+    """Roll and resolve a batch of attacks from the attacker on the defender."""
+    attack_rolls = rng.integers(1, 21, count)
+    crit_rolls = rng.integers(1, 21, count)
+
+    damage_rolls = attacker.damage.roll_many(rng, count)
+
+    return resolve_attacks(
+        attacker, defender, attack_rolls, crit_rolls, damage_rolls, atkmult, defmult
+    )
+
+
+@dataclasses.dataclass
+class BattleResults:
+    """BattleResults holds the outcome of each of a batch of simulated battles"""
+
+    # True where the player killed the defender and survived
+    player_won: np.ndarray
+
+    # True where either combatant died before the turn limit
+    finished: np.ndarray
+
+    # number of turns each battle lasted
+    turns: np.ndarray
+
+    # hitpoints left at the end of each battle
+    player_hitpoints: np.ndarray
+    defender_hitpoints: np.ndarray
+
+    def win_probability(self) -> float:
+        """Get the chance of the player winning the battle."""
+        return float(np.mean(self.player_won))
+
+    def expected_turns_to_kill(self) -> float:
+        """Get the mean number of turns taken by the battles the player won."""
+        if not np.any(self.player_won):
+            return math.nan
+        return float(np.mean(self.turns[self.player_won]))
+
+    def player_hitpoints_distribution(self) -> np.ndarray:
+        """Get the probability of the player ending on each number of HP."""
+        return hitpoints_distribution(self.player_hitpoints)
+
+    def defender_hitpoints_distribution(self) -> np.ndarray:
+        """Get the probability of the defender ending on each number of HP."""
+        return hitpoints_distribution(self.defender_hitpoints)
+
+
+def hitpoints_distribution(hitpoints: np.ndarray) -> np.ndarray:
+    """Get the probability of each number of hitpoints, indexed by HP."""
+    return np.bincount(np.maximum(hitpoints, 0)) / len(hitpoints)
+
+
+def simulate_battles(
+    player: CombatantStats,
+    defender: CombatantStats,
+    count: int,
+    rng: Optional[np.random.Generator] = None,
+    atkmult: float = 1.0,
+    defmult: float = 1.0,
+    max_turns: int = DEFAULT_MAX_BATTLE_TURNS,
+) -> BattleResults:
+    """Simulate many battles between the player and a defender at once.
+
+    Each turn runs like Combat.turn with the given attack and defense
+    multipliers: the player attacks, then the defender retaliates if it
+    still has at least 1 HP, and anyone on 0 HP or less dies. Buffs,
+    poisons and healing aren't simulated."""
+    if rng is None:
+        rng = np.random.default_rng()
+
+    player_hp = np.full(count, player.hitpoints, dtype=np.int64)
+    defender_hp = np.full(count, defender.hitpoints, dtype=np.int64)
+    turns = np.zeros(count, dtype=np.int64)
+
+    # battles where both combatants are still alive
+    active = np.arange(count)
+
+    for _ in range(max_turns):
+        if active.size == 0:
+            break
+
+        defender_hp[active] -= swing(rng, player, defender, len(active), atkmult)
+
+        # don't let the defender retaliate if the player dealt a fatal blow
+        retaliating = active[defender_hp[active] >= 1]
+        player_hp[retaliating] -= swing(
+            rng, defender, player, len(retaliating), defmult=defmult
+        )
+
+        turns[active] += 1
+
+        alive = (player_hp[active] > 0) & (defender_hp[active] > 0)
+        active = active[alive]
+
+    # the dead are left on exactly 0 HP
+    np.maximum(player_hp, 0, out=player_hp)
+    np.maximum(defender_hp, 0, out=defender_hp)
+
+    finished = np.ones(count, dtype=bool)
+    finished[active] = False
+
+    return BattleResults(
+        player_won=(player_hp > 0) & (defender_hp == 0),
+        finished=finished,
+        turns=turns,
+        player_hitpoints=player_hp,
+        defender_hitpoints=defender_hp,
+    )
@@ -47,6 +47,12 @@ MS_PER_TILE_MOVE = 125
 # the player has no chance to escape an encounter before it happens.
 MS_PER_AI_MOVE = 500
 
+# How far the player can see, in tiles, or 0 for no limit. With a limit, only
+# tiles within the radius are recomputed when the player's field of view is
+# updated, which is quicker, but anything further away can't be seen, so
+# setting one changes what the player sees.
+PLAYER_SIGHT_RADIUS = 0
+
 # The maximum damage that a creature at the base challenge level can deal.
 # We don't want a weapon that can one-hit the player even with a crit.
 # This is multiplied by CHALLENGE_LEVEL_SCALE_UP_FACTOR per challenge level.
@@ -1,10 +1,9 @@
 """This module handles everything to do with creatures (and the player)"""
 
 import math
+import random
 import typing
-from typing import Dict, Iterable, List, Optional
-
-import pygame
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from .attributes import AttributeSet
 from .constants import (
@@ -17,13 +16,16 @@ from .constants import (
     PLAYER_XP_FOR_LEVEL_2,
     PLAYER_XP_GOAL_MULTIPLIER,
 )
-from .dice import Dice
+from .dice import Dice, DiceExpr
 from .game import game
-from .item import Buff, Container, Gold, Item, Poison, WieldableItem
+from .item import Buff, Container, Gold, Item, Poison, Weapon, WieldableItem
 from .types import Position, Wieldpoint
 
 if typing.TYPE_CHECKING:
+    import pygame
+
     from .ai import AIInstance
+    from .occupancy import Occupancy
 
 
 class Creature:
@@ -31,13 +33,17 @@ class Creature:
 
     def __init__(
         self,
-        sprite: Optional[pygame.Surface],
+        sprite: Optional["pygame.Surface"],
         initial_pos: Position,
         name: str = "Creature",
         attribute_override: Optional[AttributeSet] = None,
     ):
         self.sprite = sprite
-        self.position = initial_pos
+
+        # Index of occupied tiles to keep up to date as the creature moves.
+        self.occupancy: Optional["Occupancy"] = None
+
+        self._position = initial_pos
 
         # Name of the creature.
         self.name = name
@@ -131,12 +137,26 @@ class Creature:
         # Are we a mob?
         self.mob = False
 
-    def rollforattrs(self):
-        """Rolls dice for the attributes of this creature."""
+    @property
+    def position(self) -> Position:
+        """The creature's position in the world."""
+        return self._position
 
-        rolls = self.attributes.rollfor()
+    @position.setter
+    def position(self, new_pos: Position):
+        if self.occupancy is not None:
+            self.occupancy.move_creature(self, self._position, new_pos)
+        self._position = new_pos
 
-        dice = Dice()
+    def rollforattrs(self, rng: Optional[random.Random] = None):
+        """Rolls dice for the attributes of this creature.
+
+        The game's RNG is used unless another is given."""
+
+        # the rolls for the attributes, plus hit points
+        rolls: Dict[str, Tuple[int, str]] = dict(self.attributes.rollfor(rng).items())
+
+        dice = Dice(rng)
 
         # hp = d20 + CON modifier normalized to 14 as the midpoint
 
@@ -147,10 +167,12 @@ class Creature:
 
         return rolls
 
-    def roll_mob_attrs(self):
-        """Rolls dice for mob attributes such as held gold."""
+    def roll_mob_attrs(self, rng: Optional[random.Random] = None):
+        """Rolls dice for mob attributes such as held gold.
+
+        The game's RNG is used unless another is given."""
 
-        dice = Dice()
+        dice = Dice(rng)
         # scale gold based on HP of the creature
         count = int(math.ceil(self.maxhitpoints / CREATURE_GOLD_SCALER))
         if count <= 0:
@@ -159,14 +181,15 @@ class Creature:
             math.floor(dice.rollnamed(f"{count}d20") * CREATURE_GOLD_MULTIPLIER)
         )
 
-    def get_weapon_damage(self):
+    def get_weapon_damage(self) -> DiceExpr:
         """Gets the damage of the weapon currently wielded."""
 
         # Unarmed combat: 1-6 damage.
         if self.wieldpoints["hands"] is None:
-            return "1d6"
+            return DiceExpr.parse("1d6")
 
-        return self.wieldpoints["hands"].damage()
+        # only weapons can be wielded in the hands
+        return typing.cast(Weapon, self.wieldpoints["hands"]).damage()
 
     def get_weapon_critical_range(self):
         """Gets the critical range of the weapon currently wielded."""
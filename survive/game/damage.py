@@ -0,0 +1,120 @@
+"""This module calculates exact damage and hit chances for attacks"""
+
+import functools
+from typing import Tuple
+
+import numpy as np
+
+from .constants import MAXIMUM_INEFFECTIVE_DAMAGE_MULTIPLIER
+from .dice import DiceExpr
+
+# Attack bonus that items are compared with: the base attack bonus every
+# creature starts with, before items, buffs or its strength modifier.
+COMPARISON_ATTACK_BONUS = 2
+
+# Armor class that items are compared against: 10 plus the base defense
+# bonus every creature starts with, before items, buffs or its dexterity
+# modifier. Creatures deeper in the dungeon are harder to hit than this.
+COMPARISON_ARMOR_CLASS = 12
+
+# Number of distinct attacks whose results are remembered.
+DAMAGE_CACHE_SIZE = 4096
+
+# Every face of the d20 used for attack rolls.
+D20 = np.arange(1, 21)
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@functools.lru_cache(maxsize=DAMAGE_CACHE_SIZE)
+def swing_multipliers(
+    attack_bonus: int, armor_class: int, critical_range: int, critical_multiplier: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the damage multipliers an attack can end up with, and their chances.
+
+    This follows Combat._attack: rolls in the critical range always hit and
+    apply the critical multiplier if a second roll beats the armor class,
+    and other rolls that don't beat the armor class are ineffective."""
+    normal = D20[D20 < critical_range] + attack_bonus
+    multipliers = np.where(
+        normal > armor_class,
+        1.0,
+        (normal / armor_class) * MAXIMUM_INEFFECTIVE_DAMAGE_MULTIPLIER,
+    )
+    probabilities = np.full(len(normal), 1 / 20)
+
+    crit = np.count_nonzero(D20 >= critical_range) / 20
+    confirm = np.count_nonzero(D20 + attack_bonus > armor_class) / 20
+
+    return (
+        _readonly(np.append(multipliers, [critical_multiplier, 1.0])),
+        _readonly(np.append(probabilities, [crit * confirm, crit * (1 - confirm)])),
+    )
+
+
+@functools.lru_cache(maxsize=DAMAGE_CACHE_SIZE)
+def hit_chance(attack_bonus: int, armor_class: int, critical_range: int = 20) -> float:
+    """Get the chance of an attack landing a full-strength (or critical) hit."""
+    crit = np.count_nonzero(D20 >= critical_range)
+    hits = np.count_nonzero((D20 < critical_range) & (D20 + attack_bonus > armor_class))
+    return (crit + hits) / 20
+
+
+def _outcomes(
+    damage: DiceExpr,
+    attack_bonus: int,
+    armor_class: int,
+    critical_range: int,
+    critical_multiplier: int,
+    atkmult: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the damage dealt by every combination of attack and damage roll."""
+    multipliers, chances = swing_multipliers(
+        attack_bonus, armor_class, critical_range, critical_multiplier
+    )
+
+    rolls = damage.distribution()
+    totals = np.arange(damage.min, damage.max + 1)
+
+    dealt = np.ceil(np.outer(multipliers * atkmult, totals)).astype(np.int64)
+    return dealt, np.outer(chances, rolls[damage.min :])
+
+
+@functools.lru_cache(maxsize=DAMAGE_CACHE_SIZE)
+def damage_distribution(
+    damage: DiceExpr,
+    attack_bonus: int,
+    armor_class: int,
+    critical_range: int,
+    critical_multiplier: int,
+    atkmult: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get every amount of damage an attack can deal, and their chances."""
+    dealt, probabilities = _outcomes(
+        damage, attack_bonus, armor_class, critical_range, critical_multiplier, atkmult
+    )
+
+    values, index = np.unique(dealt, return_inverse=True)
+    return (
+        _readonly(values),
+        _readonly(np.bincount(index.ravel(), weights=probabilities.ravel())),
+    )
+
+
+@functools.lru_cache(maxsize=DAMAGE_CACHE_SIZE)
+def expected_damage(
+    damage: DiceExpr,
+    attack_bonus: int,
+    armor_class: int,
+    critical_range: int,
+    critical_multiplier: int,
+    atkmult: float = 1.0,
+) -> float:
+    """Get the mean damage dealt by a single attack."""
+    dealt, probabilities = _outcomes(
+        damage, attack_bonus, armor_class, critical_range, critical_multiplier, atkmult
+    )
+    return float(np.sum(dealt * probabilities))
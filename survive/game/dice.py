@@ -1,44 +1,133 @@
 """This module exports Dice to handle dice-rolling activities"""
+import functools
+import random
 import re
-from typing import Tuple
+from typing import Optional, Tuple, Union
+
+import numpy as np
 
 from .game import game
 
+DICE_REGEX = re.compile("([1-9][0-9]*)d([1-9][0-9]*)", re.I)
+
+# Number of distinct dice expressions kept parsed at once.
+# Generated weapons use up to 20d20, so this holds every one of those.
+DICE_EXPR_CACHE_SIZE = 512
+
+
+class DiceExpr:
+    """DiceExpr is a parsed set of named dice, e.g. '3d6'
+
+    Use DiceExpr.parse to get one, so that each name is only parsed once."""
+
+    __slots__ = ("name", "count", "faces", "min", "max", "mean", "_distribution")
+
+    def __init__(self, count: int, faces: int):
+        self.name = f"{count}d{faces}"
+        self.count = count
+        self.faces = faces
+
+        self.min = count
+        self.max = count * faces
+        self.mean = count * (faces + 1) / 2
+
+        self._distribution: Optional[np.ndarray] = None
+
+    @classmethod
+    def parse(cls, name: Union[str, "DiceExpr"]) -> "DiceExpr":
+        """Get the parsed form of the given name (e.g. 3d6)."""
+        if isinstance(name, DiceExpr):
+            return name
+        return _parse(name)
+
+    def __repr__(self):
+        return f"DiceExpr({self.name!r})"
+
+    def __str__(self):
+        return self.name
+
+    def __eq__(self, other):
+        if isinstance(other, DiceExpr):
+            return (self.count, self.faces) == (other.count, other.faces)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.count, self.faces))
+
+    def __reduce__(self):
+        # only the name is stored, and loading shares the interned expression
+        return (DiceExpr.parse, (self.name,))
+
+    def roll(self, rng: random.Random) -> int:
+        """Roll the dice with the given RNG and return the total."""
+        total = 0
+        for _ in range(self.count):
+            total += rng.randint(1, self.faces)
+        return total
+
+    def roll_many(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Roll the dice n times with the given RNG and return each total."""
+        totals = np.zeros(n, dtype=np.int64)
+        for _ in range(self.count):
+            totals += rng.integers(1, self.faces + 1, n)
+        return totals
+
+    def distribution(self) -> np.ndarray:
+        """Get the exact probability of rolling each total, indexed by total."""
+        if self._distribution is None:
+            face = np.zeros(self.faces + 1)
+            face[1:] = 1.0 / self.faces
+
+            # build on the distribution of one fewer die, which is likely to
+            # be wanted too (e.g. by other weapons) and is cached the same way
+            if self.count == 1:
+                distribution = face
+            else:
+                fewer = _parse(f"{self.count - 1}d{self.faces}")
+                distribution = np.convolve(fewer.distribution(), face)
+
+            distribution.flags.writeable = False
+            self._distribution = distribution
+
+        return self._distribution
+
+
+@functools.lru_cache(maxsize=DICE_EXPR_CACHE_SIZE)
+def _parse(name: str) -> DiceExpr:
+    match = DICE_REGEX.match(name)
+    if match is None:
+        raise ValueError(f"invalid dice expression {name!r}")
+    return DiceExpr(int(match.group(1)), int(match.group(2)))
+
 
 class Dice:
-    """Dice handles all dice-rolling logic"""
+    """Dice handles all dice-rolling logic
+
+    Dice roll with the given RNG, or the game's RNG if there isn't one."""
 
-    def __init__(self):
-        self.regex = re.compile("([1-9][0-9]*)d([1-9][0-9]*)", re.I)
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._rng = rng
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            return game().random()
+        return self._rng
 
     def roll(self, low: int = 1, high: int = 20) -> int:
         """roll rolls a single die with the given range"""
         low = max(low, 1)
-        return game().random().randint(low, high)
+        return self._random().randint(low, high)
 
-    def rollnamed(self, name: str) -> int:
+    def rollnamed(self, name: Union[str, DiceExpr]) -> int:
         """rollnamed rolls a named set of dice, e.g. '3d6' will roll 3 6-sided dice"""
-        match = self.regex.match(name)
-        count = int(match.group(1))
-        faces = int(match.group(2))
-
-        total = 0
-        for _ in range(count):
-            total += self.roll(1, faces)
-
-        return total
+        return DiceExpr.parse(name).roll(self._random())
 
-    def extract(self, name: str) -> Tuple[int, int]:
+    def extract(self, name: Union[str, DiceExpr]) -> Tuple[int, int]:
         """extract turns the given name (e.g. 3d6) into a dice and face count"""
-        match = self.regex.match(name)
-        count = int(match.group(1))
-        faces = int(match.group(2))
-        return (count, faces)
+        expr = DiceExpr.parse(name)
+        return (expr.count, expr.faces)
 
-    def minmax(self, name: str) -> Tuple[int, int]:
+    def minmax(self, name: Union[str, DiceExpr]) -> Tuple[int, int]:
         """minmax gives the minimumand maximum range for a named dice (e.g. 3d6 is 3-18)"""
-        match = self.regex.match(name)
-        count = int(match.group(1))
-        faces = int(match.group(2))
-
-        return (count, count * faces)
+        expr = DiceExpr.parse(name)
+        return (expr.min, expr.max)
@@ -1,48 +1,27 @@
 """This module holds the main game logic for a dungeon"""
 
-import datetime
 import math
+from concurrent.futures import Future
 from typing import List, Optional, Union
 
-import humanize
 import pygame
 import pygame_gui
 
-from .ai import AI
 from .attributes import AttributeSet
+from .autosave import Autosaver
 from .battle import Battle
-from .combat import Combat
-from .constants import (
-    BANDAGES_HEAL_HP,
-    BOSS_CHALLENGE_LEVEL,
-    COLOSSAL_HEALTH_POTION_HEAL_HP,
-    CREATURE_XP_MULTIPLIER,
-    GOLD_IN_CHEST_DICE,
-    HEALTH_POTION_HEAL_HP,
-    HUGE_HEALTH_POTION_HEAL_HP,
-    LARGE_HEALTH_POTION_HEAL_HP,
-    MAXIMUM_CHALLENGE_LEVEL,
-    MS_PER_AI_MOVE,
-    MS_PER_TILE_MOVE,
-    PLAYER_CONSTITUTION_BONUS,
-    PLAYER_CRIT_MINIMUM_MULTIPLIER,
-    PLAYER_CRIT_MAXIMUM_MULTIPLIER,
-    PLAYER_CRIT_MINIMUM_ROLL,
-)
-from .creature import Creature
-from .dice import Dice
+from .constants import MS_PER_AI_MOVE, MS_PER_TILE_MOVE
+from .engine import Action, ActionType, DungeonEngine, GeneratedDungeon
 from .env import ON_REPLIT
-from .game import Game, GameState
+from .game import Game
 from .inventoryui import InventoryModal
-from .item import Armor, Chest, Gold, InstantEffectItem, Weapon
-from .mapgen import Cell, generate_map
-from .online import OnlinePlay
-from .procgen import NAMES, NameGenerator, creature_at_level
+from .maprender import MapRenderer
+from .online import OnlinePlay, Tombstone
+from .savegame import save_run
 from .shopui import Shop
 from .sprites import SpriteSet
 from .transferui import InventoryTransferModal
 from .types import Position
-from .worldmap import Map, Room
 
 if ON_REPLIT:
     # 800x400 is about right for the Replit cover page
@@ -65,9 +44,6 @@ TILES_H = int(math.ceil((WINDOW_H - LOG_H) / 32))
 HALF_TILES_W = int(math.floor(TILES_W / 2))
 HALF_TILES_H = int(math.floor(TILES_H / 2))
 
-explored_overlay = pygame.Surface((32, 32), 32)
-explored_overlay.set_alpha(128, pygame.RLEACCEL)
-
 hp_green = pygame.Surface((LOG_X, LOG_PIXELS), 24)
 hp_green.fill((64, 255, 64))
 
@@ -77,17 +53,12 @@ hp_red.fill((255, 64, 64))
 xp_bar = pygame.Surface((LOG_X, LOG_PIXELS), 24)
 xp_bar.fill((255, 255, 64))
 
-boss_attribs = AttributeSet()
-boss_attribs.modify("str", 18)
-boss_attribs.modify("dex", 14)
-boss_attribs.modify("con", 15)
-boss_attribs.modify("int", 17)
-boss_attribs.modify("wis", 17)
-boss_attribs.modify("chr", 15)
-
 
 class Dungeon:
-    """Dungeon handles all of the logic for a single dungeon run."""
+    """Dungeon draws a single dungeon run and handles its input.
+
+    The game logic itself lives in a DungeonEngine, which the Dungeon feeds
+    actions to as the player presses keys and UI buttons."""
 
     def __init__(
         self,
@@ -98,6 +69,9 @@ class Dungeon:
         spriteset: SpriteSet,
         player_attributes: AttributeSet,
         online: Optional[OnlinePlay] = None,
+        generated: Optional[GeneratedDungeon] = None,
+        engine: Optional[DungeonEngine] = None,
+        autosaver: Optional[Autosaver] = None,
     ):
         self.font = font
 
@@ -108,17 +82,36 @@ class Dungeon:
         self._pause_window = None
 
         self._online = online
+        self._autosaver = autosaver
 
         self.left_x = 0
         self.right_x = 0
         self.top_y = 0
         self.bottom_y = 0
 
-        self.worldmap = generate_map(game.random())
+        # tombstones are added to the dungeon once they arrive
+        self._tombstones: Optional["Future[Optional[List[Tombstone]]]"] = None
+
+        # carry on with a restored run if we were given one
+        resumed = engine is not None
+        if engine is None:
+            if self._online is not None:
+                self._tombstones = self._online.tombstones(self.game.seed)
+
+            engine = DungeonEngine(
+                game,
+                player_attributes,
+                clutter_kinds=len(spriteset.get_clutter()),
+                hall_clutter_kinds=len(spriteset.get_hall_clutter()),
+                generated=generated,
+            )
+        elif engine.game is not game:
+            raise ValueError("a restored engine must be run with its own game")
 
-        self._name_generator = NameGenerator(game.random())
+        self.engine = engine
 
-        self.current_room: Optional[Room] = self.worldmap.rooms[0]
+        self.player = self.engine.player
+        self.worldmap = self.engine.worldmap
 
         surface_rect = self.surface.get_rect()
         parent_size = surface_rect.size
@@ -139,215 +132,24 @@ class Dungeon:
         self.first_loop = True
         self.should_think = True
 
-        self.player = Creature(
-            self.spriteset.get_player(),
-            (4, 4),
-            "Player",
-            attribute_override=player_attributes,
-        )
-
-        self.player.maxhitpoints = self.player.hitpoints = self.player.maxhitpoints + (
-            self.player.attributes.get_modifier("con") * PLAYER_CONSTITUTION_BONUS
-        )
-
-        fists = Weapon("Fists", 19, 3, dam="1d10")
-        cloth = Armor("chest", name="Cloth Armor", defensebonus=1)
-        leather_boots = Armor("feet", name="Leather Boots", defensebonus=1)
-
-        bandages = InstantEffectItem("Bandages", BANDAGES_HEAL_HP)
-        bandages.value = 10
-        health_potion = InstantEffectItem("Health Potion", HEALTH_POTION_HEAL_HP)
-        health_potion.value = 50
-
-        bigger_health_potion = InstantEffectItem(
-            "Large Health Potion", LARGE_HEALTH_POTION_HEAL_HP
-        )
-        bigger_health_potion.value = 250
-        huge_health_potion = InstantEffectItem(
-            "Huge Health Potion", HUGE_HEALTH_POTION_HEAL_HP
-        )
-        huge_health_potion.value = 750
-        biggest_health_potion = InstantEffectItem(
-            "Colossal Health Potion", COLOSSAL_HEALTH_POTION_HEAL_HP
-        )
-        biggest_health_potion.value = 1250
-        instaheal = InstantEffectItem("Instaheal", 1000000000)
-        instaheal.value = 15000
-
-        self.shop_consumables = [
-            bandages,
-            health_potion,
-            bigger_health_potion,
-            huge_health_potion,
-            biggest_health_potion,
-            instaheal,
-        ]
-
-        self.player.wield("hands", fists)
-        self.player.wield("chest", cloth)
-        self.player.wield("feet", leather_boots)
-
-        for _ in range(5):
-            self.player.give(bandages)
-        self.player.give(health_potion)
-
-        self.creatures = []
-        self.containers = []
-
-        self.ai = AI(
-            self,
-            self.walkable,
-            self.handle_attack,
-        )
-
-        mob_sprite = spriteset.get_mob(0)
-
-        self.dice = Dice()
-        self.combat = Combat(self.dice)
-
-        self.generated_weapons: List[Weapon] = []
-        self.generated_armors: List[Armor] = []
-
-        self.generate_items()
-
-        starting_room = self.worldmap.rooms[0]
-
+        self.mob_sprite = spriteset.get_mob(0)
         self.chest_sprite = spriteset.get_chest(False)
         self.chest_open_sprite = spriteset.get_chest(True)
 
-        # diagonal length of the map to scale up mobs/rewards in each room
-        diag = math.sqrt(
-            (self.worldmap.width * self.worldmap.width)
-            + (self.worldmap.height * self.worldmap.height)
-        )
+        self.map_renderer = MapRenderer(self.worldmap, self.spriteset)
 
-        # generate some mobs and stuff
-        for room_nth, room in enumerate(self.worldmap.rooms):
-            dist = room.distance_to(starting_room)
-            scaled = dist / diag
-
-            boss: bool = (room.attrs & Room.ATTR_BOSS_ROOM) == Room.ATTR_BOSS_ROOM
-            if boss:
-                challenge_level = BOSS_CHALLENGE_LEVEL
-
-            # print(f'processing room at {room.pos}, distance to start is {dist} ({scaled})')
-            if room.attrs & Room.ATTR_SHOP_ROOM:
-                # splat some props into the room, make it look different
-                room_squares = room.dims[0] * room.dims[1]
-                clutter_positions = list(
-                    room.generate_random_positions(
-                        self.game.random(),
-                        int(math.ceil(room_squares / 3)),
-                    )
-                )
-                for pos in clutter_positions:
-                    clutter = self.game.random().choice(self.spriteset.get_clutter())
-                    real_pos = room.room_to_world(pos)
-                    cell = self.worldmap.cell_at(*real_pos)
-                    cell.clutter = clutter
+        # dirty rect tracking, map rects are in map pixel coordinates
+        self._dirty_map_rects: List[pygame.Rect] = []
+        self._drawn_rects: List[pygame.Rect] = []
+        self._last_view: Optional[Position] = None
+        self._ui_was_open = True
+        self._ended = False
 
-                continue
-
-            if room.attrs & Room.ATTR_STARTING_ROOM:
-                mob_positions = []
-            else:
-                if boss:
-                    count = 1
-                else:
-                    count = self.dice.roll(1, int(math.ceil(6 * scaled)))
-
-                mob_positions = list(
-                    room.generate_random_positions(
-                        self.game.random(),
-                        count,
-                    )
-                )
-
-            # add one tile of padding to chests so they can never block doorways
-            chest_positions = list(
-                room.generate_random_positions(
-                    self.game.random(),
-                    self.dice.roll(1, int(math.ceil(8 * scaled))),
-                    keepouts=mob_positions,
-                    padding=1,
-                )
-            )
-
-            # increase challenge level as we get further from the start room
-            # ignore the boss room though
-            room_scale_factor = room_nth / (len(self.worldmap.rooms) - 1)
-
-            challenge_level = int(
-                math.floor(room_scale_factor * MAXIMUM_CHALLENGE_LEVEL)
-            )
-
-            for pos in mob_positions:
-                mob = creature_at_level(
-                    challenge_level, self._name_generator, self.game.random()
-                )
-
-                if boss:
-                    mob.attributes = boss_attribs
-                    mob.name = "Dungeon Boss"
-
-                mob.roll_mob_attrs()
-                mob.position = room.room_to_world(pos)
-                mob.sprite = mob_sprite
-                mob.mob = True
-
-                self.creatures.append(mob)
-                self.ai.attach(mob)
-
-            for pos in chest_positions:
-                chest = Chest(room.room_to_world(pos))
-                if self.dice.roll(1, 20) > 12:
-                    weapon = self.game.random().choice(self.generated_weapons)
-                    self.generated_weapons.remove(weapon)
-                    chest.add_item(weapon)
-                if self.dice.roll(1, 20) > 15:
-                    armor = self.game.random().choice(self.generated_armors)
-                    self.generated_armors.remove(armor)
-                    chest.add_item(armor)
-                if self.dice.roll(1, 20) > 7:
-                    gold = self.dice.rollnamed(GOLD_IN_CHEST_DICE)
-                    chest.add_item(Gold(value=gold))
-                if self.dice.roll(1, 20) >= 20:
-                    chest.add_item(bigger_health_potion)
-                elif self.dice.roll(1, 20) >= 19:
-                    # make sure the high level rooms have hefty heals
-                    if challenge_level >= 8:
-                        chest.add_item(bigger_health_potion)
-                    else:
-                        chest.add_item(health_potion)
-                elif self.dice.roll(1, 20) >= 18:
-                    # don't put bandages in high-level rooms
-                    if challenge_level >= 8:
-                        chest.add_item(bigger_health_potion)
-                    elif challenge_level >= 5:
-                        chest.add_item(health_potion)
-                    else:
-                        chest.add_item(bandages)
-
-                # don't add empty chests to the world
-                if chest.empty():
-                    continue
-
-                self.containers.append(chest)
-
-        # clutter up the hallways
-        for cell in self.worldmap.cells:
-            if cell.cell_type != Cell.TYPE_HALL:
-                continue
-
-            if self.dice.roll(1, 20) >= 15:
-                cell.wall_clutter = self.game.random().choice(
-                    self.spriteset.get_hall_clutter()
-                )
-
-        game.log("Welcome to the dungeon. Good luck!")
-        game.log("Clear out every foe in the dungeon to win.")
-        game.log("WASD to move. Move into enemies to attack.")
-        game.log("Move into chests to open them.")
+        if not resumed:
+            game.log("Welcome to the dungeon. Good luck!")
+            game.log("Clear out every foe in the dungeon to win.")
+            game.log("WASD to move. Move into enemies to attack.")
+            game.log("Move into chests to open them.")
 
         self._inventory_button = pygame_gui.elements.UIButton(
             pygame.Rect(-52, 8, 48, 48),
@@ -395,63 +197,9 @@ class Dungeon:
         self._x_delta = 0
         self._y_delta = 0
 
-        if self._online is not None:
-            self.tombstones = self._online.tombstones(self.game.seed)
-        else:
-            self.tombstones = []
-
-    def generate_items(self) -> None:
-        """Generate items to use throughout the dungeon."""
-
-        for _ in range(1250):
-            value_mult = 1
-
-            special = self.dice.roll() >= 19
-            if special:
-                value_mult += 2
-
-            mountpoint = self.game.random().choice(list(NAMES.values()))
-
-            name = self._name_generator.generate_name(mountpoint, special)
-
-            if mountpoint != "hands":
-                ab = self.dice.roll()
-                db = self.dice.roll()
-                armor = Armor(
-                    mountpoint, name=name.title(), attackbonus=ab, defensebonus=db
-                )
-
-                value = (ab * 3) + (db * 2)
-                value *= value_mult
-                armor.value = int(value)
-
-                self.generated_armors.append(armor)
-            else:
-                cr = self.dice.roll(PLAYER_CRIT_MINIMUM_ROLL, 20)
-                cm = self.dice.roll(
-                    PLAYER_CRIT_MINIMUM_MULTIPLIER, PLAYER_CRIT_MAXIMUM_MULTIPLIER
-                )
-                ab = self.dice.roll()
-                db = self.dice.roll()
-                dn = self.dice.roll()
-                ds = self.dice.roll()
-                weapon = Weapon(name.title(), cr, cm, ab, db, f"{dn}d{ds}")
-
-                value = (((dn * ds) + cr) * cm) + (ab * 3) + (db * 2)
-                value *= value_mult
-                weapon.value = int(value)
-
-                self.generated_weapons.append(weapon)
-
-        self.generated_armors = list(
-            sorted(self.generated_armors, key=lambda k: k.value, reverse=True)
-        )
-        self.generated_weapons = list(
-            sorted(self.generated_weapons, key=lambda k: k.value, reverse=True)
-        )
-
-        self.shop_armors = self.generated_armors[:5]
-        self.shop_weapons = self.generated_weapons[:5]
+        # pick a restored battle back up where it left off
+        self.show_battle()
+        self._shop_button.visible = self.engine.in_shop()
 
     def kill(self):
         """Ends the game."""
@@ -464,100 +212,39 @@ class Dungeon:
 
         self.container.kill()
 
-    def handle_attack(self, mob: Creature):
-        """Handles an attack on the player from the given mob."""
-
-        # drop the attack if we're already busy
-        if self._modal is not None:
-            return
-
-        if self._battle is not None:
-            return
-
-        rect = self.container.get_rect()
-        self._battle = Battle(
-            self.player,
-            mob,
-            rect=pygame.Rect(0, 0, rect.width, LOG_Y),
-            manager=self.ui,
-        )
-        self._inventory_button.visible = False
-
-    def walkable(self, pos: Position) -> bool:
-        """Returns True if the given position can be walked on."""
-
-        cell = self.worldmap.cell_at(*pos)
-        if not cell.is_passable():
-            return False
+    def step(self, action: Action):
+        """Runs an action on the engine and shows anything that came of it."""
 
-        if self.player.position == pos:
-            return False
+        fov_change = self.engine.step(action)
+        if fov_change is not None:
+            self._dirty_map_rects.extend(self.map_renderer.update_fog(fov_change))
 
-        for creature in self.creatures:
-            if creature.position == pos:
-                return False
+        self._shop_button.visible = self.engine.in_shop()
 
-        for chest in self.containers:
-            if chest.position == pos:
-                return False
+        self.show_battle()
 
-        return True
-
-    def move_player(self, new_player_pos: Position):
-        """Attempts to move the player to the given position."""
+        if self.engine.opened_chest is not None:
+            self._modal = InventoryTransferModal(self.ui, self.engine, self.surface)
 
-        attacked_creature = None
-        opened_chest = None
+        if self.engine.outcome is not None and not self._ended:
+            self.end_game()
 
-        # did we move into a creature?
-        for creature in self.creatures:
-            if not creature.alive:
-                continue
+    def show_battle(self):
+        """Opens the battle window if the engine has a battle going on."""
 
-            if creature.position == new_player_pos:
-                # yes, it's an attack
-                attacked_creature = creature
-                break
-
-        for chest in self.containers:
-            if chest.position == new_player_pos:
-                opened_chest = chest
-                break
-
-        for tombstone in self.tombstones:
-            if (tombstone.x, tombstone.y) == new_player_pos:
-                since = datetime.datetime.now(datetime.timezone.utc) - tombstone.at
-                self.game.log(
-                    f"{tombstone.player} died here {humanize.naturaldelta(since)} ago"
-                )
+        if self.engine.battle is not None and self._battle is None:
+            rect = self.container.get_rect()
+            self._battle = Battle(
+                self.engine,
+                rect=pygame.Rect(0, 0, rect.width, LOG_Y),
+                manager=self.ui,
+            )
+            self._inventory_button.visible = False
 
-        if attacked_creature is None and opened_chest is None:
-            cell = self.worldmap.cell_at(*new_player_pos)
-            if cell.is_passable():
-                self.player.position = new_player_pos
-
-                prev_room = self.current_room
-                self.current_room = self.worldmap.room_at(*new_player_pos)
-                if self.current_room is not None and prev_room != self.current_room:
-                    if self.current_room.attrs & Room.ATTR_BOSS_ROOM:
-                        self.game.log("You entered the dungeon boss lair.")
-                    elif self.current_room.attrs & Room.ATTR_SHOP_ROOM:
-                        self.game.log("This room looks like it has a shop in it.")
-
-                    self._shop_button.visible = (
-                        self.current_room.attrs & Room.ATTR_SHOP_ROOM
-                    )
-
-        if attacked_creature is not None:
-            self.handle_attack(attacked_creature)
-
-        if opened_chest is not None:
-            if not opened_chest.empty():
-                self._modal = InventoryTransferModal(
-                    self.ui, opened_chest, self.player, self.surface
-                )
+    def save(self, path: str):
+        """Saves the run so far to the given file."""
 
-        self.should_think = True
+        save_run(path, self.engine)
 
     def handle_event(self, event: pygame.event.Event):
         """Handles pygame events."""
@@ -572,13 +259,10 @@ class Dungeon:
 
         if event.type == pygame_gui.UI_BUTTON_PRESSED:
             if event.ui_element == self._inventory_button:
-                self._modal = InventoryModal(self.ui, self.player, self.surface)
+                self._modal = InventoryModal(self.ui, self.engine, self.surface)
             elif event.ui_element == self._shop_button:
                 self._shop = Shop(
-                    self.player,
-                    self.shop_consumables,
-                    self.shop_weapons,
-                    self.shop_armors,
+                    self.engine,
                     rect=self.modal_rt,
                     manager=self.ui,
                     resizable=False,
@@ -607,21 +291,9 @@ class Dungeon:
     def draw_map(self):
         """Draws the map to the screen."""
 
-        for cell in self.worldmap.cells:
-            if cell.pos[1] >= self.bottom_y:
-                # no more cells will be rendered, we're at the bottom of the screen
-                break
-
-            draw_cell(
-                self.surface,
-                self.spriteset,
-                self.worldmap,
-                cell,
-                self.left_x,
-                self.right_x,
-                self.top_y,
-                self.bottom_y,
-            )
+        self.map_renderer.draw(
+            self.surface, self.left_x, self.right_x, self.top_y, self.bottom_y
+        )
 
     def draw_player(self):
         """Draws the player to the screen."""
@@ -635,7 +307,7 @@ class Dungeon:
     def draw_creatures(self):
         """Draws creatures to the screen."""
 
-        for creature in self.creatures:
+        for creature in self.engine.creatures:
             if not is_visible(
                 *creature.position, self.left_x, self.right_x, self.top_y, self.bottom_y
             ):
@@ -651,18 +323,18 @@ class Dungeon:
                 continue
 
             self.surface.blit(
-                creature.sprite,
+                self.mob_sprite,
                 (
                     (creature.position[0] - self.left_x) * 32,
                     (creature.position[1] - self.top_y) * 32,
                 ),
-                (0, 0, *creature.sprite.get_size()),
+                (0, 0, *self.mob_sprite.get_size()),
             )
 
     def draw_containers(self):
         """Draws chests to the screen."""
 
-        for chest in self.containers:
+        for chest in self.engine.containers:
             if not is_visible(
                 *chest.position, self.left_x, self.right_x, self.top_y, self.bottom_y
             ):
@@ -693,7 +365,7 @@ class Dungeon:
 
         sprite = self.spriteset.get_corpse()
 
-        for tombstone in self.tombstones:
+        for tombstone in self.engine.tombstones:
             if not is_visible(
                 tombstone.x,
                 tombstone.y,
@@ -793,6 +465,10 @@ class Dungeon:
     def tick(self, dt: float) -> bool:
         """Processes an iteration of game logic."""
 
+        if self._tombstones is not None and self._tombstones.done():
+            self.engine.add_tombstones(self._tombstones.result() or [])
+            self._tombstones = None
+
         if self._pause_window is not None:
             return True
 
@@ -827,15 +503,12 @@ class Dungeon:
         if keys[pygame.K_d]:
             self._x_delta = 1
 
+        action = None
+
         # use accumulator to increase time it takes to move one tile
         if self._time_accum >= MS_PER_TILE_MOVE:
             if self._x_delta != 0 or self._y_delta != 0:
-                new_player_pos = (
-                    self.player.position[0] + self._x_delta,
-                    self.player.position[1] + self._y_delta,
-                )
-
-                self.move_player(new_player_pos)
+                action = Action(ActionType.MOVE, self._x_delta, self._y_delta)
 
                 self._x_delta = 0
                 self._y_delta = 0
@@ -850,82 +523,45 @@ class Dungeon:
             self._ai_time_accum -= MS_PER_AI_MOVE
 
         # update game logic
-        if self.should_think:
-            self.worldmap.update_fov(*self.player.position)
-
-            self.player.think()
-
-            if not self.player.alive:
-                self.end_game(GameState.STATE_DEAD)
-
-            creature_died = False
-
-            for creature in self.creatures:
-                creature.think()
-
-                if not creature.alive:
-                    creature.ai_release()
-                    self.player.give_xp(
-                        int(math.floor(creature.maxhitpoints * CREATURE_XP_MULTIPLIER))
-                    )
-                    self.player.give(Gold(value=creature.gold))
-                    self.game.log(f"{creature.name} is dead. RIP.")
-                    self.game.log(
-                        f"Looted {creature.gold} gold and gained {creature.maxhitpoints} XP"
-                    )
-
-                    creature_died = True
-
-            # clear out dead creatures
-            self.creatures = list(filter(lambda c: c.alive, self.creatures))
-            if self.creatures and creature_died:
-                self.game.log(
-                    f"{len(self.creatures)} enemies still remain in the dungeon."
-                )
-
-            # dungeon cleared?
-            if self.player.alive and not self.creatures:
-                self.end_game(GameState.STATE_WIN)
+        if action is None and self.should_think:
+            action = Action(ActionType.WAIT)
 
+        if action is not None:
+            self.step(action)
             self.should_think = False
 
+        if self._autosaver is not None and not self._ended:
+            self._autosaver.tick(dt, self.engine)
+
         return True
 
-    def end_game(self, new_state: GameState):
-        """End the game, moving into the given state."""
-        self.game.stats().inventory_value = sum(
-            item.value for item in self.player.inventory.items()
-        ) + sum(
-            item.value for item in self.player.wieldpoints.values() if item is not None
-        )
-        self.game.stats().gold_left_behind = self.sum_gold_in_chests()
-        self.game.stats().level = self.player.level
+    def end_game(self):
+        """Tidies up the dungeon after the engine ends the game."""
+        self._ended = True
+        if self._autosaver is not None:
+            # a finished run can't be carried on with
+            self._autosaver.discard()
         if self._online is not None and not self.player.alive:
-            self._online.submit_tombstone(self.game.seed, *self.player.position, '\n'.join(self.game.get_log(entries=8)))
-        self.game.set_state(new_state)
+            self._online.submit_tombstone(
+                self.game.seed,
+                *self.player.position,
+                "\n".join(self.game.get_log(entries=8)),
+            )
         self.container.kill()
 
-    def sum_gold_in_chests(self) -> int:
-        """Get the total amount of gold in chests in the dungeon."""
-        total = 0
-        for chest in self.containers:
-            for item in chest.items():
-                if isinstance(item, Gold):
-                    total += item.value
-
-        return total
-
-    def render(self):
-        """Renders the game to the screen."""
+    def render(self) -> List[pygame.Rect]:
+        """Renders the game to the screen.
 
-        self.surface.fill(0)
+        Returns the screen rects that changed since the previous frame."""
 
         self.left_x = self.player.position[0] - HALF_TILES_W
-        self.right_x = self.player.position[0] + HALF_TILES_W
+        self.right_x = self.player.position[0] + HALF_TILES_W + 1
 
         self.top_y = self.player.position[1] - HALF_TILES_H
         self.bottom_y = self.player.position[1] + HALF_TILES_H + 1
 
+        self.surface.fill(0)
+
         self.draw_map()
         self.draw_tombstones()
         self.draw_player()
@@ -934,154 +570,62 @@ class Dungeon:
 
         self.draw_info_section()
 
+        return self.dirty_rects()
 
-def sprite_at(
-    surface: pygame.Surface,
-    sprite: pygame.Surface,
-    cell: Cell,
-    x: int,
-    y: int,
-    left_x: int,
-    right_x: int,
-    top_y: int,
-    bottom_y: int,
-):
-    """Renders a sprite onto the given surface at the given location."""
-
-    # don't overdraw
-    if x < left_x or x > right_x:
-        return
-    if y < top_y or y > bottom_y:
-        return
-
-    dest_x = x - left_x
-    dest_y = y - top_y
-
-    sprite_size = sprite.get_size()
-    dest = (dest_x * sprite_size[0], dest_y * sprite_size[1])
-
-    if cell.visible or cell.explored:
-        surface.blit(sprite, dest, (0, 0, *sprite_size))
-
-        if cell.explored and not cell.visible:
-            # darken explored but not visible tile
-            surface.blit(explored_overlay, dest, (0, 0, *sprite_size))
-
-
-def draw_cell(
-    surface: pygame.Surface,
-    spriteset: SpriteSet,
-    worldmap: Map,
-    cell: Cell,
-    left_x: int,
-    right_x: int,
-    top_y: int,
-    bottom_y: int,
-):
-    """Renders a map cell onto the given surface at the given location."""
-
-    if cell.cell_type == Cell.TYPE_ROOM:
-        sprite = spriteset.get_floor()
-    elif cell.cell_type == Cell.TYPE_HALL:
-        sprite = spriteset.get_hall_floor()
-    else:
-        return
-
-    sprite_at(
-        surface,
-        sprite,
-        cell,
-        cell.pos[0],
-        cell.pos[1],
-        left_x,
-        right_x,
-        top_y,
-        bottom_y,
-    )
-
-    if cell.clutter is not None:
-        sprite_at(
-            surface,
-            cell.clutter,
-            cell,
-            cell.pos[0],
-            cell.pos[1],
-            left_x,
-            right_x,
-            top_y,
-            bottom_y,
-        )
+    def dirty_rects(self) -> List[pygame.Rect]:
+        """Work out which parts of the screen changed in the last render."""
 
-    n_cell = worldmap.cell_at(cell.pos[0], cell.pos[1] - 1)
-    if not n_cell.is_passable():
-        sprite_at(
-            surface,
-            spriteset.get_wall(SpriteSet.WALL_N),
-            n_cell,
-            cell.pos[0],
-            cell.pos[1] - 1,
-            left_x,
-            right_x,
-            top_y,
-            bottom_y,
+        view = (self.left_x, self.top_y)
+        ui_open = (
+            self._modal is not None
+            or self._battle is not None
+            or self._pause_window is not None
+            or self.ui.get_hovering_any_element()
         )
 
-        if cell.wall_clutter is not None:
-            sprite_at(
-                surface,
-                cell.wall_clutter,
-                n_cell,
-                cell.pos[0],
-                cell.pos[1] - 1,
-                left_x,
-                right_x,
-                top_y,
-                bottom_y,
-            )
+        map_rects = self._dirty_map_rects
+        self._dirty_map_rects = []
 
-    if (cell.pos[1] + 1) < worldmap.height:
-        s_cell = worldmap.cell_at(cell.pos[0], cell.pos[1] + 1)
-        if not s_cell.is_passable():
-            sprite_at(
-                surface,
-                spriteset.get_wall(SpriteSet.WALL_S),
-                s_cell,
-                cell.pos[0],
-                cell.pos[1] + 1,
-                left_x,
-                right_x,
-                top_y,
-                bottom_y,
-            )
+        drawn_rects = self._drawn_rects
+        self._drawn_rects = self.sprite_rects()
 
-    w_cell = worldmap.cell_at(cell.pos[0] - 1, cell.pos[1])
-    if not w_cell.is_passable():
-        sprite_at(
-            surface,
-            spriteset.get_wall(SpriteSet.WALL_W),
-            w_cell,
-            cell.pos[0] - 1,
-            cell.pos[1],
-            left_x,
-            right_x,
-            top_y,
-            bottom_y,
-        )
+        if ui_open or self._ui_was_open or view != self._last_view:
+            # UI windows draw over anything, and scrolling moves everything
+            self._ui_was_open = ui_open
+            self._last_view = view
+            return [self.surface.get_rect()]
+
+        offset = (-self.left_x * 32, -self.top_y * 32)
+        rects = [rect.move(offset) for rect in map_rects]
 
-    if (cell.pos[0] + 1) < worldmap.width:
-        e_cell = worldmap.cell_at(cell.pos[0] + 1, cell.pos[1])
-        if not e_cell.is_passable():
-            sprite_at(
-                surface,
-                spriteset.get_wall(SpriteSet.WALL_E),
-                e_cell,
-                cell.pos[0] + 1,
-                cell.pos[1],
-                left_x,
-                right_x,
-                top_y,
-                bottom_y,
+        # sprites can move, appear and disappear between frames
+        rects.extend(drawn_rects)
+        rects.extend(self._drawn_rects)
+
+        rects.append(pygame.Rect(0, LOG_Y, WINDOW_W, LOG_H))
+        rects.extend(
+            button.get_abs_rect()
+            for button in (
+                self._inventory_button,
+                self._pause_button,
+                self._shop_button,
             )
+        )
+
+        return rects
+
+    def sprite_rects(self) -> List[pygame.Rect]:
+        """Get the screen rects of the on-screen tiles that have sprites."""
+
+        positions = [self.player.position]
+        positions.extend(creature.position for creature in self.engine.creatures)
+        positions.extend(chest.position for chest in self.engine.containers)
+
+        return [
+            pygame.Rect((x - self.left_x) * 32, (y - self.top_y) * 32, 32, 32)
+            for x, y in positions
+            if is_visible(x, y, self.left_x, self.right_x, self.top_y, self.bottom_y)
+        ]
 
 
 def is_visible(x: int, y: int, left_x: int, right_x: int, top_y: int, bottom_y: int):
@@ -0,0 +1,762 @@
+"""This module holds the headless game logic for a dungeon"""
+
+import datetime
+import math
+import random
+import typing
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import humanize
+
+from .actions import Action, ActionLog, ActionType
+from .ai import AI
+from .attributes import AttributeSet
+from .combat import Combat, CombatState
+from .constants import (
+    BANDAGES_HEAL_HP,
+    BOSS_CHALLENGE_LEVEL,
+    COLOSSAL_HEALTH_POTION_HEAL_HP,
+    CREATURE_XP_MULTIPLIER,
+    GOLD_IN_CHEST_DICE,
+    HEALTH_POTION_HEAL_HP,
+    HUGE_HEALTH_POTION_HEAL_HP,
+    LARGE_HEALTH_POTION_HEAL_HP,
+    MAXIMUM_CHALLENGE_LEVEL,
+    PLAYER_CONSTITUTION_BONUS,
+    PLAYER_SIGHT_RADIUS,
+    SHOP_DISCOUNT_FOR_CHARISMA,
+)
+from .creature import Creature
+from .dice import Dice
+from .game import RNG_COMBAT, RNG_LOOT, RNG_MAPGEN, RNG_NAMES, Game, GameState
+from .item import Armor, Chest, Gold, InstantEffectItem, Item, Weapon, WieldableItem
+from .itempool import ItemPool
+from .mapgen import Cell, generate_map
+from .occupancy import Occupancy
+from .procgen import NameGenerator, creature_at_level
+from .types import Position
+from .worldmap import FovChange, Map, Room
+
+if typing.TYPE_CHECKING:
+    from .online import Tombstone
+
+# Number of clutter and hallway clutter sprites to choose from. These match
+# the sprite set the game ships with.
+DEFAULT_CLUTTER_KINDS = 8
+DEFAULT_HALL_CLUTTER_KINDS = 7
+
+boss_attribs = AttributeSet()
+boss_attribs.modify("str", 18)
+boss_attribs.modify("dex", 14)
+boss_attribs.modify("con", 15)
+boss_attribs.modify("int", 17)
+boss_attribs.modify("wis", 17)
+boss_attribs.modify("chr", 15)
+
+
+# Attack and defense multipliers for each kind of attack in battle.
+BATTLE_MULTIPLIERS = {
+    ActionType.ATTACK: (1.0, 1.0),
+    ActionType.HEAVY_ATTACK: (2.0, 0.3),
+    ActionType.DEFENSIVE_ATTACK: (0.5, 1.5),
+}
+
+# Actions on the player's items, which the rest of the world waits for.
+ITEM_ACTIONS = {
+    ActionType.TAKE,
+    ActionType.BUY,
+    ActionType.WIELD,
+    ActionType.USE,
+    ActionType.DESTROY,
+}
+
+
+def nth_item(items: List[Item], index: int) -> Optional[Item]:
+    """Get the item at the given index, if there is one."""
+    if 0 <= index < len(items):
+        return items[index]
+    return None
+
+
+def create_consumables() -> List[InstantEffectItem]:
+    """Create the healing items, from least to most powerful."""
+    bandages = InstantEffectItem("Bandages", BANDAGES_HEAL_HP)
+    bandages.value = 10
+    health_potion = InstantEffectItem("Health Potion", HEALTH_POTION_HEAL_HP)
+    health_potion.value = 50
+
+    bigger_health_potion = InstantEffectItem(
+        "Large Health Potion", LARGE_HEALTH_POTION_HEAL_HP
+    )
+    bigger_health_potion.value = 250
+    huge_health_potion = InstantEffectItem(
+        "Huge Health Potion", HUGE_HEALTH_POTION_HEAL_HP
+    )
+    huge_health_potion.value = 750
+    biggest_health_potion = InstantEffectItem(
+        "Colossal Health Potion", COLOSSAL_HEALTH_POTION_HEAL_HP
+    )
+    biggest_health_potion.value = 1250
+    instaheal = InstantEffectItem("Instaheal", 1000000000)
+    instaheal.value = 15000
+
+    return [
+        bandages,
+        health_potion,
+        bigger_health_potion,
+        huge_health_potion,
+        biggest_health_potion,
+        instaheal,
+    ]
+
+
+@dataclass
+class GeneratedDungeon:
+    """GeneratedDungeon is everything generated for a seed before play starts
+
+    It doesn't depend on the player, so it can be generated ahead of time
+    (even in another process) and handed to a DungeonEngine later."""
+
+    seed: int
+    worldmap: Map
+    creatures: List[Creature]
+    containers: List[Chest]
+    items: ItemPool
+    name_generator: NameGenerator
+
+    # the game's random numbers as they were once generation finished
+    general: random.Random
+    streams: Dict[str, random.Random]
+
+
+def generate_dungeon(
+    game: Game,
+    clutter_kinds: int = DEFAULT_CLUTTER_KINDS,
+    hall_clutter_kinds: int = DEFAULT_HALL_CLUTTER_KINDS,
+) -> GeneratedDungeon:
+    """Generate the map, creatures and loot for the given game's seed.
+
+    Everything is drawn from the given game's random streams, so it doesn't
+    need to be the current game (see set_game)."""
+
+    # each part of generation has its own random stream, so that e.g.
+    # changing how loot is rolled doesn't move the walls around
+    mapgen = game.rng(RNG_MAPGEN)
+    mapgen_dice = Dice(mapgen)
+    loot = game.rng(RNG_LOOT)
+    loot_dice = Dice(loot)
+
+    worldmap = generate_map(mapgen)
+
+    name_generator = NameGenerator(game.rng(RNG_NAMES))
+    items = ItemPool(game.seed, name_generator)
+
+    bandages, health_potion, bigger_health_potion, *_ = create_consumables()
+
+    creatures: List[Creature] = []
+    containers: List[Chest] = []
+
+    starting_room = worldmap.rooms[0]
+
+    # diagonal length of the map to scale up mobs/rewards in each room
+    diag = math.sqrt(
+        (worldmap.width * worldmap.width) + (worldmap.height * worldmap.height)
+    )
+
+    # generate some mobs and stuff
+    for room_nth, room in enumerate(worldmap.rooms):
+        dist = room.distance_to(starting_room)
+        scaled = dist / diag
+
+        boss: bool = (room.attrs & Room.ATTR_BOSS_ROOM) == Room.ATTR_BOSS_ROOM
+        if boss:
+            challenge_level = BOSS_CHALLENGE_LEVEL
+
+        if room.attrs & Room.ATTR_SHOP_ROOM:
+            # splat some props into the room, make it look different
+            room_squares = room.dims[0] * room.dims[1]
+            clutter_positions = list(
+                room.generate_random_positions(
+                    mapgen,
+                    int(math.ceil(room_squares / 3)),
+                )
+            )
+            for pos in clutter_positions:
+                clutter = mapgen.randrange(clutter_kinds)
+                real_pos = room.room_to_world(pos)
+                worldmap.clutter[real_pos] = clutter
+
+            continue
+
+        if room.attrs & Room.ATTR_STARTING_ROOM:
+            mob_positions = []
+        else:
+            if boss:
+                count = 1
+            else:
+                count = mapgen_dice.roll(1, int(math.ceil(6 * scaled)))
+
+            mob_positions = list(
+                room.generate_random_positions(
+                    mapgen,
+                    count,
+                )
+            )
+
+        # add one tile of padding to chests so they can never block doorways
+        chest_positions = list(
+            room.generate_random_positions(
+                mapgen,
+                mapgen_dice.roll(1, int(math.ceil(8 * scaled))),
+                keepouts=mob_positions,
+                padding=1,
+            )
+        )
+
+        # increase challenge level as we get further from the start room
+        # ignore the boss room though
+        room_scale_factor = room_nth / (len(worldmap.rooms) - 1)
+
+        challenge_level = int(math.floor(room_scale_factor * MAXIMUM_CHALLENGE_LEVEL))
+
+        for pos in mob_positions:
+            mob = creature_at_level(challenge_level, name_generator, mapgen)
+
+            if boss:
+                mob.attributes = boss_attribs
+                mob.name = "Dungeon Boss"
+
+            mob.roll_mob_attrs(mapgen)
+            mob.position = room.room_to_world(pos)
+            mob.mob = True
+
+            creatures.append(mob)
+
+        for pos in chest_positions:
+            chest = Chest(room.room_to_world(pos))
+            if loot_dice.roll(1, 20) > 12:
+                chest.add_item(items.take_weapon(loot))
+            if loot_dice.roll(1, 20) > 15:
+                chest.add_item(items.take_armor(loot))
+            if loot_dice.roll(1, 20) > 7:
+                gold = loot_dice.rollnamed(GOLD_IN_CHEST_DICE)
+                chest.add_item(Gold(value=gold))
+            if loot_dice.roll(1, 20) >= 20:
+                chest.add_item(bigger_health_potion)
+            elif loot_dice.roll(1, 20) >= 19:
+                # make sure the high level rooms have hefty heals
+                if challenge_level >= 8:
+                    chest.add_item(bigger_health_potion)
+                else:
+                    chest.add_item(health_potion)
+            elif loot_dice.roll(1, 20) >= 18:
+                # don't put bandages in high-level rooms
+                if challenge_level >= 8:
+                    chest.add_item(bigger_health_potion)
+                elif challenge_level >= 5:
+                    chest.add_item(health_potion)
+                else:
+                    chest.add_item(bandages)
+
+            # don't add empty chests to the world
+            if chest.empty():
+                continue
+
+            containers.append(chest)
+
+    # clutter up the hallways
+    for pos in worldmap.positions_of(Cell.TYPE_HALL):
+        if mapgen_dice.roll(1, 20) >= 15:
+            worldmap.wall_clutter[pos] = mapgen.randrange(hall_clutter_kinds)
+
+    general, streams = game.random_streams()
+    return GeneratedDungeon(
+        game.seed,
+        worldmap,
+        creatures,
+        containers,
+        items,
+        name_generator,
+        general,
+        streams,
+    )
+
+
+class DungeonEngine:
+    """DungeonEngine runs a single dungeon without any display or UI.
+
+    The engine only moves on when it is given an action with step(). Any
+    view on top of it reads its state (the map, creatures, the current
+    battle or opened chest) after each step. The given game must be the
+    current game (see set_game), as dice rolls use its random numbers.
+
+    The dungeon is generated for the game's seed unless it was generated
+    ahead of time and given to the engine."""
+
+    def __init__(
+        self,
+        game: Game,
+        player_attributes: AttributeSet,
+        tombstones: Iterable["Tombstone"] = (),
+        clutter_kinds: int = DEFAULT_CLUTTER_KINDS,
+        hall_clutter_kinds: int = DEFAULT_HALL_CLUTTER_KINDS,
+        flow_field: bool = False,
+        generated: Optional[GeneratedDungeon] = None,
+    ):
+        self.game = game
+
+        if generated is None:
+            generated = generate_dungeon(game, clutter_kinds, hall_clutter_kinds)
+        elif generated.seed != game.seed:
+            raise ValueError(
+                f"dungeon was generated for seed {generated.seed}, not {game.seed}"
+            )
+        else:
+            # carry on from where generation left the random numbers
+            game.use_random_streams(generated.general, generated.streams)
+
+        self.worldmap = generated.worldmap
+        self.creatures = generated.creatures
+        self.containers = generated.containers
+        self.items = generated.items
+        self._name_generator = generated.name_generator
+
+        self.current_room: Optional[Room] = self.worldmap.rooms[0]
+
+        # the battle in progress, if any
+        self.battle: Optional[CombatState] = None
+
+        # the chest the player opened in the last step, if any
+        self.opened_chest: Optional[Chest] = None
+
+        # how the game ended, once it has
+        self.outcome: Optional[GameState] = None
+
+        # number of times the world has moved on
+        self.turns = 0
+
+        # every action the run has been played with
+        self.action_log = ActionLog(
+            game.seed, player_attributes, clutter_kinds, hall_clutter_kinds, flow_field
+        )
+
+        self.player = Creature(
+            None,
+            (4, 4),
+            "Player",
+            attribute_override=player_attributes,
+        )
+
+        self.player.maxhitpoints = self.player.hitpoints = self.player.maxhitpoints + (
+            self.player.attributes.get_modifier("con") * PLAYER_CONSTITUTION_BONUS
+        )
+
+        fists = Weapon("Fists", 19, 3, dam="1d10")
+        cloth = Armor("chest", name="Cloth Armor", defensebonus=1)
+        leather_boots = Armor("feet", name="Leather Boots", defensebonus=1)
+
+        self.shop_consumables = create_consumables()
+        bandages, health_potion, *_ = self.shop_consumables
+
+        self.player.wield("hands", fists)
+        self.player.wield("chest", cloth)
+        self.player.wield("feet", leather_boots)
+
+        for _ in range(5):
+            self.player.give(bandages)
+        self.player.give(health_potion)
+
+        self.occupancy = Occupancy()
+
+        self.ai = AI(
+            self,
+            self.walkable,
+            self.start_battle,
+            flow_field=flow_field,
+        )
+
+        for mob in self.creatures:
+            self.occupancy.add_creature(mob)
+            self.ai.attach(mob)
+
+        for chest in self.containers:
+            self.occupancy.add_container(chest)
+
+        self.dice = Dice(game.rng(RNG_COMBAT))
+        self.combat = Combat(self.dice)
+
+        self.tombstones: List["Tombstone"] = []
+        self.add_tombstones(tombstones)
+
+    def add_tombstones(self, tombstones: Iterable["Tombstone"]):
+        """Add the tombstones of other players to the dungeon."""
+        for tombstone in tombstones:
+            self.tombstones.append(tombstone)
+            self.occupancy.add_tombstone(tombstone)
+
+    @property
+    def shop_weapons(self) -> List[Weapon]:
+        """Get the weapons for sale in the shop."""
+        return self.items.shop_weapons()
+
+    @property
+    def shop_armors(self) -> List[Armor]:
+        """Get the armors for sale in the shop."""
+        return self.items.shop_armors()
+
+    def step(self, action: Action) -> Optional[FovChange]:
+        """Run the given player action and let the world react to it.
+
+        While a battle is in progress only battle actions do anything, and
+        the rest of the world waits for it to finish. Returns the FOV change
+        if the world moved on."""
+
+        if self.outcome is not None:
+            return None
+
+        self.action_log.record(action)
+
+        opened_chest = self.opened_chest
+        self.opened_chest = None
+
+        if self.battle is not None:
+            self.battle_turn(action)
+            return None
+
+        if action.kind == ActionType.LOOT:
+            if opened_chest is not None:
+                self.loot(opened_chest)
+            return None
+
+        if action.kind in ITEM_ACTIONS:
+            # the chest stays open while the player picks through it
+            self.opened_chest = opened_chest
+            self.item_action(action)
+            return None
+
+        if action.kind == ActionType.MOVE:
+            self.move_player(
+                (
+                    self.player.position[0] + action.dx,
+                    self.player.position[1] + action.dy,
+                )
+            )
+        elif action.kind != ActionType.WAIT:
+            return None
+
+        return self.think()
+
+    def battle_turn(self, action: Action):
+        """Run a turn of the battle in progress with the given action."""
+
+        state = self.battle
+        if state is None:
+            return
+
+        if action.kind == ActionType.HEAL:
+            state.player_heal = self.heal_item()
+        elif action.kind in BATTLE_MULTIPLIERS:
+            state.atkmult, state.defmult = BATTLE_MULTIPLIERS[action.kind]
+        else:
+            return
+
+        state.needs_turn = True
+        self.combat.turn(state)
+
+        if not (state.player.alive and state.defender.alive):
+            self.end_battle()
+
+    def start_battle(self, mob: Creature):
+        """Starts a battle between the player and the given mob."""
+
+        # drop the attack if we're already busy, or it's too late
+        if self.battle is not None or self.opened_chest is not None:
+            return
+
+        if self.outcome is not None or not self.player.alive:
+            return
+
+        self.battle = CombatState(
+            player=self.player,
+            defender=mob,
+            atkmult=1.0,
+            defmult=1.0,
+            needs_turn=False,
+            player_heal=None,
+        )
+
+        self.player.in_battle = True
+        mob.in_battle = True
+
+    def end_battle(self):
+        """Ends the battle in progress."""
+
+        state = self.battle
+        if state is None:
+            return
+
+        if state.player.alive and not state.defender.alive:
+            self.game.stats().vanquished += 1
+
+        state.player.in_battle = False
+        state.defender.in_battle = False
+        self.battle = None
+
+    def player_can_heal(self) -> bool:
+        """Returns whether the player has a healing item"""
+        for item in self.player.inventory.items():
+            if isinstance(item, InstantEffectItem):
+                return item.hpboost > 0
+
+        return False
+
+    def heal_item(self) -> Optional[InstantEffectItem]:
+        """Gets the most effective healing item the player carries"""
+        hp_needed = self.player.maxhitpoints - self.player.hitpoints
+
+        heals: List[InstantEffectItem] = list(
+            filter(
+                lambda x: isinstance(x, InstantEffectItem) and x.hpboost > 0,
+                self.player.inventory.items(),
+            )
+        )
+        if not heals:
+            return None
+
+        heals = sorted(heals, key=lambda x: x.hpboost)
+
+        last_heal = None
+        for heal in heals:
+            if heal.hpboost >= hp_needed:
+                return heal
+
+            last_heal = heal
+
+        # none that heals all our lost HP, return the highest one we found
+        return last_heal
+
+    def loot(self, chest: Chest):
+        """Transfer everything the player can carry out of the given chest."""
+
+        transferred_items = []
+
+        inventory_filled = False
+        for item in chest.items():
+            if self.player.give(item):
+                transferred_items.append(item)
+            else:
+                # don't break here, because gold still transfers to a full inventory
+                inventory_filled = True
+
+        for item in transferred_items:
+            chest.take_item(item)
+
+        if inventory_filled:
+            self.game.log("Your inventory is full!")
+            self.game.log("Some items were not transferred.")
+
+    def item_action(self, action: Action):
+        """Run an action on one of the player's items, or one for sale."""
+
+        if action.kind == ActionType.TAKE:
+            if self.opened_chest is not None:
+                item = nth_item(self.opened_chest.items(), action.item)
+                if item is not None:
+                    self.take(self.opened_chest, item)
+        elif action.kind == ActionType.BUY:
+            item = nth_item(self.shop_items(), action.item)
+            if item is not None and self.in_shop():
+                self.buy(item)
+        else:
+            item = nth_item(self.player.inventory.items(), action.item)
+            if item is None:
+                return
+
+            if action.kind == ActionType.WIELD:
+                if isinstance(item, WieldableItem):
+                    self.wield(item)
+            elif action.kind == ActionType.USE:
+                if isinstance(item, InstantEffectItem):
+                    self.use(item)
+            elif action.kind == ActionType.DESTROY:
+                self.player.inventory.take_item(item)
+
+    def take(self, chest: Chest, item: Item):
+        """Transfer the given item out of the given chest, if it fits."""
+
+        if self.player.give(item):
+            chest.take_item(item)
+
+    def shop_items(self) -> List[Item]:
+        """Get everything for sale in the shop, in the order it's shown."""
+        return [*self.shop_consumables, *self.shop_weapons, *self.shop_armors]
+
+    def price(self, item: Item) -> int:
+        """Get what the player pays for the given item in the shop."""
+        modifier = self.player.attributes.get_modifier("chr")
+        discount = SHOP_DISCOUNT_FOR_CHARISMA * modifier
+        return int(math.floor(item.value - (discount * item.value)))
+
+    def buy(self, item: Item):
+        """Buy the given item from the shop, if the player can afford it."""
+
+        price = self.price(item)
+        if self.player.gold < price:
+            return
+
+        if self.player.give(item):
+            self.player.gold -= price
+            self.game.log(f"You purchased {item.name}.")
+            self.game.stats().gold_spent += price
+        else:
+            self.game.log("Your inventory is full!")
+
+    def wield(self, item: WieldableItem):
+        """Wield the given item from the player's inventory."""
+
+        wields_at = item.wields_at()
+
+        self.player.inventory.take_item(item)
+        current = self.player.wieldpoints[wields_at]
+        self.player.wield(wields_at, item)
+
+        if current is not None:
+            # hack.
+            if current.name != "Fists":
+                self.player.inventory.add_item(current)
+
+        self.game.log(f"You wielded {item.name} at {wields_at}")
+
+    def use(self, item: InstantEffectItem):
+        """Use up the given item from the player's inventory."""
+
+        self.player.inventory.take_item(item)
+        hp = item.apply(self.player)
+        self.game.log(f"{item.name} healed {hp} HP")
+
+    def walkable(self, pos: Position) -> bool:
+        """Returns True if the given position can be walked on."""
+
+        cell = self.worldmap.cell_at(*pos)
+        if not cell.is_passable():
+            return False
+
+        if self.player.position == pos:
+            return False
+
+        return not self.occupancy.occupied(pos)
+
+    def move_player(self, new_player_pos: Position):
+        """Attempts to move the player to the given position."""
+
+        # did we move into a creature? if so, it's an attack
+        attacked_creature = self.occupancy.creature_at(new_player_pos)
+        if attacked_creature is not None and not attacked_creature.alive:
+            attacked_creature = None
+
+        opened_chest = self.occupancy.container_at(new_player_pos)
+
+        for tombstone in self.occupancy.tombstones_at(new_player_pos):
+            since = datetime.datetime.now(datetime.timezone.utc) - tombstone.at
+            self.game.log(
+                f"{tombstone.player} died here {humanize.naturaldelta(since)} ago"
+            )
+
+        if attacked_creature is None and opened_chest is None:
+            cell = self.worldmap.cell_at(*new_player_pos)
+            if cell.is_passable():
+                self.player.position = new_player_pos
+
+                prev_room = self.current_room
+                self.current_room = self.worldmap.room_at(*new_player_pos)
+                if self.current_room is not None and prev_room != self.current_room:
+                    if self.current_room.attrs & Room.ATTR_BOSS_ROOM:
+                        self.game.log("You entered the dungeon boss lair.")
+                    elif self.current_room.attrs & Room.ATTR_SHOP_ROOM:
+                        self.game.log("This room looks like it has a shop in it.")
+
+        if attacked_creature is not None:
+            self.start_battle(attacked_creature)
+
+        if opened_chest is not None:
+            if not opened_chest.empty():
+                self.opened_chest = opened_chest
+
+    def in_shop(self) -> bool:
+        """Returns True if the player is standing in the shop."""
+        return self.current_room is not None and bool(
+            self.current_room.attrs & Room.ATTR_SHOP_ROOM
+        )
+
+    def think(self) -> FovChange:
+        """Let the player and every creature in the dungeon take a turn."""
+
+        fov_change = self.worldmap.update_fov(
+            *self.player.position, PLAYER_SIGHT_RADIUS
+        )
+
+        self.player.think()
+
+        if not self.player.alive:
+            self.end_game(GameState.STATE_DEAD)
+
+        creature_died = False
+
+        self.ai.plan()
+
+        for creature in self.creatures:
+            creature.think()
+
+            if not creature.alive:
+                creature.ai_release()
+                self.occupancy.remove_creature(creature)
+                self.player.give_xp(
+                    int(math.floor(creature.maxhitpoints * CREATURE_XP_MULTIPLIER))
+                )
+                self.player.give(Gold(value=creature.gold))
+                self.game.log(f"{creature.name} is dead. RIP.")
+                self.game.log(
+                    f"Looted {creature.gold} gold and gained {creature.maxhitpoints} XP"
+                )
+
+                creature_died = True
+
+        # clear out dead creatures
+        self.creatures = list(filter(lambda c: c.alive, self.creatures))
+        if self.creatures and creature_died:
+            self.game.log(f"{len(self.creatures)} enemies still remain in the dungeon.")
+
+        # dungeon cleared?
+        if self.player.alive and not self.creatures:
+            self.end_game(GameState.STATE_WIN)
+
+        self.turns += 1
+
+        return fov_change
+
+    def end_game(self, new_state: GameState):
+        """End the game, moving into the given state."""
+        self.update_stats()
+        self.game.set_state(new_state)
+        self.outcome = new_state
+
+    def update_stats(self):
+        """Fill in the game stats that are only worked out at the end."""
+        self.game.stats().inventory_value = sum(
+            item.value for item in self.player.inventory.items()
+        ) + sum(
+            item.value for item in self.player.wieldpoints.values() if item is not None
+        )
+        self.game.stats().gold_left_behind = self.sum_gold_in_chests()
+        self.game.stats().level = self.player.level
+
+    def sum_gold_in_chests(self) -> int:
+        """Get the total amount of gold in chests in the dungeon."""
+        total = 0
+        for chest in self.containers:
+            for item in chest.items():
+                if isinstance(item, Gold):
+                    total += item.value
+
+        return total
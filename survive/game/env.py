@@ -7,3 +7,5 @@ ON_REPLIT = os.environ.get("REPL_ID") is not None
 IS_TESTING = os.environ.get("TESTING") == "testing"
 
 ONLINE_PLAY = ON_REPLIT or True
+
+FAST_DECODE = os.environ.get("FAST_DECODE") == "1"
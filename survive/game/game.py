@@ -3,7 +3,23 @@
 import random
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Names of the random streams each part of the game draws from.
+RNG_MAPGEN = "mapgen"
+RNG_LOOT = "loot"
+RNG_NAMES = "names"
+RNG_COMBAT = "combat"
+RNG_AI = "ai"
+RNG_ITEMS = "items"
+
+
+def derive_rng(seed: int, name: str) -> random.Random:
+    """Get the named random stream of the given seed.
+
+    Each stream depends only on the seed and its name, so drawing more or
+    fewer numbers from one stream never changes another."""
+    return random.Random(f"{seed}:{name}")
 
 
 class GameState(Enum):
@@ -36,6 +52,7 @@ class Game:
         self._random = random.Random()
         self._random.seed(seed)
         self.seed = seed
+        self._streams: Dict[str, random.Random] = {}
         self._state: GameState = GameState.STATE_MAIN_MENU
         self.reset_stats()
 
@@ -47,8 +64,28 @@ class Game:
         """Add the given string to the game log"""
         self._log.append(entry)
 
+    def rng(self, name: str) -> random.Random:
+        """Get the game's named random stream (e.g. RNG_MAPGEN)"""
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = derive_rng(self.seed, name)
+        return stream
+
+    def random_streams(self) -> Tuple[random.Random, Dict[str, random.Random]]:
+        """Get the game's random number generator and all its named streams"""
+        return self._random, dict(self._streams)
+
+    def use_random_streams(
+        self, general: random.Random, streams: Dict[str, random.Random]
+    ):
+        """Replace the game's random number generator and named streams"""
+        self._random = general
+        self._streams = dict(streams)
+
     def random(self):
-        """Get the game's random number generator"""
+        """Get the game's random number generator
+
+        This is for anything that doesn't have a stream of its own."""
         return self._random
 
     def state(self) -> GameState:
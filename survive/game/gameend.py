@@ -1,14 +1,15 @@
 """This module handles the game-end screen."""
 
 import datetime
-from typing import Optional
+from concurrent.futures import Future
+from typing import List, Optional
 
 import humanize
 import pygame
 import pygame_gui
 
 from .game import GameState, game
-from .online import OnlinePlay
+from .online import Leaderboard, OnlinePlay
 
 YOU_WON = "Dungeon cleared!"
 YOU_LOST = "The dungeon consumed you."
@@ -33,6 +34,10 @@ class GameEndedScreen:
 
         self.popup = None
 
+        # the popup's text, and the leaderboard to add to it once it arrives
+        self._subtitle = ""
+        self._board: Optional["Future[Optional[Leaderboard]]"] = None
+
         self.dialog_rt = pygame.Rect(0, 0, 0, 0)
 
     def set_won(self, won: bool):
@@ -40,7 +45,16 @@ class GameEndedScreen:
         self.won = won
 
     def tick(self, _):
-        """Does nothing, present for compatibility."""
+        """Shows the leaderboard once it has arrived."""
+        if self._board is None or not self._board.done():
+            return
+
+        board = self._board.result()
+        self._board = None
+        if self.popup is not None:
+            self.popup.text_block.set_text(
+                self._subtitle + self._leaderboard_text(board)
+            )
 
     def rebuild(self):
         """Rebuilds the UI to show the popup again."""
@@ -69,7 +83,12 @@ class GameEndedScreen:
                 + "\n".join(game().get_log())
             )
 
-        subtitle += self._leaderboard()
+        self._subtitle = subtitle
+        if self.online is not None:
+            # submit the player's score before we load the leaderboard
+            submitted = self.online.submit_score(game().seed, self._calculate_score())
+            self._board = self.online.leaderboard(game().seed, after=submitted)
+            subtitle += self._leaderboard_text(None, loading=True)
 
         self.popup = pygame_gui.windows.UIMessageWindow(
             self.dialog_rt,
@@ -78,8 +97,9 @@ class GameEndedScreen:
             window_title=YOU_WON if self.won else YOU_LOST,
         )
 
-    def render(self):
-        """Does nothing, present for compatibility."""
+    def render(self) -> Optional[List[pygame.Rect]]:
+        """Does nothing, but the popup covers the whole surface."""
+        return [self.surface.get_rect()]
 
     def menu(self):
         """Puts the game into the main menu."""
@@ -133,17 +153,13 @@ Your score is: <b>{score}</b>."""
             + stats.vanquished
         )
 
-    def _leaderboard(self) -> str:
-        """Returns leaderboard text, if one is available."""
-        if self.online is None:
-            return ""
-
-        # submit the player's score before we load the leaderboard
-        self.online.submit_score(game().seed, self._calculate_score())
-
-        board = self.online.leaderboard(game().seed)
-
-        if board.entries:
+    def _leaderboard_text(self, board: Optional[Leaderboard], loading=False) -> str:
+        """Returns leaderboard text for the given leaderboard."""
+        if loading:
+            board_str = "Loading the leaderboard..."
+        elif board is None:
+            board_str = "The leaderboard couldn't be loaded."
+        elif board.entries:
             board_str = ""
             for nth, entry in enumerate(board.entries):
                 since = datetime.datetime.now(datetime.timezone.utc) - entry.at
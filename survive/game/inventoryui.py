@@ -1,21 +1,30 @@
 """This module handles everything for the inventory management UI."""
 
+import typing
+from typing import List, Optional
+
 import pygame
 import pygame_gui
 
-from .creature import Creature
-from .game import game
-from .item import InstantEffectItem, WieldableItem
+from .actions import Action, ActionType
+from .item import InstantEffectItem, Item, WieldableItem
+
+if typing.TYPE_CHECKING:
+    from .engine import DungeonEngine
 
 
 class InventoryModal:
     """Runs the modal for inventory management."""
 
     def __init__(
-        self, ui: pygame_gui.UIManager, player: Creature, surface: pygame.Surface
+        self,
+        ui: pygame_gui.UIManager,
+        engine: "DungeonEngine",
+        surface: pygame.Surface,
     ):
         self.ui = ui
-        self.player = player
+        self.engine = engine
+        self.player = engine.player
 
         self.surface = surface
         parent_size = self.surface.get_rect().size
@@ -36,7 +45,7 @@ class InventoryModal:
             rect=rt, manager=ui, resizable=False, window_display_title="Inventory"
         )
 
-        self._player = player
+        self._player = engine.player
         self._done = False
         self.dirty = True
         self.bag = None
@@ -178,8 +187,9 @@ class InventoryModal:
 
                 self.heal[heal_button] = item
 
-    def render(self):
+    def render(self) -> Optional[List[pygame.Rect]]:
         """Unused. Here for compatibility."""
+        return None
 
     def tick(self, _):
         """Unused. Here for compatibility."""
@@ -194,23 +204,18 @@ class InventoryModal:
 
         return not self.window.alive()
 
-    def wield_item(self, item: WieldableItem):
-        """Wields the given item on the player."""
-
-        wields_at = item.wields_at()
+    def item_action(self, kind: ActionType, item: Item):
+        """Runs an action on the given item in the player's inventory."""
 
-        self.player.inventory.take_item(item)
-        current = self.player.wieldpoints[wields_at]
-        self.player.wield(wields_at, item)
+        index = self.player.inventory.items().index(item)
+        self.engine.step(Action(kind, item=index))
 
-        if current is not None:
-            # hack.
-            if current.name != "Fists":
-                self.player.inventory.add_item(current)
+        self.rebuild()
 
-        game().log("You wielded %s at %s" % (item.name, item.wields_at()))
+    def wield_item(self, item: WieldableItem):
+        """Wields the given item on the player."""
 
-        self.rebuild()
+        self.item_action(ActionType.WIELD, item)
 
     def handle_event(self, event):
         """Handles pygame events."""
@@ -230,8 +235,7 @@ class InventoryModal:
 
             item = self.destroy.get(event.ui_element)
             if item is not None:
-                self.player.inventory.take_item(item)
-                self.rebuild()
+                self.item_action(ActionType.DESTROY, item)
 
             item = self.wield.get(event.ui_element)
             if item is not None:
@@ -252,11 +256,7 @@ class InventoryModal:
 
             item = self.heal.get(event.ui_element)
             if item is not None:
-                self.player.inventory.take_item(item)
-                hp = item.apply(self.player)
-                self.rebuild()
-
-                game().log("%s healed %d HP" % (item.name, hp))
+                self.item_action(ActionType.USE, item)
 
         elif event.type == pygame_gui.UI_CONFIRMATION_DIALOG_CONFIRMED:
             self.wield_item(self.confirming_wield)
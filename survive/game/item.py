@@ -5,7 +5,13 @@ import typing
 from typing import Any, List
 
 from .constants import PLAYER_CRIT_MINIMUM_MULTIPLIER
-from .dice import Dice
+from .damage import (
+    COMPARISON_ARMOR_CLASS,
+    COMPARISON_ATTACK_BONUS,
+    expected_damage,
+    hit_chance,
+)
+from .dice import DiceExpr
 from .types import Position, Wieldpoint
 
 if typing.TYPE_CHECKING:
@@ -139,10 +145,20 @@ class Armor(WieldableItem):
     def wields_at(self) -> Wieldpoint:
         return self.wieldpoint
 
+    def chance_to_be_hit(self, armor_class: int = COMPARISON_ARMOR_CLASS) -> float:
+        """Get the chance of a basic attack hitting the wearer of this armor."""
+        return hit_chance(COMPARISON_ATTACK_BONUS, armor_class + self.defensebonus)
+
     def compare_to(self, other, tag="") -> str:
+        hit = render_inequality(
+            round(self.chance_to_be_hit() * 100),
+            round(other.chance_to_be_hit() * 100),
+            higher_better=False,
+        )
         return f"""Comparing {self.name} to {other.name}{tag}:
 Attack Bonus: {render_inequality(self.attackbonus, other.attackbonus)}
 Defense Bonus: {render_inequality(self.defensebonus, other.defensebonus)}
+Chance to be hit: {hit}%
 Wields At: {self.wieldpoint}
 """
 
@@ -177,7 +193,7 @@ class Weapon(WieldableItem):
 
         self.critrange = critrange
         self.critmult = max(PLAYER_CRIT_MINIMUM_MULTIPLIER, critmult)
-        self.dam = dam
+        self.dam = DiceExpr.parse(dam)
 
     def __repr__(self):
         return self.describe()
@@ -202,23 +218,50 @@ class Weapon(WieldableItem):
         """Gets the critical hit multiplier for this weapon."""
         return self.critmult
 
-    def damage(self) -> str:
-        """Gets the damage dice name for this weapon."""
+    def damage(self) -> DiceExpr:
+        """Gets the damage dice for this weapon."""
         return self.dam
 
     def wields_at(self) -> Wieldpoint:
         return "hands"
 
+    def expected_damage(
+        self,
+        armor_class: int = COMPARISON_ARMOR_CLASS,
+        attack_bonus: int = COMPARISON_ATTACK_BONUS,
+    ) -> float:
+        """Get the mean damage per attack with this weapon against the given AC.
+
+        The attack bonus is that of the wielder without this weapon."""
+        return expected_damage(
+            self.dam,
+            attack_bonus + self.attackbonus,
+            armor_class,
+            self.critrange,
+            self.critmult,
+        )
+
+    def hit_chance(
+        self,
+        armor_class: int = COMPARISON_ARMOR_CLASS,
+        attack_bonus: int = COMPARISON_ATTACK_BONUS,
+    ) -> float:
+        """Get the chance of a full-strength hit with this weapon."""
+        return hit_chance(attack_bonus + self.attackbonus, armor_class, self.critrange)
+
     def compare_to(self, other, tag="") -> str:
-        dice = Dice()
-        dam_min, dam_max = dice.minmax(self.dam)
-        other_dam_min, other_dam_max = dice.minmax(other.dam)
+        hit = render_inequality(
+            round(self.hit_chance() * 100), round(other.hit_chance() * 100)
+        )
         return f"""Comparing {self.name} to {other.name}{tag}:
 Crit range: {render_inequality(self.critrange, other.critrange, higher_better=False)}
 Crit multiplier: {render_inequality(self.critmult, other.critmult)}
 Damage roll: {self.dam} vs {other.dam}
-  ... minimum damage {render_inequality(dam_min, other_dam_min)}
-  ... maximum damage {render_inequality(dam_max, other_dam_max)}
+  ... minimum damage {render_inequality(self.dam.min, other.dam.min)}
+  ... maximum damage {render_inequality(self.dam.max, other.dam.max)}
+Expected damage vs AC {COMPARISON_ARMOR_CLASS}: \
+{render_inequality(self.expected_damage(), other.expected_damage(), fp=True)}
+Hit chance: {hit}%
 """
 
     def serialize(self) -> Any:
@@ -227,7 +270,7 @@ Damage roll: {self.dam} vs {other.dam}
             "name": self.name,
             "critrange": self.critrange,
             "critmult": self.critmult,
-            "dam": self.dam,
+            "dam": self.dam.name,
             "attackbonus": self.attackbonus,
             "defensebonus": self.defensebonus,
         }
@@ -0,0 +1,195 @@
+"""This module generates the dungeon's weapons and armor on demand"""
+
+import heapq
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .constants import (
+    PLAYER_CRIT_MAXIMUM_MULTIPLIER,
+    PLAYER_CRIT_MINIMUM_MULTIPLIER,
+    PLAYER_CRIT_MINIMUM_ROLL,
+)
+from .game import RNG_ITEMS, derive_rng
+from .item import Armor, Weapon
+from .procgen import NAMES, NameGenerator
+from .types import Wieldpoint
+
+# Number of weapons and armors a dungeon can hand out. A third of the item
+# names are weapons, so this matches a pool of 1250 items of either kind.
+WEAPON_POOL_SIZE = 417
+ARMOR_POOL_SIZE = 833
+
+# Number of each kind of item for sale in the shop.
+SHOP_ITEMS = 5
+
+ARMOR_WIELDPOINTS: List[Wieldpoint] = [
+    point for point in NAMES.values() if point != "hands"
+]
+
+
+@dataclass(frozen=True)
+class WeaponRolls:
+    """WeaponRolls holds the dice rolled for a weapon, before it is named"""
+
+    special: bool
+    critrange: int
+    critmult: int
+    attackbonus: int
+    defensebonus: int
+    dice: int
+    faces: int
+
+    @property
+    def value(self) -> int:
+        """Get the value of the weapon these rolls make."""
+        value = (
+            (((self.dice * self.faces) + self.critrange) * self.critmult)
+            + (self.attackbonus * 3)
+            + (self.defensebonus * 2)
+        )
+        return int(value * (3 if self.special else 1))
+
+
+@dataclass(frozen=True)
+class ArmorRolls:
+    """ArmorRolls holds the dice rolled for an armor, before it is named"""
+
+    special: bool
+    wieldpoint: Wieldpoint
+    attackbonus: int
+    defensebonus: int
+
+    @property
+    def value(self) -> int:
+        """Get the value of the armor these rolls make."""
+        value = (self.attackbonus * 3) + (self.defensebonus * 2)
+        return int(value * (3 if self.special else 1))
+
+
+def roll_weapon(rng: random.Random) -> WeaponRolls:
+    """Roll the stats of a weapon."""
+    return WeaponRolls(
+        special=rng.randint(1, 20) >= 19,
+        critrange=rng.randint(PLAYER_CRIT_MINIMUM_ROLL, 20),
+        critmult=rng.randint(
+            PLAYER_CRIT_MINIMUM_MULTIPLIER, PLAYER_CRIT_MAXIMUM_MULTIPLIER
+        ),
+        attackbonus=rng.randint(1, 20),
+        defensebonus=rng.randint(1, 20),
+        dice=rng.randint(1, 20),
+        faces=rng.randint(1, 20),
+    )
+
+
+def roll_armor(rng: random.Random) -> ArmorRolls:
+    """Roll the stats of an armor."""
+    return ArmorRolls(
+        special=rng.randint(1, 20) >= 19,
+        wieldpoint=rng.choice(ARMOR_WIELDPOINTS),
+        attackbonus=rng.randint(1, 20),
+        defensebonus=rng.randint(1, 20),
+    )
+
+
+class ItemPool:
+    """ItemPool hands out a dungeon's weapons and armor as they're needed.
+
+    Every item comes from its own random stream derived from the seed and
+    its index in the pool, so an item's stats are the same however many
+    others were generated before it. So is its name, unless an item built
+    earlier already has it: names are never reused, so it's rerolled. Items
+    are only named and built once something asks for them."""
+
+    def __init__(self, seed: int, name_generator: NameGenerator):
+        self._seed = seed
+        self._name_generator = name_generator
+
+        # items that have been built, by index
+        self._weapons: Dict[int, Weapon] = {}
+        self._armors: Dict[int, Armor] = {}
+
+        # indices of the items that haven't been taken yet
+        self._remaining = {
+            "weapon": list(range(WEAPON_POOL_SIZE)),
+            "armor": list(range(ARMOR_POOL_SIZE)),
+        }
+
+        # the shop's items, once they've been picked
+        self._shop_weapons: Optional[List[Weapon]] = None
+        self._shop_armors: Optional[List[Armor]] = None
+
+    def _rng(self, kind: str, index: int) -> random.Random:
+        return derive_rng(self._seed, f"{RNG_ITEMS}:{kind}:{index}")
+
+    def weapon(self, index: int) -> Weapon:
+        """Get the weapon at the given index of the pool."""
+        weapon = self._weapons.get(index)
+        if weapon is None:
+            rng = self._rng("weapon", index)
+            rolls = roll_weapon(rng)
+            name = self._name_generator.generate_name("hands", rolls.special, rng)
+            weapon = Weapon(
+                name.title(),
+                rolls.critrange,
+                rolls.critmult,
+                rolls.attackbonus,
+                rolls.defensebonus,
+                f"{rolls.dice}d{rolls.faces}",
+            )
+            weapon.value = rolls.value
+            self._weapons[index] = weapon
+
+        return weapon
+
+    def armor(self, index: int) -> Armor:
+        """Get the armor at the given index of the pool."""
+        armor = self._armors.get(index)
+        if armor is None:
+            rng = self._rng("armor", index)
+            rolls = roll_armor(rng)
+            name = self._name_generator.generate_name(
+                rolls.wieldpoint, rolls.special, rng
+            )
+            armor = Armor(
+                rolls.wieldpoint,
+                name=name.title(),
+                attackbonus=rolls.attackbonus,
+                defensebonus=rolls.defensebonus,
+            )
+            armor.value = rolls.value
+            self._armors[index] = armor
+
+        return armor
+
+    def take_weapon(self, rng: random.Random) -> Weapon:
+        """Take a random weapon out of the pool."""
+        remaining = self._remaining["weapon"]
+        return self.weapon(remaining.pop(rng.randrange(len(remaining))))
+
+    def take_armor(self, rng: random.Random) -> Armor:
+        """Take a random armor out of the pool."""
+        remaining = self._remaining["armor"]
+        return self.armor(remaining.pop(rng.randrange(len(remaining))))
+
+    def shop_weapons(self) -> List[Weapon]:
+        """Get the most valuable weapons in the pool."""
+        if self._shop_weapons is None:
+            best = heapq.nlargest(
+                SHOP_ITEMS,
+                range(WEAPON_POOL_SIZE),
+                key=lambda index: roll_weapon(self._rng("weapon", index)).value,
+            )
+            self._shop_weapons = [self.weapon(index) for index in best]
+        return self._shop_weapons
+
+    def shop_armors(self) -> List[Armor]:
+        """Get the most valuable armors in the pool."""
+        if self._shop_armors is None:
+            best = heapq.nlargest(
+                SHOP_ITEMS,
+                range(ARMOR_POOL_SIZE),
+                key=lambda index: roll_armor(self._rng("armor", index)).value,
+            )
+            self._shop_armors = [self.armor(index) for index in best]
+        return self._shop_armors
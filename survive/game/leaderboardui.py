@@ -1,12 +1,18 @@
 """This module exports the UI for showing high scores."""
 import datetime
+from concurrent.futures import Future
+from typing import Optional
 
 import humanize
 import pygame
 import pygame_gui
 
+from .online import Leaderboard as Board
 from .online import OnlinePlay
 
+# Text shown until the leaderboard arrives.
+LOADING_TEXT = "<b>Leaderboard</b>\n\nLoading the leaderboard..."
+
 
 class Leaderboard(pygame_gui.elements.UIWindow):
     """Leaderboard handles showing leaderboards."""
@@ -15,9 +21,13 @@ class Leaderboard(pygame_gui.elements.UIWindow):
         super().__init__(*args, **kwargs)
 
         self._online = online
+        self._board: Optional["Future[Optional[Board]]"] = None
         if not self._online:
             return
 
+        # the leaderboard shows up once it's arrived
+        self._board = online.leaderboard()
+
         container_rect = self.get_container().get_rect()
 
         self.close_button = pygame_gui.elements.UIButton(
@@ -29,7 +39,7 @@ class Leaderboard(pygame_gui.elements.UIWindow):
         )
 
         self.leaderboard = pygame_gui.elements.UITextBox(
-            html_text=self.leaderboard_text(),
+            html_text=LOADING_TEXT,
             relative_rect=(8, 8, container_rect.width - 16, container_rect.height - 56),
             manager=self.ui_manager,
             container=self.get_container(),
@@ -48,9 +58,17 @@ class Leaderboard(pygame_gui.elements.UIWindow):
 
         return consumed
 
-    def leaderboard_text(self) -> str:
+    def update(self, time_delta: float):
+        super().update(time_delta)
+
+        if self._board is not None and self._board.done():
+            self.leaderboard.set_text(self.leaderboard_text(self._board.result()))
+            self._board = None
+
+    def leaderboard_text(self, board: Optional[Board]) -> str:
         """Get the text for the leaderboard."""
-        board = self._online.leaderboard()
+        if board is None:
+            return "<b>Leaderboard</b>\n\nThe leaderboard couldn't be loaded."
 
         if board.entries:
             board_str = ""
@@ -1,30 +1,45 @@
 """This module handles the game's main menu."""
 
 import math
+import os
 import time
-from typing import Optional
+from typing import List, Optional
 
 import pygame
 import pygame_gui
 
 from .attributes import AttributeSet
 from .attributeui import CharacterCustomization
+from .autosave import AUTOSAVE_PATH, load_autosave
 from .customseed import CustomSeed
+from .engine import DungeonEngine
 from .env import ONLINE_PLAY
 from .leaderboardui import Leaderboard
 from .online import OnlinePlay
+from .pregen import Pregenerator
 
 GAME_TITLE = "Survive the Dungeon"
 GAME_SUBTITLE = "Infinite procedural dungeons. Survival is not guaranteed."
 
+# Number of days after today to generate daily dungeons for in advance.
+PREGEN_DAYS_AHEAD = 2
 
-def todays_seed() -> int:
-    """Get a random seed for today."""
-    t = int(math.ceil(time.time()))
+
+def todays_seed(now: Optional[float] = None) -> int:
+    """Get a random seed for today (or the day of the given time)."""
+    if now is None:
+        now = time.time()
+    t = int(math.ceil(now))
     t = t - (t % 86400000)  # truncate to 24h
     return t
 
 
+def upcoming_daily_seeds(days: int = PREGEN_DAYS_AHEAD) -> List[int]:
+    """Get the seeds for today's dungeon and the given number of days after."""
+    now = time.time()
+    return sorted({todays_seed(now + (day * 86400)) for day in range(days + 1)})
+
+
 class MainMenu:
     """Handles all of the main menu of the game."""
 
@@ -32,7 +47,14 @@ class MainMenu:
     STATE_CHOOSE_SEED = 1
     STATE_HIGH_SCORES = 2
 
-    def __init__(self, ui, surface, online: Optional[OnlinePlay] = None) -> None:
+    def __init__(
+        self,
+        ui,
+        surface,
+        online: Optional[OnlinePlay] = None,
+        pregenerator: Optional[Pregenerator] = None,
+        autosave_path: str = AUTOSAVE_PATH,
+    ) -> None:
         self.seed = 0
         self.ui = ui
         self.surface = surface
@@ -44,6 +66,17 @@ class MainMenu:
         self.high_score_window: Optional[Leaderboard] = None
         self.attributes: Optional[AttributeSet] = None
         self.online: Optional[OnlinePlay] = online
+        self.pregenerator: Optional[Pregenerator] = pregenerator
+
+        # the run that was autosaved, once the player chooses to continue it
+        self.autosave_path = autosave_path
+        self.resumed: Optional[DungeonEngine] = None
+        self.continue_button: Optional[pygame_gui.elements.UIButton] = None
+
+        # today's seed from the server, once it has arrived
+        self.daily_seed: Optional[int] = None
+        if self.online is not None:
+            self.online.daily_seed()
 
         self.rebuild()
 
@@ -93,12 +126,32 @@ class MainMenu:
             anchors={"top_target": title, "centerx": "centerx"},
         )
 
+        first_button = subtitle
+
+        # only offered while there's a run to carry on with
+        self.continue_button = None
+        if os.path.exists(self.autosave_path):
+            self.continue_button = pygame_gui.elements.UIButton(
+                pygame.Rect(0, 16, 192, 32),
+                "Continue",
+                manager=self.ui,
+                container=self.container,
+                anchors={"top_target": subtitle, "centerx": "centerx"},
+                object_id=pygame_gui.core.ObjectID(
+                    class_id="@mainmenu_buttons",
+                    object_id="#mainmenu_continue",
+                ),
+                tool_tip_text="Carry on with the run you were playing last time.",
+            )
+
+            first_button = self.continue_button
+
         self.random_dungeon = pygame_gui.elements.UIButton(
             pygame.Rect(0, 16, 192, 32),
             "Random Dungeon",
             manager=self.ui,
             container=self.container,
-            anchors={"top_target": subtitle, "centerx": "centerx"},
+            anchors={"top_target": first_button, "centerx": "centerx"},
             object_id=pygame_gui.core.ObjectID(
                 class_id="@mainmenu_buttons",
                 object_id="#mainmenu0",
@@ -119,6 +172,9 @@ class MainMenu:
             tool_tip_text="Play today's dungeon. New seed generated every 24 hours.",
         )
 
+        if self.online is not None and self.daily_seed is None:
+            self.daily_dungeon.disable()
+
         self.custom_seed = pygame_gui.elements.UIButton(
             pygame.Rect(0, 16, 192, 32),
             "Custom Seed",
@@ -163,9 +219,12 @@ class MainMenu:
             tool_tip_text="Quit the game.",
         )
 
-    def render(self):
-        """Render the background of the menu."""
+    def render(self) -> Optional[List[pygame.Rect]]:
+        """Render the background of the menu.
+
+        The background covers the whole surface, so all of it is dirty."""
         self.surface.fill(0)
+        return [self.surface.get_rect()]
 
     def handle_event(self, event):
         """Handle pygame events."""
@@ -175,6 +234,8 @@ class MainMenu:
         if event.type == pygame_gui.UI_BUTTON_PRESSED:
             if event.ui_element == self.quit_button:
                 self.quit()
+            elif event.ui_element == self.continue_button:
+                self.continue_run()
             elif event.ui_element == self.random_dungeon:
                 self.start_random_dungeon()
             elif event.ui_element == self.daily_dungeon:
@@ -192,8 +253,34 @@ class MainMenu:
                 self.attributes = self.character_attribute_window.attributes()
                 self.start_game()
 
-    def tick(self, dt):
-        """Unused. Here for compatibility."""
+    def tick(self, _dt):
+        """Enables the daily dungeon once today's seed has arrived."""
+        if self.online is None or self.daily_seed is not None:
+            return
+
+        future = self.online.daily_seed()
+        if not future.done():
+            return
+
+        self.daily_seed = future.result()
+        if self.daily_seed is None:
+            self.daily_seed = todays_seed()
+
+        if self.pregenerator is not None:
+            self.pregenerator.request(self.daily_seed)
+
+        if self.container is not None:
+            self.daily_dungeon.enable()
+
+    def continue_run(self):
+        """Carries on with the run that was autosaved."""
+        self.resumed = load_autosave(self.autosave_path)
+        if self.resumed is None:
+            # the autosave couldn't be loaded (and is gone now)
+            self.rebuild()
+            return
+
+        self.start_game()
 
     def start_random_dungeon(self):
         """Starts a random dungeon game."""
@@ -201,8 +288,8 @@ class MainMenu:
 
     def start_daily_dungeon(self):
         """Starts a daily dungeon game."""
-        if self.online is not None:
-            seed = self.online.daily_seed
+        if self.daily_seed is not None:
+            seed = self.daily_seed
         else:
             seed = todays_seed()
 
@@ -212,6 +299,10 @@ class MainMenu:
         """Starts a dungeon game with a user-selected seed."""
         self.seed = seed
 
+        # generate the dungeon while the player prepares their character
+        if self.pregenerator is not None and seed is not None:
+            self.pregenerator.request(seed)
+
         self.character_attribute_window = CharacterCustomization(
             rect=self.modal_rt,
             window_display_title="Prepare Yourself",
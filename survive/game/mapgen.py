@@ -1,71 +1,53 @@
 """This module handles procedural dungeon generation."""
 
 import random
-from typing import Iterable, List
+from typing import Iterable
+
+import numpy as np
 
 from .types import Position
-from .worldmap import Cell, Map, Room
+from .worldmap import NO_ROOM, Cell, Map, Room
 
 
 def fill_points(
-    world: List[Cell],
-    max_x: int,
+    world: np.ndarray,
     xys: Iterable[Position],
     cell_type: int,
     passable_only=False,
     replace=True,
 ):
     """Set the given points to the given cell type."""
-    for (x, y) in xys:
-        offset = (y * max_x) + x
-        if passable_only and not world[offset].is_passable():
-            continue
-        if (world[offset].cell_type != Cell.TYPE_EMPTY) and not replace:
-            continue
-        world[offset].cell_type = cell_type
-
-
-def paint(
-    world: List[Cell],
-    max_x: int,
-    x: int,
-    y: int,
-    width: int,
-    height: int,
-    brush: List[Cell],
-):
-    """Paint a rectangle of cells into the world."""
-    for y_ in range(height):
-        for x_ in range(width):
-            dest_offset = ((y + y_) * max_x) + (x + x_)
-            src_offset = (y_ * width) + x_
-            world[dest_offset].cell_type = brush[src_offset].cell_type
+    points = np.array(list(xys), dtype=np.intp).reshape(-1, 2)
+    xs, ys = points[:, 0], points[:, 1]
 
+    mask = np.ones(len(points), dtype=bool)
+    if passable_only:
+        mask &= (world[xs, ys] == Cell.TYPE_ROOM) | (world[xs, ys] == Cell.TYPE_HALL)
+    if not replace:
+        mask &= world[xs, ys] == Cell.TYPE_EMPTY
 
-def make_room(width: int, height: int) -> List[Cell]:
-    """Create an area of cells with the room type."""
-    total_cells = width * height
-    result = []
-    for _ in range(total_cells):
-        c = Cell((0, 0))
-        c.cell_type = Cell.TYPE_ROOM
+    world[xs[mask], ys[mask]] = cell_type
 
-        result.append(c)
 
-    return result
+def paint(world: np.ndarray, x: int, y: int, brush: np.ndarray):
+    """Paint a rectangle of cells into the world."""
+    width, height = brush.shape
+    world[x : x + width, y : y + height] = brush
+
 
+def make_room(width: int, height: int) -> np.ndarray:
+    """Create an area of cells with the room type."""
+    return np.full((width, height), Cell.TYPE_ROOM, dtype=np.int8, order="F")
 
-def generate_map(rng: random.Random, print_map=False) -> Map:
+
+def generate_map(
+    rng: random.Random, print_map=False, world_x: int = 64, world_y: int = 64
+) -> Map:
     """Generate a new dungeon."""
 
-    world_x = 64
-    world_y = 64
     total_cells = world_x * world_y
 
-    world = []
-    for y in range(world_y):
-        for x in range(world_x):
-            world.append(Cell((x, y)))
+    world = np.full((world_x, world_y), Cell.TYPE_EMPTY, dtype=np.int8, order="F")
 
     num_rects = max(1, int(0.005 * total_cells))
 
@@ -113,23 +95,21 @@ def generate_map(rng: random.Random, print_map=False) -> Map:
 
     rooms[-4].attrs |= Room.ATTR_SHOP_ROOM
 
-    for room in rooms:
-        room_map = make_room(*room.dims)
-        paint(
-            world,
-            world_x,
-            room.pos[0],
-            room.pos[1],
-            room.dims[0],
-            room.dims[1],
-            room_map,
-        )
+    # index of the room at each tile, so rooms can be looked up by position
+    room_ids = np.full((world_x, world_y), NO_ROOM, dtype=np.int16, order="F")
+
+    for nth, room in enumerate(rooms):
+        paint(world, room.pos[0], room.pos[1], make_room(*room.dims))
+        room_ids[
+            room.pos[0] : room.pos[0] + room.dims[0],
+            room.pos[1] : room.pos[1] + room.dims[1],
+        ] = nth
 
     for prev, curr in zip(rooms, rooms[1:]):
         points = list(prev.tunnel_to(curr))
-        fill_points(world, world_x, points, Cell.TYPE_HALL, replace=False)
+        fill_points(world, points, Cell.TYPE_HALL, replace=False)
 
-    result = Map(rng, world_x, world_y, rooms, world)
+    result = Map(rng, world_x, world_y, rooms, world, room_ids)
 
     # Dump the map to screen.
     if print_map:
@@ -0,0 +1,238 @@
+"""This module handles drawing the world map."""
+
+import collections
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pygame
+
+from .sprites import SpriteSet
+from .types import Position
+from .worldmap import Cell, FovChange, Map
+
+TILE_SIZE = 32
+
+# Opacity of the fog over tiles that are visible, explored, or neither.
+FOG_VISIBLE = 0
+FOG_EXPLORED = 128
+FOG_UNEXPLORED = 255
+
+# Width and height of a cached chunk of the map, in tiles.
+CHUNK_TILES = 16
+
+# Number of rendered chunks to keep around, enough to cover a few screens.
+CHUNK_CACHE_SIZE = 32
+
+ChunkKey = Tuple[int, int]
+
+
+def neighbour_passable(passable: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Get whether the tile at the given offset from each tile is passable.
+
+    Tiles off the edge of the map are treated as impassable."""
+    width, height = passable.shape
+    result = np.zeros_like(passable)
+    result[
+        max(0, -dx) : width - max(0, dx), max(0, -dy) : height - max(0, dy)
+    ] = passable[max(0, dx) : width + min(0, dx), max(0, dy) : height + min(0, dy)]
+    return result
+
+
+@dataclass
+class MapChunk:
+    """MapChunk holds the rendered surfaces for one chunk of the map"""
+
+    # floors, walls and clutter, which never change
+    static: pygame.Surface
+
+    # fog of war mask
+    fog: pygame.Surface
+
+    # whether the FOV changed since the fog was rendered
+    fog_stale: bool = False
+
+
+class MapRenderer:
+    """MapRenderer draws the visible window of a world map.
+
+    The map is rendered in square chunks on demand and a bounded number of
+    them are kept, so memory use doesn't grow with the size of the map. The
+    floors, walls and clutter of a chunk never change; its fog of war mask
+    is only rendered again after the FOV changes a tile in the chunk."""
+
+    def __init__(self, worldmap: Map, spriteset: SpriteSet):
+        self.worldmap = worldmap
+        self.spriteset = spriteset
+        self.layers = self.build_layers()
+        self.chunks: collections.OrderedDict[
+            ChunkKey, MapChunk
+        ] = collections.OrderedDict()
+
+    def build_layers(self) -> Dict[Position, Tuple[pygame.Surface, ...]]:
+        """Work out the sprites to draw on every tile of the map."""
+        worldmap = self.worldmap
+        spriteset = self.spriteset
+
+        passable = worldmap.passable()
+        blocked = ~passable
+
+        # walls are drawn on impassable tiles next to passable ones, in the
+        # same order they were originally drawn in: the south wall of a tile
+        # above, east wall of a tile to the left, west wall of a tile to the
+        # right, and the north wall of the tile below (with its clutter)
+        walls = (
+            (blocked & neighbour_passable(passable, 0, -1), SpriteSet.WALL_S),
+            (blocked & neighbour_passable(passable, -1, 0), SpriteSet.WALL_E),
+            (blocked & neighbour_passable(passable, 1, 0), SpriteSet.WALL_W),
+            (blocked & neighbour_passable(passable, 0, 1), SpriteSet.WALL_N),
+        )
+
+        layers: Dict[Position, List[pygame.Surface]] = {}
+
+        for pos in zip(*(axis.tolist() for axis in np.nonzero(passable))):
+            if worldmap.cell_types[pos] == Cell.TYPE_HALL:
+                tile = [spriteset.get_hall_floor()]
+            else:
+                tile = [spriteset.get_floor()]
+
+            clutter = worldmap.cell_at(*pos).clutter
+            if clutter is not None:
+                tile.append(spriteset.get_clutter()[clutter])
+
+            layers[pos] = tile
+
+        for mask, wall in walls:
+            for pos in zip(*(axis.tolist() for axis in np.nonzero(mask))):
+                tile = layers.setdefault(pos, [])
+                tile.append(spriteset.get_wall(wall))
+
+                if wall == SpriteSet.WALL_N:
+                    clutter = worldmap.cell_at(pos[0], pos[1] + 1).wall_clutter
+                    if clutter is not None:
+                        tile.append(spriteset.get_hall_clutter()[clutter])
+
+        return {pos: tuple(tile) for pos, tile in layers.items()}
+
+    def _chunk_tiles(self, key: ChunkKey) -> Tuple[slice, slice]:
+        """Get the tiles covered by the given chunk."""
+        x0, y0 = key[0] * CHUNK_TILES, key[1] * CHUNK_TILES
+        return (
+            slice(x0, min(x0 + CHUNK_TILES, self.worldmap.width)),
+            slice(y0, min(y0 + CHUNK_TILES, self.worldmap.height)),
+        )
+
+    def _render_static(self, key: ChunkKey) -> pygame.Surface:
+        """Render the floors, walls and clutter of a chunk."""
+        xs, ys = self._chunk_tiles(key)
+
+        static = pygame.Surface(
+            ((xs.stop - xs.start) * TILE_SIZE, (ys.stop - ys.start) * TILE_SIZE)
+        )
+        if pygame.display.get_surface() is not None:
+            static = static.convert()
+
+        for y in range(ys.start, ys.stop):
+            for x in range(xs.start, xs.stop):
+                tile = self.layers.get((x, y))
+                if tile is None:
+                    continue
+
+                dest = ((x - xs.start) * TILE_SIZE, (y - ys.start) * TILE_SIZE)
+                for sprite in tile:
+                    static.blit(sprite, dest)
+
+        return static
+
+    def _render_fog(self, key: ChunkKey) -> pygame.Surface:
+        """Render the fog of war mask of a chunk."""
+        window = self._chunk_tiles(key)
+        visible = self.worldmap.visible[window]
+        explored = self.worldmap.explored[window]
+
+        alpha = np.full(visible.shape, FOG_UNEXPLORED, dtype=np.uint8)
+        alpha[explored] = FOG_EXPLORED
+        alpha[visible] = FOG_VISIBLE
+
+        fog = pygame.Surface(
+            (visible.shape[0] * TILE_SIZE, visible.shape[1] * TILE_SIZE),
+            pygame.SRCALPHA,
+            32,
+        )
+        fog.fill((0, 0, 0, FOG_UNEXPLORED))
+
+        pixels = pygame.surfarray.pixels_alpha(fog)
+        pixels[:] = alpha.repeat(TILE_SIZE, axis=0).repeat(TILE_SIZE, axis=1)
+
+        # release the lock on the surface
+        del pixels
+
+        return fog
+
+    def chunk(self, key: ChunkKey) -> MapChunk:
+        """Get the rendered chunk at the given chunk coordinate."""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = MapChunk(self._render_static(key), self._render_fog(key))
+            self.chunks[key] = chunk
+            if len(self.chunks) > CHUNK_CACHE_SIZE:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+
+        if chunk.fog_stale:
+            chunk.fog = self._render_fog(key)
+            chunk.fog_stale = False
+
+        return chunk
+
+    def update_fog(self, change: FovChange) -> List[pygame.Rect]:
+        """Invalidate the fog of the chunks touched by an FOV update.
+
+        Returns the map-space pixel rects that were changed."""
+        positions = change.positions()
+
+        for key in {(x // CHUNK_TILES, y // CHUNK_TILES) for x, y in positions}:
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                chunk.fog_stale = True
+
+        return [
+            pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            for x, y in positions
+        ]
+
+    def draw(
+        self,
+        surface: pygame.Surface,
+        left_x: int,
+        right_x: int,
+        top_y: int,
+        bottom_y: int,
+    ):
+        """Draw the tiles in [left_x, right_x) x [top_y, bottom_y)."""
+        worldmap = self.worldmap
+
+        x0, x1 = max(0, left_x), min(worldmap.width, right_x)
+        y0, y1 = max(0, top_y), min(worldmap.height, bottom_y)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        view = pygame.Rect(
+            left_x * TILE_SIZE,
+            top_y * TILE_SIZE,
+            (right_x - left_x) * TILE_SIZE,
+            (bottom_y - top_y) * TILE_SIZE,
+        )
+
+        for cy in range(y0 // CHUNK_TILES, (y1 - 1) // CHUNK_TILES + 1):
+            for cx in range(x0 // CHUNK_TILES, (x1 - 1) // CHUNK_TILES + 1):
+                chunk = self.chunk((cx, cy))
+
+                # the part of the chunk that's on screen, in chunk pixels
+                origin = (cx * CHUNK_TILES * TILE_SIZE, cy * CHUNK_TILES * TILE_SIZE)
+                area = view.move(-origin[0], -origin[1]).clip(chunk.static.get_rect())
+
+                dest = (origin[0] + area.x - view.x, origin[1] + area.y - view.y)
+                surface.blit(chunk.static, dest, area)
+                surface.blit(chunk.fog, dest, area)
@@ -0,0 +1,63 @@
+"""This module indexes the things that occupy tiles in the dungeon."""
+
+import typing
+from typing import Dict, List, Optional
+
+from .types import Position
+
+if typing.TYPE_CHECKING:
+    from .creature import Creature
+    from .item import Chest
+    from .online import Tombstone
+
+
+class Occupancy:
+    """Occupancy indexes creatures, chests and tombstones by position.
+
+    Creatures that are added keep the index up to date as they move."""
+
+    def __init__(self) -> None:
+        self.creatures: Dict[Position, "Creature"] = {}
+        self.containers: Dict[Position, "Chest"] = {}
+        self.tombstones: Dict[Position, List["Tombstone"]] = {}
+
+    def add_creature(self, creature: "Creature"):
+        """Start tracking the given creature."""
+        creature.occupancy = self
+        self.creatures[creature.position] = creature
+
+    def remove_creature(self, creature: "Creature"):
+        """Stop tracking the given creature."""
+        if self.creatures.get(creature.position) is creature:
+            del self.creatures[creature.position]
+        creature.occupancy = None
+
+    def move_creature(self, creature: "Creature", old: Position, new: Position):
+        """Update the index for a creature that moved."""
+        if self.creatures.get(old) is creature:
+            del self.creatures[old]
+        self.creatures[new] = creature
+
+    def add_container(self, container: "Chest"):
+        """Start tracking the given chest."""
+        self.containers[container.position] = container
+
+    def add_tombstone(self, tombstone: "Tombstone"):
+        """Start tracking the given tombstone."""
+        self.tombstones.setdefault((tombstone.x, tombstone.y), []).append(tombstone)
+
+    def creature_at(self, pos: Position) -> Optional["Creature"]:
+        """Get the creature at the given position, if any."""
+        return self.creatures.get(pos)
+
+    def container_at(self, pos: Position) -> Optional["Chest"]:
+        """Get the chest at the given position, if any."""
+        return self.containers.get(pos)
+
+    def tombstones_at(self, pos: Position) -> List["Tombstone"]:
+        """Get all of the tombstones at the given position."""
+        return self.tombstones.get(pos, [])
+
+    def occupied(self, pos: Position) -> bool:
+        """Returns True if a creature or chest is blocking the given position."""
+        return pos in self.creatures or pos in self.containers
@@ -1,21 +1,97 @@
 """This module provides handling for online play."""
 
+import concurrent.futures
 import datetime
-import functools
+import importlib
+import json
 import os
 import subprocess
+import sys
+import threading
+import time
+import typing
 from dataclasses import dataclass
-from typing import List, Optional
+from enum import Enum
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
-import api
-from api.apis.tags import daily_api, leaderboard_api, tombstone_api
+from .env import FAST_DECODE, ON_REPLIT
+from .outbox import Outbox
+from .responsecache import CachedResponse, ResponseCache
 
-from .env import ON_REPLIT
+if typing.TYPE_CHECKING:
+    import api
+    from api import schemas
 
 DEFAULT_HOST = "https://Survive-the-Dungeon-Server.mattiselin.repl.co"
 DEFAULT_AUDIENCE = "970a2027-ee56-4336-8751-57a070f055ee"
 
 
+class Endpoint(str, Enum):
+    """Endpoint holds the paths on the API server that responses come from
+
+    These match api.paths.PathValues, which can't be imported without
+    importing all of the generated API."""
+
+    DAILY_ = "/daily/"
+    LEADERBOARD_SEED = "/leaderboard/{seed}"
+    TOMBSTONE_SEED = "/tombstone/{seed}"
+
+
+# Number of requests to the API server that can be in flight at once.
+ONLINE_WORKERS = 2
+
+# How long a cached response is used for before it's revalidated with the
+# server, in seconds.
+RESPONSE_TTLS = {
+    Endpoint.DAILY_: 60 * 60,
+    Endpoint.LEADERBOARD_SEED: 60,
+    Endpoint.TOMBSTONE_SEED: 5 * 60,
+}
+
+# Kinds of submission that are kept in the outbox.
+SUBMIT_SCORE = "score"
+SUBMIT_TOMBSTONE = "tombstone"
+
+# Number of submissions sent from the outbox in one go.
+OUTBOX_BATCH_SIZE = 16
+
+# Time to wait before retrying submissions that couldn't be sent, in seconds.
+# This doubles with every failure in a row, up to the maximum.
+OUTBOX_RETRY_DELAY = 1.0
+OUTBOX_MAX_RETRY_DELAY = 5 * 60.0
+
+T = TypeVar("T")
+
+
+def _generated(module: str = "") -> ModuleType:
+    """Get a module of the generated API, importing it the first time.
+
+    The generated API (and urllib3 with it) is slow to import, so it's left
+    until a request is made, which is always on a background thread."""
+    return importlib.import_module("api" + module)
+
+
+def _rejected(e: Exception) -> bool:
+    """Check if a submission failed because the server turned it down.
+
+    Retrying won't change the answer for those, unlike the server not being
+    reachable (status 0), failing or asking for the request to be retried."""
+    api = sys.modules.get("api")
+    if api is None:
+        return False
+    if isinstance(e, api.ApiException):
+        return e.status is not None and 400 <= e.status < 500 and e.status != 429
+    return isinstance(e, api.OpenApiException)
+
+
+def _completed(value: T) -> "concurrent.futures.Future[T]":
+    """Get a future that already has the given result."""
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+    future.set_result(value)
+    return future
+
+
 @dataclass
 class LeaderboardEntry:
     """An entry in a leaderboard"""
@@ -43,138 +119,526 @@ class Tombstone:
     at: datetime.datetime
 
 
-class OnlinePlay:
-    """OnlinePlay handles all of the requests to the API server."""
+# Responses are parsed from either the objects the generated schemas give,
+# or (with fast decoding) straight from JSON. Either way, a response that
+# isn't shaped right raises a KeyError, TypeError or ValueError.
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """Parse an ISO 8601 date and time from a response."""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        # fromisoformat is much quicker, but is missing some of ISO 8601
+        # (e.g. a "Z" suffix) before Python 3.11
+        return importlib.import_module("dateutil.parser").isoparse(value)
+
+
+def parse_seed(body: Any) -> int:
+    """Parse a response with today's seed."""
+    return int(body["seed"])
+
+
+def parse_leaderboard(body: Any) -> Leaderboard:
+    """Parse a response with a leaderboard."""
+    return Leaderboard(
+        seed=int(body["seed"]),
+        entries=[
+            LeaderboardEntry(
+                player=str(entry["player"]),
+                score=int(entry["score"]),
+                at=parse_datetime(entry["at"]),
+            )
+            for entry in body["entries"]
+        ],
+    )
+
 
-    def __init__(self, host=DEFAULT_HOST):
+def parse_tombstones(body: Any) -> List[Tombstone]:
+    """Parse a response with the tombstones for a seed."""
+    return [
+        Tombstone(
+            player=str(entry["player"]),
+            x=int(entry["x"]),
+            y=int(entry["y"]),
+            at=parse_datetime(entry["at"]),
+        )
+        for entry in body["entries"]
+    ]
+
+
+class OnlinePlay:
+    """OnlinePlay handles all of the requests to the API server.
+
+    Requests are made on background threads, and each returns a future for
+    its result so that a slow server never holds up a frame. A request that
+    fails completes with None.
+
+    Responses are cached on disk, so screens that show them can open
+    straight away (even offline) with the copy from last time while it's
+    checked with the server in the background.
+
+    Submissions are written to an outbox on disk and sent from there on a
+    background thread, retrying with backoff until the server accepts them,
+    so nothing is lost if the server can't be reached."""
+
+    def __init__(
+        self,
+        host=DEFAULT_HOST,
+        cache: Optional[ResponseCache] = None,
+        outbox: Optional[Outbox] = None,
+        fast_decode: bool = FAST_DECODE,
+    ):
         api_keys = {}
         if ON_REPLIT:
             self._identity_token = subprocess.check_output(
                 ["./replit", "repl-identity", "create", f"-audience={DEFAULT_AUDIENCE}"]
             )
             self._player_name = os.environ.get("REPL_OWNER", "Player")
-            api_keys["repl-identity"] = self._identity_token.decode('utf-8').strip()
-
-        self._api_client = api.ApiClient(api.Configuration(host=host, api_key=api_keys))
+            api_keys["repl-identity"] = self._identity_token.decode("utf-8").strip()
+
+        # the API client is made the first time it's needed
+        self._host = host
+        self._api_keys = api_keys
+        self._api_client: Optional["api.ApiClient"] = None
+        self._api_client_lock = threading.Lock()
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            ONLINE_WORKERS, thread_name_prefix="online"
+        )
+        # whether responses skip validation against the generated schemas
+        self._fast_decode = fast_decode
+
+        # responses are served from here while they're revalidated
+        self._cache = cache if cache is not None else ResponseCache()
+        self._executor.submit(self._cache.prune)
+        self._refreshing: Dict[Tuple[Endpoint, int], concurrent.futures.Future] = {}
+        self._refreshing_lock = threading.Lock()
+
+        # set once requests that haven't started yet should be dropped
+        self._closed = False
+
+        # submissions from this game that haven't been tried yet
+        self._outbox = outbox if outbox is not None else Outbox()
+        self._outbox_lock = threading.Lock()
+        self._unsent: Dict[int, "concurrent.futures.Future[bool]"] = {}
+
+        # anything left over from an earlier game is sent straight away
+        self._outbox_wake = threading.Event()
+        self._outbox_wake.set()
+        self._outbox_thread = threading.Thread(
+            target=self._drain_outbox, name="outbox", daemon=True
+        )
+        self._outbox_thread.start()
+
+    def _client(self) -> "api.ApiClient":
+        """Get the API client, making it if this is the first request."""
+        with self._api_client_lock:
+            if self._api_client is None:
+                api = _generated()
+                self._api_client = api.ApiClient(
+                    api.Configuration(host=self._host, api_key=self._api_keys)
+                )
+            return self._api_client
+
+    def _submit(
+        self,
+        request: Callable[..., T],
+        *args,
+        after: Optional[List[concurrent.futures.Future]] = None,
+    ) -> "concurrent.futures.Future[Optional[T]]":
+        """Make the given request in the background.
+
+        The request waits for any requests it comes after, which must have
+        been submitted first so that they're never stuck behind it."""
+
+        def run():
+            if after:
+                concurrent.futures.wait(after)
+
+            if self._closed:
+                return None
+
+            try:
+                return request(*args)
+            except Exception as e:  # pylint: disable=broad-except
+                print("Exception when calling the API server: %s\n" % e)
+
+            return None
+
+        return self._executor.submit(run)
+
+    def _cached(
+        self,
+        endpoint: Endpoint,
+        key: int,
+        fetch: Callable[..., Optional[CachedResponse]],
+        *args,
+        after: Optional[concurrent.futures.Future] = None,
+    ) -> concurrent.futures.Future:
+        """Get a response, from the cache if there's one that's usable.
+
+        A fresh cached response is used as it is. A stale one is still used
+        straight away, and is revalidated with the server in the background
+        for next time. A request that comes after another (e.g. submitting a
+        score) always waits for the server, so that it sees the change.
+
+        A response that hasn't been read from the disk yet is read in the
+        background too, so the game's thread never waits for it."""
+        if after is not None:
+            return self._refresh(endpoint, key, fetch, *args, after=after)
+
+        if not self._cache.loaded(endpoint.name.lower(), key):
+            with self._refreshing_lock:
+                pending = self._refreshing.get((endpoint, key))
+                if pending is not None and not pending.done():
+                    return pending
+
+                future = self._submit(self._load, endpoint, key, fetch, *args)
+                self._refreshing[(endpoint, key)] = future
+                return future
+
+        cached = self._cache.get(endpoint.name.lower(), key)
+        if cached is None:
+            return self._refresh(endpoint, key, fetch, *args)
+
+        if cached.age() >= RESPONSE_TTLS[endpoint]:
+            self._refresh(endpoint, key, fetch, *args)
+
+        return _completed(cached.value)
+
+    def _refresh(
+        self,
+        endpoint: Endpoint,
+        key: int,
+        fetch: Callable[..., Optional[CachedResponse]],
+        *args,
+        after: Optional[concurrent.futures.Future] = None,
+    ) -> concurrent.futures.Future:
+        """Revalidate a cached response in the background.
+
+        The same response is only ever revalidated once at a time."""
+        with self._refreshing_lock:
+            pending = self._refreshing.get((endpoint, key))
+            if pending is not None and not pending.done() and after is None:
+                return pending
+
+            future = self._submit(
+                self._revalidate,
+                endpoint,
+                key,
+                fetch,
+                *args,
+                after=None if after is None else [after],
+            )
+            self._refreshing[(endpoint, key)] = future
+            return future
+
+    def _load(
+        self,
+        endpoint: Endpoint,
+        key: int,
+        fetch: Callable[..., Optional[CachedResponse]],
+        *args,
+    ):
+        """Read a cached response from the disk, or get it from the server.
+
+        A stale response is still used, and is revalidated for next time."""
+        cached = self._cache.get(endpoint.name.lower(), key)
+        if cached is None:
+            return self._revalidate(endpoint, key, fetch, *args)
+
+        if cached.age() >= RESPONSE_TTLS[endpoint] and not self._closed:
+            try:
+                self._refresh(endpoint, key, fetch, *args)
+            except RuntimeError:
+                # the game quit while the response was being read
+                pass
+
+        return cached.value
+
+    def _revalidate(
+        self,
+        endpoint: Endpoint,
+        key: int,
+        fetch: Callable[..., Optional[CachedResponse]],
+        *args,
+    ):
+        """Revalidate a cached response with the server.
+
+        The cached response is used if the server can't be reached."""
+        cached = self._cache.get(endpoint.name.lower(), key)
+
+        response = fetch(*args, cached)
+        if response is None:
+            return None if cached is None else cached.value
+
+        self._cache.put(endpoint.name.lower(), key, response)
+        return response.value
+
+    def _fetch(
+        self,
+        endpoint: Endpoint,
+        schema: Type["schemas.Schema"],
+        parse: Callable[[Any], T],
+        cached: Optional[CachedResponse],
+        **path_params,
+    ) -> CachedResponse:
+        """Get a response from the server, unless the cached one is still good.
+
+        The generated API can't send the validators for a cached response,
+        so the request is made with the API client directly. Raises an
+        ApiException if the request fails, or one of urllib3's errors if the
+        server can't be reached.
+
+        The response is validated against the given schema before it's
+        parsed, unless fast decoding is on."""
+        # the client takes urllib3's header dict, which it imports itself
+        headers = _generated(".api_client").HTTPHeaderDict(
+            {"Accept": "application/json"}
+        )
+        if cached is not None:
+            headers.update(cached.validators())
+
+        client = self._client()
+        response = client.call_api(
+            endpoint.value.format(**path_params), "GET", headers=headers
+        )
+        if response.status == 304 and cached is not None:
+            return cached.revalidated()
+        if not 200 <= response.status <= 299:
+            raise _generated().ApiException(
+                status=response.status, reason=response.reason
+            )
 
-    @functools.cached_property
-    def daily_seed(self) -> int:
-        """Get today's seed."""
+        body = json.loads(response.data)
+        if not self._fast_decode:
+            body = schema.from_openapi_data_oapg(
+                body, _configuration=client.configuration
+            )
 
-        api_instance = daily_api.DailyApi(self._api_client)
+        return CachedResponse(
+            parse(body),
+            time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
 
-        try:
-            # Get today's seed
-            api_response = api_instance.get_daily_route()
-            return api_response.body.get("seed")
-        except api.ApiException as e:
-            print("Exception when calling DailyApi->get_daily_route: %s\n" % e)
+    def daily_seed(self) -> "concurrent.futures.Future[Optional[int]]":
+        """Get today's seed."""
+        today = int(time.time() // 86400)
+        return self._cached(Endpoint.DAILY_, today, self._get_daily_seed)
+
+    def leaderboard(
+        self,
+        seed: Optional[int] = None,
+        after: Optional[concurrent.futures.Future] = None,
+    ) -> "concurrent.futures.Future[Optional[Leaderboard]]":
+        """Get the leaderboard for the given seed.
 
-        return None
+        If no seed is given, today's seed will be used. If a request is given
+        (e.g. submitting a score), the leaderboard is fetched once it's done."""
+        if seed is None:
+            daily_seed = self.daily_seed()
+            if not daily_seed.done():
+                return self._submit(
+                    lambda: self._revalidate_leaderboard(daily_seed.result()),
+                    after=[daily_seed] if after is None else [daily_seed, after],
+                )
 
-    def leaderboard(self, seed: Optional[int] = None) -> Optional[Leaderboard]:
-        """Get the leaderboard for the given seed.
+            seed = daily_seed.result()
+            if seed is None:
+                return _completed(None)
 
-        If no seed is given, today's seed will be used."""
-        api_instance = leaderboard_api.LeaderboardApi(self._api_client)
+        return self._cached(
+            Endpoint.LEADERBOARD_SEED,
+            seed,
+            self._get_leaderboard,
+            seed,
+            after=after,
+        )
 
+    def _revalidate_leaderboard(self, seed: Optional[int]) -> Optional[Leaderboard]:
+        """Get the leaderboard for the given seed from the server."""
         if seed is None:
-            seed = self.daily_seed
+            return None
+        return self._revalidate(
+            Endpoint.LEADERBOARD_SEED, seed, self._get_leaderboard, seed
+        )
+
+    def _post(
+        self, kind: str, body: Dict[str, Any]
+    ) -> "concurrent.futures.Future[bool]":
+        """Add a submission to the outbox.
+
+        The returned future completes with True once the submission has been
+        sent, or with False if the first try fails (it's retried later)."""
+        if not ON_REPLIT:
+            # no-op, can't submit without the Replit Identity token
+            return _completed(False)
 
-        try:
-            # Get today's seed
-            api_response = api_instance.get_leaderboard({"seed": seed})
-            seed = api_response.body["seed"]
-            entries = api_response.body["entries"]
-
-            result = Leaderboard(seed=seed, entries=[])
-            for entry in entries:
-                result.entries.append(
-                    LeaderboardEntry(
-                        player=entry["player"],
-                        score=entry["score"],
-                        at=entry["at"].as_datetime_oapg,
-                    )
-                )
+        body = dict(
+            body, player=self._player_name, at=datetime.datetime.now().isoformat()
+        )
 
-            return result
-        except api.ApiException as e:
-            print("Exception when calling LeaderboardApi->get_leaderboard: %s\n" % e)
+        future: "concurrent.futures.Future[bool]" = concurrent.futures.Future()
+        with self._outbox_lock:
+            self._unsent[self._outbox.add({"kind": kind, "body": body})] = future
 
-        return None
+        self._outbox_wake.set()
+        return future
 
-    def submit_score(self, seed: int, score: int):
+    def submit_score(self, seed: int, score: int) -> "concurrent.futures.Future[bool]":
         """Submit the player's score for the given seed."""
-        if not ON_REPLIT:
-            # no-op, can't submit scores without the Replit Identity token
-            return
+        return self._post(SUBMIT_SCORE, {"seed": seed, "score": score})
 
-        api_instance = leaderboard_api.LeaderboardApi(self._api_client)
+    def tombstones(
+        self, seed: int
+    ) -> "concurrent.futures.Future[Optional[List[Tombstone]]]":
+        """Get tombstones for the given seed."""
+        return self._cached(Endpoint.TOMBSTONE_SEED, seed, self._get_tombstones, seed)
 
-        try:
-            api_instance.create_todo(
-                {
-                    "player": self._player_name,
-                    "seed": seed,
-                    "score": score,
-                    "at": datetime.datetime.now(),
-                },
-                path_params={
-                    "seed": seed,
-                },
-            )
-        except api.ApiException as e:
-            print("Exception when calling LeaderboardApi->create_todo: %s\n" % e)
+    def submit_tombstone(
+        self, seed: int, x: int, y: int, logs: str
+    ) -> "concurrent.futures.Future[bool]":
+        """Submit the player's tombstone for the given seed."""
+        return self._post(
+            SUBMIT_TOMBSTONE, {"seed": seed, "x": x, "y": y, "last_logs": logs}
+        )
+
+    def shutdown(self):
+        """Stop making requests, dropping any that haven't started yet.
+
+        Submissions that haven't been sent stay in the outbox for next time."""
+        # cancel_futures needs Python 3.9, so requests check this instead
+        self._closed = True
+        self._executor.shutdown(wait=False)
+
+        self._outbox_wake.set()
+        with self._outbox_lock:
+            for future in self._unsent.values():
+                future.set_result(False)
+            self._unsent.clear()
+
+    def _drain_outbox(self):
+        """Send submissions from the outbox until the game quits."""
+        timeout: Optional[float] = None
+        failures = 0
+        while True:
+            self._outbox_wake.wait(timeout)
+            self._outbox_wake.clear()
+            if self._closed:
+                return
+
+            batch = self._outbox.pending(OUTBOX_BATCH_SIZE + 1)
+            more = len(batch) > OUTBOX_BATCH_SIZE
+            batch = batch[:OUTBOX_BATCH_SIZE]
+
+            # submissions are sent in order, so stop at the first failure
+            sent = []
+            try:
+                for entry_id, entry in batch:
+                    if not self._send(entry):
+                        break
+                    sent.append(entry_id)
+                self._outbox.sent(sent)
+            except Exception as e:  # pylint: disable=broad-except
+                # whatever's left is retried, the thread has to keep going
+                print("Exception when sending the outbox: %s\n" % e)
+
+            with self._outbox_lock:
+                for entry_id, _ in batch:
+                    future = self._unsent.pop(entry_id, None)
+                    if future is not None:
+                        future.set_result(entry_id in sent)
+
+            if len(sent) < len(batch):
+                timeout = min(
+                    OUTBOX_RETRY_DELAY * 2**failures, OUTBOX_MAX_RETRY_DELAY
+                )
+                failures = min(failures + 1, 32)
+            else:
+                timeout = 0 if more else None
+                failures = 0
 
-    def tombstones(self, seed: int) -> Optional[List[Tombstone]]:
-        """Get tombstones for the given seed."""
-        api_instance = tombstone_api.TombstoneApi(self._api_client)
+    def _send(self, entry: Dict[str, Any]) -> bool:
+        """Send a submission from the outbox to the server.
+
+        Returns False if it should be tried again later."""
+        try:
+            body = dict(entry["body"])
+            body["at"] = datetime.datetime.fromisoformat(body["at"])
+        except (KeyError, TypeError, ValueError) as e:
+            print("Dropping a submission that can't be read: %s\n" % e)
+            return True
 
         try:
-            response = api_instance.get_tombstones(
-                {
-                    "seed": seed,
-                }
+            if entry.get("kind") == SUBMIT_SCORE:
+                self._submit_score(body)
+            else:
+                self._submit_tombstone(body)
+        except Exception as e:  # pylint: disable=broad-except
+            # e.g. urllib3's MaxRetryError when the server can't be reached
+            print("Exception when submitting to the API server: %s\n" % e)
+            return _rejected(e)
+
+        return True
+
+    def _get_daily_seed(
+        self, cached: Optional[CachedResponse]
+    ) -> Optional[CachedResponse]:
+        """Get today's seed."""
+        try:
+            return self._fetch(
+                Endpoint.DAILY_, _generated(".model.seed").Seed, parse_seed, cached
             )
+        except Exception as e:  # pylint: disable=broad-except
+            print("Exception when calling DailyApi->get_daily_route: %s\n" % e)
 
-            result = []
-            for entry in response.body["entries"]:
-                result.append(
-                    Tombstone(
-                        player=entry["player"],
-                        x=entry["x"],
-                        y=entry["y"],
-                        at=entry["at"].as_datetime_oapg,
-                    )
-                )
+        return None
 
-            return result
-        except api.ApiException as e:
-            print("Exception when calling LeaderboardApi->create_todo: %s\n" % e)
+    def _get_leaderboard(
+        self, seed: int, cached: Optional[CachedResponse]
+    ) -> Optional[CachedResponse]:
+        """Get the leaderboard for the given seed."""
+        try:
+            return self._fetch(
+                Endpoint.LEADERBOARD_SEED,
+                _generated(".model.leaderboard").Leaderboard,
+                parse_leaderboard,
+                cached,
+                seed=seed,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            print("Exception when calling LeaderboardApi->get_leaderboard: %s\n" % e)
 
         return None
 
-    def submit_tombstone(self, seed: int, x: int, y: int, logs: str):
-        """Submit the player's tombstone for the given seed."""
-        if not ON_REPLIT:
-            # no-op, can't submit tombstones without the Replit Identity token
-            return
-
-        api_instance = tombstone_api.TombstoneApi(self._api_client)
+    def _submit_score(self, body: Dict[str, Any]):
+        """Submit a score. Raises an ApiException if it can't be sent."""
+        leaderboard_api = _generated(".apis.tags.leaderboard_api")
+        api_instance = leaderboard_api.LeaderboardApi(self._client())
+        api_instance.create_todo(body, path_params={"seed": body["seed"]})
 
+    def _get_tombstones(
+        self, seed: int, cached: Optional[CachedResponse]
+    ) -> Optional[CachedResponse]:
+        """Get tombstones for the given seed."""
         try:
-            api_instance.add_a_new_tombstone_(
-                {
-                    "player": self._player_name,
-                    "seed": seed,
-                    "x": x,
-                    "y": y,
-                    "last_logs": logs,
-                    "at": datetime.datetime.now(),
-                },
-                path_params={
-                    "seed": seed,
-                },
+            return self._fetch(
+                Endpoint.TOMBSTONE_SEED,
+                _generated(".model.tombstones").Tombstones,
+                parse_tombstones,
+                cached,
+                seed=seed,
             )
-        except api.ApiException as e:
-            print("Exception when calling LeaderboardApi->create_todo: %s\n" % e)
+        except Exception as e:  # pylint: disable=broad-except
+            print("Exception when calling TombstoneApi->get_tombstones: %s\n" % e)
+
+        return None
+
+    def _submit_tombstone(self, body: Dict[str, Any]):
+        """Submit a tombstone. Raises an ApiException if it can't be sent."""
+        tombstone_api = _generated(".apis.tags.tombstone_api")
+        api_instance = tombstone_api.TombstoneApi(self._client())
+        api_instance.add_a_new_tombstone_(body, path_params={"seed": body["seed"]})
@@ -0,0 +1,102 @@
+"""This module keeps submissions to the API server on disk until they're sent"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+# File that submissions waiting to be sent are kept in.
+OUTBOX_PATH = os.path.join(
+    os.path.expanduser("~"), ".local", "share", "survive-the-dungeon", "outbox.log"
+)
+
+
+class Outbox:
+    """Outbox keeps submissions to the API server until they've been sent
+
+    The file is only ever appended to: each submission is written as it's
+    made, and a marker is written once it's been sent, so nothing is lost if
+    the game quits (or the server can't be reached) in between. The file is
+    removed once everything in it has been sent. The outbox is safe to use
+    from several threads at once."""
+
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 0
+
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as data:
+                lines = data.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # the game quit part way through writing this one
+                continue
+
+            if "sent" in record:
+                for entry_id in record["sent"]:
+                    self._pending.pop(entry_id, None)
+            else:
+                self._pending[record["id"]] = record["entry"]
+                self._next_id = max(self._next_id, record["id"] + 1)
+
+    def _append(self, record: Dict[str, Any]):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as data:
+                data.write(json.dumps(record) + "\n")
+                data.flush()
+                os.fsync(data.fileno())
+        except OSError:
+            # the submission is still sent if it can be, it just won't
+            # outlive the game
+            pass
+
+    def add(self, entry: Dict[str, Any]) -> int:
+        """Add a submission to the outbox. Returns its ID."""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+
+            self._pending[entry_id] = entry
+            self._append({"id": entry_id, "entry": entry})
+
+        return entry_id
+
+    def pending(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Get up to the given number of the oldest unsent submissions."""
+        with self._lock:
+            return list(self._pending.items())[:limit]
+
+    def sent(self, entry_ids: Iterable[int]):
+        """Mark the given submissions as sent."""
+        entry_ids = list(entry_ids)
+        if not entry_ids:
+            return
+
+        with self._lock:
+            for entry_id in entry_ids:
+                self._pending.pop(entry_id, None)
+
+            if self._pending:
+                self._append({"sent": entry_ids})
+                return
+
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,114 @@
+"""This module handles pathfinding through the dungeon."""
+
+import collections
+import contextlib
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import tcod
+
+from .types import Position
+
+# Extra cost to move through a tile that something is standing on.
+OCCUPIED_COST = 10
+
+# Number of distance fields to keep around for reuse.
+DISTANCE_FIELD_CACHE_SIZE = 4
+
+
+class PathService:
+    """PathService answers path queries for a single map.
+
+    The static cost grid and graph are built once per map. Anything standing
+    in the way (the player, creatures, chests) only adds a penalty to its own
+    tile for the duration of a query."""
+
+    def __init__(self, transparency: np.ndarray):
+        self.cost = np.array(transparency, dtype=np.int8, order="F")
+        self._graph = tcod.path.SimpleGraph(cost=self.cost, cardinal=2, diagonal=3)
+        self._fields: collections.OrderedDict[
+            Tuple[Position, Tuple[Position, ...]], np.ndarray
+        ] = collections.OrderedDict()
+
+    def __getstate__(self):
+        # the graph can't be pickled alongside the cost grid it shares, so
+        # only the grid is kept and everything else is rebuilt from it
+        return {"cost": self.cost}
+
+    def __setstate__(self, state):
+        self.__init__(state["cost"])
+
+    @contextlib.contextmanager
+    def _occupied(self, occupants: Sequence[Position]) -> Iterator[None]:
+        """Temporarily add the occupied tile penalty to the cost grid."""
+        if not occupants:
+            yield
+            return
+
+        xs, ys = np.array(occupants, dtype=np.intp).T
+        np.add.at(self.cost, (xs, ys), OCCUPIED_COST)
+        try:
+            yield
+        finally:
+            np.subtract.at(self.cost, (xs, ys), OCCUPIED_COST)
+
+    def path_to(
+        self, start: Position, end: Position, occupants: Sequence[Position] = ()
+    ) -> List[Position]:
+        """Return a path from the start point to the end point.
+
+        The path does not include the start point."""
+        with self._occupied(occupants):
+            pathfinder = tcod.path.Pathfinder(self._graph)
+            pathfinder.add_root(start)
+            path = pathfinder.path_to(end)[1:].tolist()
+
+        return list(map(tuple, path))
+
+    def distance_from(
+        self, root: Position, occupants: Sequence[Position] = ()
+    ) -> np.ndarray:
+        """Return the cost to reach the root from every tile on the map.
+
+        Unreachable tiles hold the maximum value of the array's type."""
+        key = (root, tuple(sorted(occupants)))
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+
+        with self._occupied(occupants):
+            field = tcod.path.maxarray(self.cost.shape, dtype=np.int32, order="F")
+            field[root] = 0
+            tcod.path.dijkstra2d(field, self.cost, 2, 3, out=field)
+
+        self._fields[key] = field
+        if len(self._fields) > DISTANCE_FIELD_CACHE_SIZE:
+            self._fields.popitem(last=False)
+
+        return field
+
+    def paths_to(
+        self,
+        end: Position,
+        starts: Iterable[Position],
+        occupants: Sequence[Position] = (),
+    ) -> List[List[Position]]:
+        """Return a path to the end point from each of the given start points.
+
+        All of the paths are answered from a single distance field rooted at
+        the end point. The paths do not include their start points, and are
+        empty if the end point can't be reached."""
+        field = self.distance_from(end, occupants)
+        unreachable = np.iinfo(field.dtype).max
+
+        paths: List[List[Position]] = []
+        for start in starts:
+            if field[start] == unreachable:
+                paths.append([])
+                continue
+
+            path = tcod.path.hillclimb2d(field, start, True, True)[1:].tolist()
+            paths.append(list(map(tuple, path)))
+
+        return paths
@@ -0,0 +1,175 @@
+"""This module generates dungeons ahead of time and caches them on disk"""
+
+import concurrent.futures
+import glob
+import multiprocessing
+import os
+import pickle
+import zlib
+from typing import Dict, Iterable, Optional
+
+from .engine import (
+    DEFAULT_CLUTTER_KINDS,
+    DEFAULT_HALL_CLUTTER_KINDS,
+    GeneratedDungeon,
+    generate_dungeon,
+)
+from .game import Game, set_game
+from .savegame import write_atomically
+
+# Directory that generated dungeons are cached in.
+PREGEN_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "survive-the-dungeon"
+)
+
+# Version of the cache files. Bump this whenever generation changes, so that
+# dungeons generated by older versions are never loaded.
+PREGEN_CACHE_VERSION = 2
+
+# Number of processes generating dungeons in the background.
+PREGEN_WORKERS = 2
+
+
+def cache_path(
+    cache_dir: str, seed: int, clutter_kinds: int, hall_clutter_kinds: int
+) -> str:
+    """Get the path of the cache file for the given dungeon."""
+    return os.path.join(
+        cache_dir,
+        f"dungeon-v{PREGEN_CACHE_VERSION}-{seed}-{clutter_kinds}-{hall_clutter_kinds}.bin",
+    )
+
+
+def save_generated(path: str, generated: GeneratedDungeon):
+    """Write a generated dungeon to the given cache file."""
+    write_atomically(
+        path, [zlib.compress(pickle.dumps(generated, pickle.HIGHEST_PROTOCOL))]
+    )
+
+
+def load_generated(path: str) -> Optional[GeneratedDungeon]:
+    """Read a generated dungeon from the given cache file, if it's usable.
+
+    A cache file that can't be used is removed, so it's generated again."""
+    try:
+        with open(path, "rb") as cache:
+            data = cache.read()
+    except OSError:
+        return None
+
+    try:
+        generated = pickle.loads(zlib.decompress(data))
+    except Exception:  # pylint: disable=broad-except
+        # a damaged or outdated pickle can fail to load in all sorts of ways
+        generated = None
+
+    if not isinstance(generated, GeneratedDungeon):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return None
+
+    return generated
+
+
+def pregenerate(
+    seed: int, clutter_kinds: int, hall_clutter_kinds: int, cache_dir: str
+) -> str:
+    """Generate the dungeon for the given seed into the cache.
+
+    This is run in worker processes, which each have their own game."""
+    path = cache_path(cache_dir, seed, clutter_kinds, hall_clutter_kinds)
+    if not os.path.exists(path):
+        game = Game(seed=seed)
+        set_game(game)
+        save_generated(path, generate_dungeon(game, clutter_kinds, hall_clutter_kinds))
+    return path
+
+
+class Pregenerator:
+    """Pregenerator generates dungeons in background processes.
+
+    Dungeons are cached on disk, so a dungeon only ever has to be generated
+    once (e.g. the daily dungeon can be generated the day before)."""
+
+    def __init__(
+        self,
+        clutter_kinds: int = DEFAULT_CLUTTER_KINDS,
+        hall_clutter_kinds: int = DEFAULT_HALL_CLUTTER_KINDS,
+        cache_dir: str = PREGEN_CACHE_DIR,
+        workers: int = PREGEN_WORKERS,
+    ):
+        self.clutter_kinds = clutter_kinds
+        self.hall_clutter_kinds = hall_clutter_kinds
+        self.cache_dir = cache_dir
+        self.workers = workers
+
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._pending: Dict[int, concurrent.futures.Future] = {}
+
+    def _path(self, seed: int) -> str:
+        return cache_path(
+            self.cache_dir, seed, self.clutter_kinds, self.hall_clutter_kinds
+        )
+
+    def request(self, seed: int):
+        """Start generating the dungeon for the given seed, if needed."""
+        if seed in self._pending or os.path.exists(self._path(seed)):
+            return
+
+        if self._executor is None:
+            # workers are started fresh rather than forked from a process
+            # that might have a display open
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+        self._pending[seed] = self._executor.submit(
+            pregenerate,
+            seed,
+            self.clutter_kinds,
+            self.hall_clutter_kinds,
+            self.cache_dir,
+        )
+
+    def take(self, seed: int) -> Optional[GeneratedDungeon]:
+        """Get the generated dungeon for the given seed, if it's ready.
+
+        Returns None if it was never requested, couldn't be generated or is
+        still being generated. Generating it in the game is quicker than
+        waiting for a worker, which is left to finish it for next time."""
+        future = self._pending.get(seed)
+        if future is not None:
+            if not future.done():
+                return None
+
+            del self._pending[seed]
+            try:
+                future.result()
+            except Exception:  # pylint: disable=broad-except
+                return None
+
+        return load_generated(self._path(seed))
+
+    def prune(self, keep: Iterable[int]):
+        """Remove every cached dungeon except those for the given seeds."""
+        keep_paths = {self._path(seed) for seed in keep}
+        for path in glob.glob(os.path.join(self.cache_dir, "dungeon-*.bin")):
+            if path not in keep_paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        """Stop generating dungeons."""
+        # cancel_futures needs Python 3.9, so pending dungeons are
+        # cancelled by hand
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -14,7 +14,6 @@ from .constants import (
     CREATURE_MIN_HP_AT_LEVEL_1,
 )
 from .creature import Creature
-from .game import game
 from .item import Armor, Weapon
 from .types import Wieldpoint
 from .words import random_adjective, random_adverb
@@ -63,26 +62,36 @@ class NameGenerator:
         for name, point in NAMES.items():
             self._point_to_names[point].append(name)
 
-    def generate_name(self, point: Wieldpoint, special=False) -> str:
-        """Generate a name for the given wieldpoint."""
+    def generate_name(
+        self,
+        point: Wieldpoint,
+        special=False,
+        rng: Optional[random.Random] = None,
+    ) -> str:
+        """Generate a name for the given wieldpoint.
+
+        The generator's own RNG is used unless another is given."""
+
+        if rng is None:
+            rng = self._rng
 
         names_list = self._point_to_names[point]
 
-        adj = random_adjective(self._rng)
+        adj = random_adjective(rng)
         if special:
-            adverb = random_adverb(self._rng)
+            adverb = random_adverb(rng)
 
         while True:
-            name = self._rng.choice(names_list)
+            name = rng.choice(names_list)
             if special:
                 name = f"The {adverb} {adj} {name}"
             else:
                 name = f"The {adj} {name}"
 
             if name in self._seen:
-                adj = random_adjective(self._rng)
+                adj = random_adjective(rng)
                 if special:
-                    adverb = random_adverb(self._rng)
+                    adverb = random_adverb(rng)
                 continue
 
             self._seen.add(name)
@@ -122,13 +131,10 @@ def create_armor(
 def creature_at_level(
     challenge_level: int,
     name_generator: NameGenerator,
-    rng: Optional[random.Random] = None,
+    rng: random.Random,
 ) -> Creature:
     """Create a procedurally-generated creature at the given challenge level."""
 
-    if rng is None:
-        rng = game().random()
-
     max_damage = CREATURE_MAX_DAMAGE_AT_LEVEL_1
 
     min_hp = CREATURE_MIN_HP_AT_LEVEL_1
@@ -0,0 +1,85 @@
+"""This module plays recorded runs again headlessly, as fast as they'll go."""
+
+import argparse
+import csv
+import os
+import sys
+from typing import List, Optional
+
+from .actions import ActionLog
+from .batch import COLUMNS, OUTCOMES, RunResult
+from .engine import DungeonEngine
+from .game import Game, set_game
+from .savegame import write_atomically
+
+# File that the actions of a run are written to if the game crashes.
+CRASH_REPORT_PATH = os.path.join(
+    os.path.expanduser("~"), ".local", "share", "survive-the-dungeon", "crash.log"
+)
+
+# Outcome recorded for runs that were still going when the log ended.
+OUTCOME_UNFINISHED = "unfinished"
+
+
+def save_log(path: str, log: ActionLog):
+    """Write an action log to the given file."""
+    write_atomically(path, [log.encode()])
+
+
+def load_log(path: str) -> ActionLog:
+    """Read an action log from the given file."""
+    with open(path, "rb") as data:
+        return ActionLog.decode(data.read())
+
+
+def replay(log: ActionLog) -> DungeonEngine:
+    """Play a recorded run again.
+
+    The run gets a game of its own, which is left as the current game. The
+    returned engine is in the state the run was in when the log ended."""
+    game = Game(seed=log.seed)
+    set_game(game)
+
+    engine = DungeonEngine(
+        game,
+        log.attributes(),
+        clutter_kinds=log.clutter_kinds,
+        hall_clutter_kinds=log.hall_clutter_kinds,
+        flow_field=log.flow_field,
+    )
+    for action in log.actions():
+        engine.step(action)
+
+    return engine
+
+
+def replay_result(log: ActionLog) -> RunResult:
+    """Play a recorded run again and report how it went."""
+    engine = replay(log)
+
+    if engine.outcome is None:
+        engine.update_stats()
+        outcome = OUTCOME_UNFINISHED
+    else:
+        outcome = OUTCOMES[engine.outcome.name]
+
+    return RunResult(log.seed, outcome, engine.turns, engine.game.stats())
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    """Parse the replayer's command line."""
+    parser = argparse.ArgumentParser(
+        description="Play recorded runs again headlessly and report how they went."
+    )
+    parser.add_argument("logs", nargs="+", help="action logs to replay")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for the replayer."""
+    args = parse_args(argv)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(COLUMNS)
+    for path in args.logs:
+        writer.writerow(replay_result(load_log(path)).row())
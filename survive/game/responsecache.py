@@ -0,0 +1,155 @@
+"""This module caches responses from the API server on disk"""
+
+import os
+import pickle
+import threading
+import time
+import zlib
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+from .savegame import write_atomically
+
+# Directory that responses from the API server are cached in.
+RESPONSE_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "survive-the-dungeon", "responses"
+)
+
+# Version of the cache files. Bump this whenever the cached values change,
+# so that responses cached by older versions are never loaded.
+RESPONSE_CACHE_VERSION = 1
+
+# How long a response is kept on disk once it's no longer up to date, in
+# seconds. There's a response for every seed played, so they add up.
+RESPONSE_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """CachedResponse is a response from the API server, kept for reuse"""
+
+    value: Any
+
+    # when the response was last known to be up to date, from time.time()
+    fetched_at: float
+
+    # validators the server gave for the response, if any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Get the number of seconds since the response was up to date."""
+        if now is None:
+            now = time.time()
+        return now - self.fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Get the headers that ask the server if the response has changed."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def revalidated(self) -> "CachedResponse":
+        """Get a copy of the response, now known to be up to date."""
+        return replace(self, fetched_at=time.time())
+
+
+class ResponseCache:
+    """ResponseCache keeps responses from the API server on disk
+
+    Responses are keyed by the endpoint they came from and the seed they're
+    for, and are kept in memory once they've been read. The cache is safe to
+    use from several threads at once."""
+
+    def __init__(self, cache_dir: str = RESPONSE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+        self._lock = threading.Lock()
+        self._responses: Dict[Tuple[str, int], Optional[CachedResponse]] = {}
+
+    def _path(self, endpoint: str, key: int) -> str:
+        return os.path.join(
+            self.cache_dir, f"{endpoint}-v{RESPONSE_CACHE_VERSION}-{key}.bin"
+        )
+
+    def loaded(self, endpoint: str, key: int) -> bool:
+        """Check if getting the given response won't have to read the disk."""
+        with self._lock:
+            return (endpoint, key) in self._responses
+
+    def get(self, endpoint: str, key: int) -> Optional[CachedResponse]:
+        """Get the cached response for the given endpoint and seed, if any.
+
+        The first time, the response is read from the disk. A cache file that
+        can't be used is removed, so that the response is fetched again."""
+        with self._lock:
+            if (endpoint, key) in self._responses:
+                return self._responses[(endpoint, key)]
+
+        path = self._path(endpoint, key)
+        try:
+            with open(path, "rb") as cache:
+                data: Optional[bytes] = cache.read()
+        except OSError:
+            data = None
+
+        response = None
+        if data is not None:
+            try:
+                response = pickle.loads(zlib.decompress(data))
+            except Exception:  # pylint: disable=broad-except
+                # a damaged or outdated pickle can fail to load in all sorts
+                # of ways
+                pass
+
+            if not isinstance(response, CachedResponse):
+                response = None
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            return self._responses.setdefault((endpoint, key), response)
+
+    def put(self, endpoint: str, key: int, response: CachedResponse):
+        """Cache the response for the given endpoint and seed."""
+        with self._lock:
+            self._responses[(endpoint, key)] = response
+
+        try:
+            write_atomically(
+                self._path(endpoint, key),
+                [zlib.compress(pickle.dumps(response, pickle.HIGHEST_PROTOCOL))],
+            )
+        except OSError:
+            # the copy in memory is still used, it just won't outlive the game
+            pass
+
+    def prune(self, max_age: float = RESPONSE_CACHE_MAX_AGE):
+        """Remove responses that haven't been up to date for the given time.
+
+        Responses cached by other versions are removed too, as they're never
+        loaded. Responses already read stay in memory until the game quits."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        current = f"-v{RESPONSE_CACHE_VERSION}-"
+        now = time.time()
+        for name in names:
+            if not name.endswith(".bin"):
+                continue
+
+            path = os.path.join(self.cache_dir, name)
+            try:
+                # the file is rewritten whenever the response is revalidated
+                if current in name and now - os.path.getmtime(path) < max_age:
+                    continue
+                os.unlink(path)
+            except OSError:
+                pass
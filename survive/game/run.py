@@ -3,12 +3,15 @@
 import pygame
 import pygame_gui
 
+from .autosave import Autosaver
 from .dungeon import WINDOW_H, WINDOW_W, Dungeon
 from .env import ONLINE_PLAY
 from .game import Game, GameState, set_game
 from .gameend import GameEndedScreen
-from .mainmenu import GAME_TITLE, MainMenu
+from .mainmenu import GAME_TITLE, MainMenu, upcoming_daily_seeds
 from .online import OnlinePlay
+from .pregen import Pregenerator
+from .replay import CRASH_REPORT_PATH, save_log
 from .sprites import SpriteSet, SpriteSheet
 
 
@@ -60,73 +63,122 @@ def run():
     else:
         online = None
 
+    # get the next few daily dungeons ready in the background
+    pregenerator = Pregenerator(len(clutter_sprites), len(hall_clutter_sprites))
+    daily_seeds = upcoming_daily_seeds()
+    pregenerator.prune(daily_seeds)
+    for seed in daily_seeds:
+        pregenerator.request(seed)
+
     game = Game(seed=0)
     set_game(game)
 
-    main_menu = MainMenu(ui, window, online=online)
+    main_menu = MainMenu(ui, window, online=online, pregenerator=pregenerator)
     game_ended = GameEndedScreen(ui, window, online=online)
 
     receiver = main_menu
 
+    active_game = None
+
     clock = pygame.time.Clock()
 
     prev_state = game.state()
 
     pygame.key.set_repeat(5, 250)
 
-    active_game = None
     dt = 0.0
-    while True:
-        curr_state = game.state()
-
-        # kill an ongoing game if needed
-        if curr_state != GameState.STATE_PLAYING:
-            if active_game is not None:
-                active_game.kill()
-                active_game = None
-
-        if curr_state == GameState.STATE_MAIN_MENU:
-            if prev_state != curr_state:
-                main_menu.rebuild()
-
-            receiver = main_menu
-
-            if main_menu.done():
-                # reload game
-                game = Game(seed=main_menu.seed)
-                set_game(game)
-                game.set_state(GameState.STATE_PLAYING)
-
-                active_game = Dungeon(
-                    game,
-                    ui,
-                    font,
-                    window,
-                    spriteset,
-                    main_menu.attributes,
-                    online=online,
-                )
-                main_menu.ack_done()
-
-                receiver = active_game
-        elif curr_state in (GameState.STATE_WIN, GameState.STATE_DEAD):
-            receiver = game_ended
-
-            if curr_state != prev_state:
-                game_ended.set_won(curr_state == GameState.STATE_WIN)
-                game_ended.rebuild()
-
-        for event in pygame.event.get():
-            ui.process_events(event)
-            receiver.handle_event(event)
-
-        receiver.render()
-        ui.draw_ui(window)
-
-        pygame.display.update()
-        dt = clock.tick(60)  # can return time in ticks for arithmetic
-
-        receiver.tick(dt)
-        ui.update(dt)
-
-        prev_state = curr_state
+    try:
+        while True:
+            curr_state = game.state()
+
+            # kill an ongoing game if needed
+            if curr_state != GameState.STATE_PLAYING:
+                if active_game is not None:
+                    active_game.kill()
+                    active_game = None
+
+            if curr_state == GameState.STATE_MAIN_MENU:
+                if prev_state != curr_state:
+                    main_menu.rebuild()
+
+                receiver = main_menu
+
+                if main_menu.done() and main_menu.resumed is not None:
+                    # carry on with the run that was autosaved
+                    resumed = main_menu.resumed
+                    main_menu.resumed = None
+
+                    game = resumed.game
+                    set_game(game)
+                    game.set_state(GameState.STATE_PLAYING)
+
+                    active_game = Dungeon(
+                        game,
+                        ui,
+                        font,
+                        window,
+                        spriteset,
+                        resumed.player.attributes,
+                        online=online,
+                        engine=resumed,
+                        autosaver=Autosaver(),
+                    )
+                    main_menu.ack_done()
+
+                    receiver = active_game
+                elif main_menu.done():
+                    # reload game
+                    game = Game(seed=main_menu.seed)
+                    set_game(game)
+                    game.set_state(GameState.STATE_PLAYING)
+
+                    active_game = Dungeon(
+                        game,
+                        ui,
+                        font,
+                        window,
+                        spriteset,
+                        main_menu.attributes,
+                        online=online,
+                        generated=pregenerator.take(main_menu.seed),
+                        autosaver=Autosaver(),
+                    )
+                    main_menu.ack_done()
+
+                    receiver = active_game
+            elif curr_state in (GameState.STATE_WIN, GameState.STATE_DEAD):
+                receiver = game_ended
+
+                if curr_state != prev_state:
+                    game_ended.set_won(curr_state == GameState.STATE_WIN)
+                    game_ended.rebuild()
+
+            for event in pygame.event.get():
+                ui.process_events(event)
+                receiver.handle_event(event)
+
+            # receivers that track what they changed return dirty rects
+            dirty_rects = receiver.render()
+            ui.draw_ui(window)
+
+            if dirty_rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(dirty_rects)
+            dt = clock.tick(60)  # can return time in ticks for arithmetic
+
+            receiver.tick(dt)
+            ui.update(dt)
+
+            prev_state = curr_state
+    except Exception:
+        # the run's actions are all it takes to reproduce whatever went wrong
+        if active_game is not None:
+            save_log(CRASH_REPORT_PATH, active_game.engine.action_log)
+        raise
+    finally:
+        # don't hold up quitting for requests or dungeons that haven't been
+        # started yet
+        if online is not None:
+            online.shutdown()
+        pregenerator.shutdown()
@@ -0,0 +1,122 @@
+"""This module saves and restores a dungeon run in a compact binary format"""
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import typing
+from typing import List, Sequence, Union
+
+if typing.TYPE_CHECKING:
+    from .engine import DungeonEngine
+
+# Bytes at the start of every save file.
+SAVE_MAGIC = b"SURVSAVE"
+
+# Version of the save format. Bump this whenever anything that's saved
+# changes shape, so that older saves are refused rather than misread.
+SAVE_VERSION = 2
+
+# Magic, version, number of array buffers and length of the pickled state.
+SAVE_HEADER = struct.Struct("<8sHHI")
+
+# Offset and length of each array buffer, following the header.
+SAVE_BUFFER_ENTRY = struct.Struct("<QQ")
+
+# Alignment of the array buffers within the file.
+SAVE_ALIGNMENT = 64
+
+Chunk = Union[bytes, memoryview]
+
+
+def encode_run(engine: "DungeonEngine") -> List[Chunk]:
+    """Encode a dungeon run as the chunks of a save file.
+
+    The run's objects are pickled, except for the contents of its arrays,
+    which are stored raw and aligned after the pickled state so that they
+    can be read straight back out of the file."""
+    buffers: List[pickle.PickleBuffer] = []
+    state = pickle.dumps(engine, protocol=5, buffer_callback=buffers.append)
+    raw = [buffer.raw() for buffer in buffers]
+
+    chunks: List[Chunk] = [b"", b"", state]
+    entries = []
+    offset = SAVE_HEADER.size + SAVE_BUFFER_ENTRY.size * len(raw) + len(state)
+    for view in raw:
+        padding = -offset % SAVE_ALIGNMENT
+        chunks.append(bytes(padding))
+        offset += padding
+
+        entries.append(SAVE_BUFFER_ENTRY.pack(offset, view.nbytes))
+        chunks.append(view)
+        offset += view.nbytes
+
+    chunks[0] = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, len(raw), len(state))
+    chunks[1] = b"".join(entries)
+    return chunks
+
+
+def write_atomically(path: str, chunks: Sequence[Chunk]):
+    """Write the given chunks to a file in one go.
+
+    The chunks are written to a temporary file first, which then replaces
+    the given file, so a reader never sees a half written file."""
+    data = b"".join(chunks)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as temp:
+            temp.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def save_run(path: str, engine: "DungeonEngine"):
+    """Save a dungeon run to the given file."""
+    write_atomically(path, encode_run(engine))
+
+
+def load_run(path: str) -> "DungeonEngine":
+    """Load a dungeon run from the given file.
+
+    The loaded engine comes with its own game, which must be made the
+    current game (see set_game) before the run carries on. Raises a
+    ValueError if the file isn't a save file this version can load."""
+    with open(path, "rb") as save:
+        if os.fstat(save.fileno()).st_size < SAVE_HEADER.size:
+            raise ValueError(f"{path} is not a save file")
+
+        with mmap.mmap(save.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, count, state_length = SAVE_HEADER.unpack_from(mapped)
+            if magic != SAVE_MAGIC:
+                raise ValueError(f"{path} is not a save file")
+            if version != SAVE_VERSION:
+                raise ValueError(f"{path} is a version {version} save file")
+
+            state_start = SAVE_HEADER.size + SAVE_BUFFER_ENTRY.size * count
+            if state_start + state_length > len(mapped):
+                raise ValueError(f"{path} is truncated")
+
+            entries = [
+                SAVE_BUFFER_ENTRY.unpack_from(
+                    mapped, SAVE_HEADER.size + SAVE_BUFFER_ENTRY.size * i
+                )
+                for i in range(count)
+            ]
+            if any(offset + length > len(mapped) for offset, length in entries):
+                raise ValueError(f"{path} is truncated")
+
+            with memoryview(mapped) as view:
+                # the arrays are copied out of the mapping so that the file
+                # isn't held open (and can be replaced by the next save)
+                buffers = [
+                    bytearray(view[offset : offset + length])
+                    for offset, length in entries
+                ]
+                with view[state_start : state_start + state_length] as state:
+                    return pickle.loads(state, buffers=buffers)
@@ -1,33 +1,26 @@
 """This module handles the in-dungeon shop."""
 
-import itertools
-import math
-from typing import Dict, List
+import typing
+from typing import Dict
 
 import pygame
 import pygame_gui
 
-from .constants import SHOP_DISCOUNT_FOR_CHARISMA
-from .creature import Creature
-from .game import game
-from .item import Armor, InstantEffectItem, Item, Weapon
+from .actions import Action, ActionType
+from .item import Item
+
+if typing.TYPE_CHECKING:
+    from .engine import DungeonEngine
 
 
 class Shop(pygame_gui.elements.UIWindow):
     """Shows a shop window for purchasing items."""
 
-    def __init__(
-        self,
-        player: Creature,
-        consumables: List[InstantEffectItem],
-        weapons: List[Weapon],
-        armors: List[Armor],
-        *args,
-        **kwargs,
-    ):
+    def __init__(self, engine: "DungeonEngine", *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.player = player
+        self.engine = engine
+        self.player = engine.player
 
         root_rt = self.ui_manager.get_root_container().get_rect()
         root_size = root_rt.size
@@ -58,20 +51,20 @@ class Shop(pygame_gui.elements.UIWindow):
             anchors={"top_target": info, "left": "left"},
         )
 
-        all_inventory = list(itertools.chain(consumables, weapons, armors))
+        self.items = engine.shop_items()
 
         self.shop_container.set_scrollable_area_dimensions(
-            (rt.width - 36, 8 + (len(all_inventory) * 48))
+            (rt.width - 36, 8 + (len(self.items) * 48))
         )
 
         inventory_rt = self.shop_container.get_container().get_rect()
 
         self.lookup = {}
         self.inspect = {}
-        self.confirms: Dict[pygame_gui.elements.UIButton, Item] = {}
+        self.confirms: Dict[pygame_gui.elements.UIButton, int] = {}
 
         prev_row = None
-        for nth, item in enumerate(all_inventory):
+        for nth, item in enumerate(self.items):
             anchors = {"left": "left", "right": "right"}
             if prev_row is None:
                 anchors["top"] = "top"
@@ -113,7 +106,7 @@ class Shop(pygame_gui.elements.UIWindow):
                 ),
             )
 
-            self.lookup[purchase_button] = item
+            self.lookup[purchase_button] = nth
 
             inspect_button = pygame_gui.elements.UIButton(
                 pygame.Rect(-80, 0, 32, 32),
@@ -150,19 +143,21 @@ class Shop(pygame_gui.elements.UIWindow):
 
             lookup = self.lookup.get(event.ui_element)
             if lookup is not None:
+                item = self.items[lookup]
                 popup = pygame_gui.windows.UIConfirmationDialog(
                     self.dialog_rt,
                     "Are you sure you want to purchase %s for %d gold?"
-                    % (lookup.name, lookup.value),
+                    % (item.name, item.value),
                     manager=self.ui_manager,
-                    window_title="Purchasing %s" % (lookup.name,),
+                    window_title="Purchasing %s" % (item.name,),
                 )
 
                 self.confirms[popup] = lookup
 
         if event.type == pygame_gui.UI_CONFIRMATION_DIALOG_CONFIRMED:
-            item = self.confirms.get(event.ui_element)
-            if item is not None:
+            nth = self.confirms.get(event.ui_element)
+            if nth is not None:
+                item = self.items[nth]
                 if self.player.gold < self.real_cost(item):
                     pygame_gui.windows.UIMessageWindow(
                         self.dialog_rt,
@@ -172,17 +167,10 @@ class Shop(pygame_gui.elements.UIWindow):
                     )
                 else:
                     # purchase it!
-                    if self.player.give(item):
-                        self.player.gold -= self.real_cost(item)
-                        game().log("You purchased %s." % (item.name,))
-                        game().stats().gold_spent += self.real_cost(item)
-                    else:
-                        game().log("Your inventory is full!")
+                    self.engine.step(Action(ActionType.BUY, item=nth))
 
         return consumed
 
     def real_cost(self, item: Item) -> int:
         """Gets the real cost of the given item given modifiers."""
-        modifier = self.player.attributes.get_modifier("chr")
-        discount = SHOP_DISCOUNT_FOR_CHARISMA * modifier
-        return int(math.floor(item.value - (discount * item.value)))
+        return self.engine.price(item)
@@ -1,11 +1,16 @@
 """This module handles transferring items from chests to the player."""
 
+import typing
+from typing import List, Optional
+
 import pygame
 import pygame_gui
 
-from .creature import Creature
+from .actions import Action, ActionType
 from .game import game
-from .item import Chest
+
+if typing.TYPE_CHECKING:
+    from .engine import DungeonEngine
 
 SUBTITLE = "Choose what to loot!"
 
@@ -16,11 +21,13 @@ class InventoryTransferModal:
     def __init__(
         self,
         ui: pygame_gui.UIManager,
-        container: Chest,
-        player: Creature,
+        engine: "DungeonEngine",
         surface: pygame.Surface,
         title="Chest Opened",
     ):
+        if engine.opened_chest is None:
+            raise ValueError("there's no opened chest to loot")
+
         self.ui = ui
 
         self.surface = surface
@@ -37,8 +44,8 @@ class InventoryTransferModal:
             window_display_title=title,
         )
 
-        self._container = container
-        self._player = player
+        self._engine = engine
+        self._container = container = engine.opened_chest
         self._done = False
         self.dirty = True
 
@@ -100,8 +107,9 @@ class InventoryTransferModal:
             },
         )
 
-    def render(self):
+    def render(self) -> Optional[List[pygame.Rect]]:
         """Unused. Here for compatibility."""
+        return None
 
     def tick(self, _):
         """Unused. Here for compatibility."""
@@ -120,9 +128,11 @@ class InventoryTransferModal:
         inventory_filled = False
         for entry in self.inventory.get_multi_selection():
             item = self.lookup[entry]
-            if self._player.give(item):
-                self._container.take_item(item)
-            else:
+            count = self._container.count()
+            self._engine.step(
+                Action(ActionType.TAKE, item=self._container.items().index(item))
+            )
+            if self._container.count() == count:
                 # don't break here, because gold still transfers to a full inventory
                 inventory_filled = True
 
@@ -133,22 +143,7 @@ class InventoryTransferModal:
     def transfer_all_to_player(self):
         """Transfer all items to the player."""
 
-        transferred_items = []
-
-        inventory_filled = False
-        for item in self._container.items():
-            if self._player.give(item):
-                transferred_items.append(item)
-            else:
-                # don't break here, because gold still transfers to a full inventory
-                inventory_filled = True
-
-        for item in transferred_items:
-            self._container.take_item(item)
-
-        if inventory_filled:
-            game().log("Your inventory is full!")
-            game().log("Some items were not transferred.")
+        self._engine.step(Action(ActionType.LOOT))
 
     def handle_event(self, event):
         """Handle pygame events."""
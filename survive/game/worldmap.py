@@ -1,18 +1,20 @@
 """This module exports world map classes"""
 
 import random
-from typing import Iterable, List, Optional
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
 
 import numpy as np
 import tcod
 
 from .creature import Creature
 from .item import Chest
+from .pathing import PathService
 from .types import Position
 
 
 class Cell:
-    """Cell defines a single world tile"""
+    """Cell is a lightweight view of a single world tile stored in a Map"""
 
     TYPE_EMPTY = 0
     TYPE_ROOM = 1
@@ -20,13 +22,55 @@ class Cell:
     TYPE_CHASM = 3
     TYPE_HALL = 4
 
-    def __init__(self, pos: Position):
-        self.cell_type = Cell.TYPE_EMPTY
+    # clutter index used for tiles without any clutter
+    NO_CLUTTER = -1
+
+    __slots__ = ("_map", "pos")
+
+    def __init__(self, worldmap: "Map", pos: Position):
+        self._map = worldmap
         self.pos = pos
-        self.visible = False
-        self.explored = False
-        self.clutter = None
-        self.wall_clutter = None
+
+    @property
+    def cell_type(self) -> int:
+        """The type of this tile"""
+        return int(self._map.cell_types[self.pos])
+
+    @cell_type.setter
+    def cell_type(self, cell_type: int):
+        self._map.cell_types[self.pos] = cell_type
+
+    @property
+    def visible(self) -> bool:
+        """True if the tile is in the player's field of view"""
+        return bool(self._map.visible[self.pos])
+
+    @property
+    def explored(self) -> bool:
+        """True if the tile has ever been seen by the player"""
+        return bool(self._map.explored[self.pos])
+
+    @property
+    def clutter(self) -> Optional[int]:
+        """Index of the clutter prop on this tile, if any"""
+        clutter = int(self._map.clutter[self.pos])
+        return None if clutter == Cell.NO_CLUTTER else clutter
+
+    @clutter.setter
+    def clutter(self, clutter: Optional[int]):
+        self._map.clutter[self.pos] = Cell.NO_CLUTTER if clutter is None else clutter
+
+    @property
+    def wall_clutter(self) -> Optional[int]:
+        """Index of the clutter prop on the wall north of this tile, if any"""
+        clutter = int(self._map.wall_clutter[self.pos])
+        return None if clutter == Cell.NO_CLUTTER else clutter
+
+    @wall_clutter.setter
+    def wall_clutter(self, clutter: Optional[int]):
+        self._map.wall_clutter[self.pos] = (
+            Cell.NO_CLUTTER if clutter is None else clutter
+        )
 
     def is_passable(self) -> bool:
         """Returns True if a creature can pass through this tile"""
@@ -132,8 +176,43 @@ class Room:
         return (pos[0] + self.pos[0], pos[1] + self.pos[1])
 
 
+# room index used for tiles that aren't in any room
+NO_ROOM = -1
+
+Window = Tuple[slice, slice]
+
+
+def _bounding_window(a: Window, b: Window) -> Window:
+    """Get the smallest window that contains both of the given windows"""
+    if a[0].start == a[0].stop or a[1].start == a[1].stop:
+        return b
+
+    return (
+        slice(min(a[0].start, b[0].start), max(a[0].stop, b[0].stop)),
+        slice(min(a[1].start, b[1].start), max(a[1].stop, b[1].stop)),
+    )
+
+
+@dataclass
+class FovChange:
+    """FovChange describes the tiles changed by an FOV update"""
+
+    # world coordinate of changed[0, 0]
+    origin: Position
+
+    # True for each tile whose visible or explored state changed
+    changed: np.ndarray
+
+    def positions(self) -> List[Position]:
+        """Get the world coordinates of every changed tile"""
+        xs, ys = np.nonzero(self.changed)
+        return list(zip((xs + self.origin[0]).tolist(), (ys + self.origin[1]).tolist()))
+
+
 class Map:
-    """Map stores all the data for a single dungeon map"""
+    """Map stores all the data for a single dungeon map
+
+    Tile data is stored as a structure of arrays, each indexed by [x, y]."""
 
     def __init__(
         self,
@@ -141,46 +220,103 @@ class Map:
         width: int,
         height: int,
         rooms: List[Room],
-        cells: List[Cell],
+        cells: np.ndarray,
+        room_ids: np.ndarray,
     ):
         self.width = width
         self.height = height
         self.rooms = rooms
-        self.cells = cells
         self.rng = rng
 
+        # per-tile data
+        self.cell_types = np.asarray(cells, dtype=np.int8, order="F")
+        self.room_ids = np.asarray(room_ids, dtype=np.int16, order="F")
+        self.clutter = np.full(
+            (self.width, self.height), Cell.NO_CLUTTER, dtype=np.int16, order="F"
+        )
+        self.wall_clutter = np.full(
+            (self.width, self.height), Cell.NO_CLUTTER, dtype=np.int16, order="F"
+        )
+
         # cell visibility options
         self.explored = np.zeros((self.width, self.height), dtype=bool, order="F")
-        self.transparency = np.zeros((self.width, self.height), dtype=bool, order="F")
         self.visible = np.zeros((self.width, self.height), dtype=bool, order="F")
+        self.transparency = np.asfortranarray(self.cell_types != Cell.TYPE_EMPTY)
+
+        # area of the map that the last FOV update covered
+        self._fov_window: Window = (slice(0, 0), slice(0, 0))
 
-        for y in range(self.height):
-            for x in range(self.width):
-                if self.cells[(y * self.width) + x].cell_type != Cell.TYPE_EMPTY:
-                    self.transparency[x, y] = True
+        self.paths = PathService(self.transparency)
 
-    def cell_at(self, x: int, y: int):
+    def cell_at(self, x: int, y: int) -> Cell:
         """Get the cell at the given coordinate"""
-        return self.cells[(y * self.width) + x]
+        return Cell(self, (x, y))
 
-    def room_at(self, x: int, y: int) -> Optional[Room]:
-        """Get a room, if any, at the given coordinate"""
-        for room in self.rooms:
-            if room.contains((x, y)):
-                return room
+    def passable(self) -> np.ndarray:
+        """Get a mask of all tiles that a creature can pass through"""
+        return (self.cell_types == Cell.TYPE_ROOM) | (self.cell_types == Cell.TYPE_HALL)
 
-        return None
+    def positions_of(self, cell_type: int) -> List[Position]:
+        """Get the positions of all tiles of the given type in row-major order"""
+        ys, xs = np.nonzero(self.cell_types.T == cell_type)
+        return list(zip(xs.tolist(), ys.tolist()))
 
-    def update_fov(self, x: int, y: int):
-        """Update FOV data from the given position"""
-        self.visible = tcod.map.compute_fov(self.transparency, (x, y))
-        self.explored |= self.visible
+    def room_at(self, x: int, y: int) -> Optional[Room]:
+        """Get a room, if any, at the given coordinate"""
+        room_id = self.room_id_at(x, y)
+        if room_id == NO_ROOM:
+            return None
+
+        return self.rooms[room_id]
+
+    def room_id_at(self, x: int, y: int) -> int:
+        """Get the index of the room at the given coordinate, or NO_ROOM"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return NO_ROOM
+
+        return int(self.room_ids[x, y])
+
+    def room_ids_at(self, positions: np.ndarray) -> np.ndarray:
+        """Get the room index at each of the given (x, y) positions"""
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        return self.room_ids[positions[:, 0], positions[:, 1]]
+
+    def update_fov(self, x: int, y: int, radius: int = 0) -> FovChange:
+        """Update FOV data from the given position
+
+        With a radius of 0 the FOV is computed over the whole map. Otherwise
+        only the tiles within the radius are recomputed, and the tiles that
+        were visible from the previous update are cleared.
+
+        Returns the tiles whose visible or explored state changed."""
+        if radius > 0:
+            window = (
+                slice(max(0, x - radius), min(self.width, x + radius + 1)),
+                slice(max(0, y - radius), min(self.height, y + radius + 1)),
+            )
+        else:
+            window = (slice(0, self.width), slice(0, self.height))
+
+        # every tile that can change is in either the old or the new window
+        prev = self._fov_window
+        union = _bounding_window(prev, window)
+
+        was_visible = self.visible[union].copy()
+        was_explored = self.explored[union].copy()
+
+        self.visible[prev] = False
+        self.visible[window] = tcod.map.compute_fov(
+            self.transparency[window],
+            (x - window[0].start, y - window[1].start),
+            radius,
+        )
+        self.explored[window] |= self.visible[window]
+        self._fov_window = window
 
-        for y_ in range(self.height):
-            for x_ in range(self.width):
-                cell = self.cells[(y_ * self.width) + x_]
-                cell.visible = self.visible[x_, y_]
-                cell.explored = self.explored[x_, y_]
+        changed = (self.visible[union] != was_visible) | (
+            self.explored[union] != was_explored
+        )
+        return FovChange(origin=(union[0].start, union[1].start), changed=changed)
 
     def path_to(
         self,
@@ -193,23 +329,33 @@ class Map:
         """Return a path from the given start point to the end point.
 
         Tries to avoid player/creatures/containers."""
-        cost = np.array(self.transparency, dtype=np.int8)
+        return self.paths.path_to(
+            start, end, occupied_positions(player, creatures, containers)
+        )
 
-        # add cost for all the things that are in the way
-        if player is not None:
-            x, y = player.position
-            cost[x, y] += 10
+    def paths_to(
+        self,
+        end: Position,
+        starts: Iterable[Position],
+        player: Creature,
+        creatures: List[Creature],
+        containers: List[Chest],
+    ) -> List[List[Position]]:
+        """Return a path to the given end point from each of the start points.
 
-        for creature in creatures:
-            x, y = creature.position
-            cost[x, y] += 10
+        Tries to avoid player/creatures/containers."""
+        return self.paths.paths_to(
+            end, starts, occupied_positions(player, creatures, containers)
+        )
 
-        for container in containers:
-            x, y = container.position
-            cost[x, y] += 10
 
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
+def occupied_positions(
+    player: Optional[Creature], creatures: List[Creature], containers: List[Chest]
+) -> List[Position]:
+    """Get the positions of everything that paths should try to avoid"""
+    positions = [creature.position for creature in creatures]
+    positions.extend(container.position for container in containers)
+    if player is not None:
+        positions.append(player.position)
 
-        pathfinder.add_root(start)
-        return [(i[0], i[1]) for i in pathfinder.path_to(end)[1:].tolist()]
+    return positions
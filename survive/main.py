@@ -1,11 +1,16 @@
 """Entrypoint for Survive the Dungeon"""
 
+import multiprocessing
 import os
 import sys
 
-from game import run
+from game.run import run
 
 if __name__ == "__main__":
+    # dungeons are generated in worker processes, which bundled binaries
+    # have to be able to start
+    multiprocessing.freeze_support()
+
     if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
         # In PyInstaller bundled binaries, we need to be in the temp dir
         # to find all our resources.
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+"""Plays recorded runs again headlessly and reports how each run went.
+
+Every action a run is played with is recorded, so a run's log (e.g. a
+crash report) can be replayed to reproduce it exactly:
+
+    python survive/replay.py crash.log
+"""
+
+from game.replay import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Tests for creature AI"""
+# pylint: disable=missing-docstring
+
+import random
+import types
+import unittest
+from typing import List, cast
+
+from game.ai import AI
+from game.creature import Creature
+from game.engine import DungeonEngine
+from game.game import Game, set_game
+from game.mapgen import generate_map
+
+from .util import create_creature
+
+
+class TestFlowFieldAI(unittest.TestCase):
+    def setUp(self) -> None:
+        # every test may need a game object to exist
+        game = Game()
+        set_game(game)
+
+        worldmap = generate_map(random.Random(1))
+        room = worldmap.rooms[0]
+
+        self.player = create_creature(name="Player")
+        self.player.position = room.room_to_world((0, 0))
+
+        self.mob = create_creature(name="Goblin")
+        self.mob.position = room.room_to_world((room.dims[0] - 1, room.dims[1] - 1))
+
+        self.dungeon = types.SimpleNamespace(
+            player=self.player,
+            worldmap=worldmap,
+            creatures=[self.mob],
+            containers=[],
+        )
+
+        self.attacked: List[Creature] = []
+        self.ai = AI(
+            # the AI only needs the parts of the engine that are here
+            cast(DungeonEngine, self.dungeon),
+            self.walkable,
+            self.attacked.append,
+            flow_field=True,
+        )
+        self.ai.attach(self.mob)
+
+    def walkable(self, pos) -> bool:
+        return (
+            self.dungeon.worldmap.cell_at(*pos).is_passable()
+            and pos != self.player.position
+        )
+
+    def test_chaser_steps_toward_player_and_attacks(self):
+        def distance() -> int:
+            return max(
+                abs(self.mob.position[0] - self.player.position[0]),
+                abs(self.mob.position[1] - self.player.position[1]),
+            )
+
+        for _ in range(20):
+            before = distance()
+            self.ai.plan()
+            self.mob.think()
+            if self.attacked:
+                break
+            self.assertEqual(distance(), before - 1)
+
+        self.assertEqual(self.attacked, [self.mob])
+        self.assertEqual(distance(), 1)
+
+    def test_field_is_shared_between_ticks(self):
+        self.ai.plan()
+        field = self.ai.chase_field
+        self.ai.plan()
+        self.assertIs(self.ai.chase_field, field)
+
+
+if __name__ == "__main__":
+    unittest.main()
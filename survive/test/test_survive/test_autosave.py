@@ -0,0 +1,109 @@
+"""Tests for saving runs in the background"""
+# pylint: disable=missing-docstring
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from game.attributes import AttributeSet
+from game.autosave import Autosaver, load_autosave, snapshot_run
+from game.engine import Action, ActionType, DungeonEngine
+from game.game import Game, set_game
+from game.savegame import write_atomically
+
+MOVE = Action(ActionType.MOVE, 1, 0)
+
+
+class TestAutosave(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(seed=7)
+        set_game(self.game)
+        self.engine = DungeonEngine(self.game, AttributeSet())
+
+        self.save_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.path = os.path.join(self.save_dir.name, "autosave.sav")
+        self.autosaver = Autosaver(self.path, interval=100)
+
+    def tearDown(self) -> None:
+        self.autosaver.close()
+        self.save_dir.cleanup()
+
+    def test_saves_after_interval(self):
+        self.autosaver.tick(60, self.engine)
+        self.autosaver.flush()
+        self.assertFalse(os.path.exists(self.path))
+
+        self.autosaver.tick(60, self.engine)
+        self.autosaver.flush()
+        self.assertEqual(self.autosaver.saved, 1)
+
+        restored = load_autosave(self.path)
+        self.assertIsNotNone(restored)
+        self.assertEqual(restored.player.position, self.engine.player.position)
+
+    def test_snapshot_is_a_copy(self):
+        chunks = snapshot_run(self.engine)
+        for _ in range(4):
+            self.engine.step(MOVE)
+
+        write_atomically(self.path, chunks)
+        restored = load_autosave(self.path)
+        self.assertEqual(restored.turns, 0)
+        self.assertNotEqual(
+            restored.worldmap.explored.sum(), self.engine.worldmap.explored.sum()
+        )
+
+    def test_drops_stale_snapshots(self):
+        started = threading.Event()
+        release = threading.Event()
+        written = []
+
+        def slow_write(path, chunks):
+            started.set()
+            release.wait()
+            write_atomically(path, chunks)
+            written.append(chunks)
+
+        with mock.patch("game.autosave.write_atomically", slow_write):
+            self.autosaver.save(self.engine)
+            started.wait()
+
+            # the disk is busy, so only the newest of these is kept
+            for _ in range(3):
+                self.engine.step(MOVE)
+                self.autosaver.save(self.engine)
+
+            release.set()
+            self.autosaver.flush()
+
+        self.assertEqual(self.autosaver.dropped, 2)
+        self.assertEqual(len(written), 2)
+        self.assertEqual(load_autosave(self.path).turns, self.engine.turns)
+
+    def test_discard(self):
+        self.autosaver.save(self.engine)
+        self.autosaver.discard()
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(load_autosave(self.path))
+
+    def test_damaged_autosave(self):
+        data = b"".join(snapshot_run(self.engine))
+        damaged = {
+            "truncated": data[: len(data) // 2],
+            "garbled": data[:64] + bytes(reversed(data[64:])),
+        }
+        for name, contents in damaged.items():
+            with self.subTest(name):
+                with open(self.path, "wb") as save:
+                    save.write(contents)
+
+                # the damaged save is removed so it isn't tried every start
+                self.assertIsNone(load_autosave(self.path))
+                self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
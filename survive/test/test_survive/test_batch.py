@@ -0,0 +1,41 @@
+"""Tests for the batch runner"""
+# pylint: disable=missing-docstring
+
+import csv
+import os
+import tempfile
+import unittest
+
+from game.batch import COLUMNS, OUTCOME_TIMEOUT, main, play
+
+
+class TestBatch(unittest.TestCase):
+    def test_play_is_deterministic(self):
+        first = play(1)
+        second = play(1)
+
+        self.assertEqual(first, second)
+        self.assertIn(first.outcome, ("win", "dead", OUTCOME_TIMEOUT))
+        self.assertEqual(len(first.row()), len(COLUMNS))
+
+    def test_turn_limit(self):
+        result = play(1, max_turns=3)
+
+        self.assertEqual(result.outcome, OUTCOME_TIMEOUT)
+        self.assertEqual(result.turns, 3)
+
+    def test_main_writes_a_row_per_seed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runs.csv")
+            main(["--start", "5", "--count", "2", "--workers", "1", "--output", path])
+
+            with open(path, "r", encoding="utf-8") as output:
+                rows = list(csv.reader(output))
+
+        self.assertEqual(rows[0], COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:]], ["5", "6"])
+        self.assertEqual(rows[1], [str(value) for value in play(5).row()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for the vectorized combat simulator"""
+# pylint: disable=missing-docstring
+
+import itertools
+import unittest
+
+import numpy as np
+from game.combat import Combat, CombatState
+from game.combatsim import CombatantStats, resolve_attacks, simulate_battles
+from game.dice import Dice, DiceExpr
+from game.game import Game, set_game
+
+from .util import TestDice, create_creature, equip_standard
+
+
+class TestCombatSim(unittest.TestCase):
+    def setUp(self) -> None:
+        game = Game()
+        set_game(game)
+
+        self.player = create_creature(name="Player", hp=30)
+        self.defender = create_creature(name="Goblin", hp=30)
+        equip_standard(self.player)
+        equip_standard(self.defender)
+
+        # make the two sides a bit different
+        self.defender.attack_bonus = 3
+        self.defender.defense_bonus = 4
+
+    def test_stats_from_creature(self):
+        stats = CombatantStats.from_creature(self.player)
+
+        self.assertEqual(stats.hitpoints, 30)
+        self.assertEqual(stats.critical_range, 19)
+        self.assertEqual(stats.critical_multiplier, 2)
+        self.assertEqual(stats.damage, DiceExpr.parse("1d10"))
+
+    def test_matches_combat(self):
+        player = CombatantStats.from_creature(self.player)
+        defender = CombatantStats.from_creature(self.defender)
+
+        # every attack roll, with a failed and successful crit confirmation
+        rolls = np.array(list(itertools.product(range(1, 21), (1, 20), (1, 7))))
+        attack_rolls, crit_rolls, damage_rolls = rolls.T
+
+        for (attacker, target, creature, victim), (
+            atkmult,
+            defmult,
+        ) in itertools.product(
+            (
+                (player, defender, self.player, self.defender),
+                (defender, player, self.defender, self.player),
+            ),
+            ((1.0, 1.0), (2.0, 0.3), (0.5, 1.5)),
+        ):
+            damage = resolve_attacks(
+                attacker,
+                target,
+                attack_rolls,
+                crit_rolls,
+                damage_rolls,
+                atkmult,
+                defmult,
+            )
+
+            for (attack, crit, dam), expected in zip(rolls.tolist(), damage):
+                dice = TestDice()
+                if attack >= creature.get_weapon_critical_range():
+                    dice.queue_results(attack, crit, dam)
+                else:
+                    dice.queue_results(attack, dam)
+
+                victim.hitpoints = 100
+                Combat(dice)._attack(  # pylint: disable=protected-access
+                    creature, victim, atkmult=atkmult, defmult=defmult
+                )
+                self.assertEqual(100 - victim.hitpoints, expected)
+
+    def test_defender_cant_retaliate(self):
+        player = CombatantStats.from_creature(self.player)
+        defender = CombatantStats.from_creature(create_creature(hp=1))
+
+        # the player can't do less than 1 damage, so always wins in one turn
+        results = simulate_battles(player, defender, 1000, np.random.default_rng(1))
+
+        self.assertTrue(np.all(results.player_won))
+        self.assertTrue(np.all(results.turns == 1))
+        self.assertTrue(np.all(results.player_hitpoints == 30))
+        self.assertEqual(results.expected_turns_to_kill(), 1.0)
+
+    def test_agrees_with_combat(self):
+        count = 2000
+        results = simulate_battles(
+            CombatantStats.from_creature(self.player),
+            CombatantStats.from_creature(self.defender),
+            count,
+            np.random.default_rng(1),
+        )
+
+        self.assertTrue(np.all(results.finished))
+        self.assertTrue(np.all(results.player_won ^ (results.player_hitpoints == 0)))
+        self.assertAlmostEqual(results.player_hitpoints_distribution().sum(), 1.0)
+
+        combat = Combat(Dice())
+        wins = 0
+        for _ in range(count):
+            self.player.hitpoints = self.defender.hitpoints = 30
+            self.player.alive = self.defender.alive = True
+            state = CombatState(self.player, self.defender, 1.0, 1.0, False, None)
+            while self.player.alive and self.defender.alive:
+                state.needs_turn = True
+                combat.turn(state)
+            wins += self.player.alive
+
+        # well within the sampling error of both runs
+        self.assertAlmostEqual(results.win_probability(), wins / count, delta=0.06)
+
+
+if __name__ == "__main__":
+    unittest.main()
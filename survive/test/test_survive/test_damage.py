@@ -0,0 +1,116 @@
+"""Tests for the damage calculator"""
+# pylint: disable=missing-docstring
+
+import itertools
+import unittest
+from typing import Dict, Tuple
+
+import numpy as np
+from game.combat import Combat
+from game.damage import damage_distribution, expected_damage, hit_chance
+from game.dice import DiceExpr
+from game.game import Game, set_game
+from game.item import Armor, Weapon
+
+from .util import TestDice, create_creature
+
+
+class TestDamage(unittest.TestCase):
+    def setUp(self) -> None:
+        game = Game()
+        set_game(game)
+
+    def brute_force(
+        self, weapon: Weapon, atkmult: float
+    ) -> Tuple[int, int, Dict[int, float]]:
+        """Run Combat._attack with every possible roll of the dice."""
+        attacker = create_creature(name="Attacker")
+        defender = create_creature(name="Defender")
+        attacker.wield("hands", weapon)
+
+        expr = weapon.damage()
+        faces = [range(1, expr.faces + 1)] * expr.count
+
+        outcomes: dict = {}
+        for attack, crit in itertools.product(range(1, 21), range(1, 21)):
+            # the crit roll only happens in the critical range
+            if attack < weapon.critical_range() and crit > 1:
+                continue
+            chance = 1 / 20 if attack < weapon.critical_range() else 1 / 400
+
+            for dice in itertools.product(*faces):
+                rolls = TestDice()
+                if attack >= weapon.critical_range():
+                    rolls.queue_results(attack, crit, sum(dice))
+                else:
+                    rolls.queue_results(attack, sum(dice))
+
+                defender.hitpoints = 100
+                Combat(rolls)._attack(  # pylint: disable=protected-access
+                    attacker, defender, atkmult=atkmult
+                )
+
+                dealt = 100 - defender.hitpoints
+                probability = chance / expr.faces**expr.count
+                outcomes[dealt] = outcomes.get(dealt, 0.0) + probability
+
+        attack_bonus = attacker.attack_bonus + defender.attributes.get_modifier("str")
+        armor_class = 10 + defender.defense_bonus
+        armor_class += defender.attributes.get_modifier("dex")
+        return attack_bonus, armor_class, outcomes
+
+    def test_matches_combat(self):
+        for weapon, atkmult in (
+            (Weapon("Sword", 18, 3, 2, 0, "2d4"), 1.0),
+            (Weapon("Club", 20, 2, 0, 0, "1d6"), 2.0),
+            (Weapon("Dagger", 19, 2, 9, 0, "3d3"), 0.5),
+        ):
+            attack_bonus, armor_class, outcomes = self.brute_force(weapon, atkmult)
+            args = (
+                weapon.damage(),
+                attack_bonus,
+                armor_class,
+                weapon.critical_range(),
+                weapon.critical_multiplier(),
+                atkmult,
+            )
+
+            values, probabilities = damage_distribution(*args)
+            self.assertEqual(list(values), sorted(outcomes))
+            np.testing.assert_allclose(
+                probabilities, [outcomes[value] for value in values]
+            )
+
+            self.assertAlmostEqual(
+                expected_damage(*args),
+                sum(value * chance for value, chance in outcomes.items()),
+            )
+
+    def test_hit_chance(self):
+        # beat AC 12 with +2: 11 through 20
+        self.assertEqual(hit_chance(2, 12), 0.5)
+
+        # crits always hit
+        self.assertEqual(hit_chance(-100, 12, 18), 0.15)
+        self.assertEqual(hit_chance(100, 12, 18), 1.0)
+
+    def test_weapon_comparison(self):
+        strong = Weapon("Strong", 18, 3, 5, 0, "3d6")
+        weak = Weapon("Weak", 20, 2, 0, 0, "1d4")
+
+        self.assertGreater(strong.expected_damage(), weak.expected_damage())
+        self.assertGreater(strong.hit_chance(), weak.hit_chance())
+        self.assertIn("Expected damage", strong.compare_to(weak))
+
+        sturdy = Armor("chest", name="Sturdy", defensebonus=8)
+        flimsy = Armor("chest", name="Flimsy", defensebonus=1)
+        self.assertLess(sturdy.chance_to_be_hit(), flimsy.chance_to_be_hit())
+
+    def test_memoized(self):
+        args = (DiceExpr.parse("5d12"), 4, 14, 19, 3)
+        self.assertIs(damage_distribution(*args), damage_distribution(*args))
+        self.assertEqual(expected_damage(*args), expected_damage(*args))
+
+
+if __name__ == "__main__":
+    unittest.main()
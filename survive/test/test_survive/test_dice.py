@@ -0,0 +1,80 @@
+"""Tests for dice rolling"""
+# pylint: disable=missing-docstring
+
+import random
+import unittest
+
+import numpy as np
+from game.dice import Dice, DiceExpr
+from game.game import Game, set_game
+from game.item import Weapon
+
+
+class TestDiceExpr(unittest.TestCase):
+    def setUp(self) -> None:
+        game = Game()
+        set_game(game)
+
+    def test_parse_is_interned(self):
+        expr = DiceExpr.parse("3d6")
+
+        self.assertIs(DiceExpr.parse("3d6"), expr)
+        self.assertIs(DiceExpr.parse(expr), expr)
+        self.assertEqual((expr.count, expr.faces), (3, 6))
+        self.assertEqual(str(expr), "3d6")
+
+    def test_parse_invalid(self):
+        with self.assertRaises(ValueError):
+            DiceExpr.parse("d6")
+
+    def test_stats(self):
+        expr = DiceExpr.parse("3d6")
+
+        self.assertEqual((expr.min, expr.max), (3, 18))
+        self.assertEqual(expr.mean, 10.5)
+        self.assertEqual(Dice().minmax("3d6"), (3, 18))
+
+    def test_distribution(self):
+        distribution = DiceExpr.parse("2d6").distribution()
+
+        self.assertEqual(len(distribution), 13)
+        self.assertEqual(distribution[0], 0.0)
+        self.assertEqual(distribution[1], 0.0)
+        self.assertAlmostEqual(distribution[7], 6 / 36)
+        self.assertAlmostEqual(distribution[12], 1 / 36)
+        self.assertAlmostEqual(distribution.sum(), 1.0)
+
+        expr = DiceExpr.parse("4d8")
+        totals = np.arange(len(expr.distribution()))
+        self.assertAlmostEqual(np.dot(totals, expr.distribution()), expr.mean)
+
+    def test_roll_matches_rollnamed(self):
+        expr = DiceExpr.parse("4d10")
+
+        rolls = [expr.roll(random.Random(5)) for _ in range(3)]
+        self.assertEqual(len(set(rolls)), 1)
+
+        set_game(Game(seed=5))
+        named = Dice().rollnamed("4d10")
+        set_game(Game(seed=5))
+        self.assertEqual(Dice().rollnamed(expr), named)
+
+    def test_roll_many(self):
+        expr = DiceExpr.parse("3d6")
+        rolls = expr.roll_many(np.random.default_rng(1), 10000)
+
+        self.assertEqual(rolls.shape, (10000,))
+        self.assertGreaterEqual(rolls.min(), expr.min)
+        self.assertLessEqual(rolls.max(), expr.max)
+        self.assertAlmostEqual(rolls.mean(), expr.mean, delta=0.2)
+
+    def test_weapon_stores_parsed_damage(self):
+        weapon = Weapon(dam="2d8")
+
+        self.assertIs(weapon.damage(), DiceExpr.parse("2d8"))
+        self.assertEqual(weapon.serialize()["dam"], "2d8")
+        self.assertEqual(Weapon.deserialize(weapon.serialize()).dam, weapon.dam)
+
+
+if __name__ == "__main__":
+    unittest.main()
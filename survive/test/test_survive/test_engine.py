@@ -0,0 +1,197 @@
+"""Tests for the headless dungeon engine"""
+# pylint: disable=missing-docstring
+
+import os
+import subprocess
+import sys
+import unittest
+
+import game
+from game.attributes import AttributeSet
+from game.engine import Action, ActionType, DungeonEngine, generate_dungeon
+from game.game import Game, GameState, set_game
+from game.item import Chest, Gold, Weapon
+from game.worldmap import Room
+
+WAIT = Action(ActionType.WAIT)
+
+
+def create_engine(seed: int = 1) -> DungeonEngine:
+    current = Game(seed=seed)
+    set_game(current)
+    return DungeonEngine(current, AttributeSet())
+
+
+class TestDungeonEngine(unittest.TestCase):
+    def test_runs_are_deterministic(self):
+        def run(seed: int):
+            engine = create_engine(seed)
+            for _ in range(50):
+                engine.step(WAIT)
+            return [creature.position for creature in engine.creatures]
+
+        self.assertEqual(run(3), run(3))
+        self.assertNotEqual(run(3), run(4))
+
+    def test_generation_uses_the_given_game(self):
+        def generate(seed: int):
+            generated = generate_dungeon(Game(seed=seed))
+            return [
+                (creature.position, creature.maxhitpoints, creature.gold)
+                for creature in generated.creatures
+            ]
+
+        create_engine(3)
+        expected = generate(3)
+
+        # the current game's random numbers aren't touched, or needed
+        self.addCleanup(set_game, Game())
+        set_game(Game(seed=4))
+        self.assertEqual(generate(3), expected)
+        set_game(None)
+        self.assertEqual(generate(3), expected)
+
+    def test_move(self):
+        engine = create_engine()
+        start = engine.player.position
+
+        # find a free tile next to the player
+        for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            pos = (start[0] + dx, start[1] + dy)
+            if engine.walkable(pos):
+                break
+        else:
+            self.fail("player is boxed in")
+
+        fov = engine.step(Action(ActionType.MOVE, dx, dy))
+
+        self.assertEqual(engine.player.position, pos)
+        self.assertEqual(engine.turns, 1)
+        self.assertIsNotNone(fov)
+        self.assertTrue(engine.worldmap.visible[pos])
+
+    def test_battle_pauses_the_world(self):
+        engine = create_engine()
+        mob = engine.creatures[0]
+
+        engine.start_battle(mob)
+        self.assertTrue(engine.player.in_battle)
+
+        # moving does nothing until the battle is over
+        position = engine.player.position
+        self.assertIsNone(engine.step(Action(ActionType.MOVE, 1, 0)))
+        self.assertEqual(engine.player.position, position)
+        self.assertEqual(engine.turns, 0)
+
+        while engine.battle is not None:
+            engine.step(Action(ActionType.HEAVY_ATTACK))
+
+        self.assertFalse(engine.player.in_battle)
+        self.assertNotEqual(engine.player.alive, mob.alive)
+
+        engine.step(WAIT)
+        if engine.player.alive:
+            self.assertNotIn(mob, engine.creatures)
+            self.assertEqual(engine.game.stats().vanquished, 1)
+        else:
+            self.assertEqual(engine.outcome, GameState.STATE_DEAD)
+            self.assertEqual(engine.game.state(), GameState.STATE_DEAD)
+
+    def test_heal_in_battle(self):
+        engine = create_engine()
+        engine.player.hitpoints = 1
+
+        engine.start_battle(engine.creatures[0])
+        engine.step(Action(ActionType.HEAL))
+
+        self.assertGreater(engine.player.hitpoints, 1)
+        self.assertEqual(engine.player.inventory.count(), 5)
+
+    def test_loot_opened_chest(self):
+        engine = create_engine()
+        chest = Chest((1, 1))
+        chest.add_item(Gold(value=25))
+        engine.opened_chest = chest
+
+        engine.step(Action(ActionType.LOOT))
+
+        self.assertTrue(chest.empty())
+        self.assertEqual(engine.player.gold, 25)
+        self.assertIsNone(engine.opened_chest)
+
+    def test_take_from_opened_chest(self):
+        engine = create_engine()
+        chest = Chest((1, 1))
+        chest.add_item(Gold(value=25))
+        chest.add_item(Weapon("Stick", 20, 2))
+        engine.opened_chest = chest
+
+        engine.step(Action(ActionType.TAKE, item=1))
+
+        # the chest stays open to take the rest
+        self.assertIs(engine.opened_chest, chest)
+        self.assertEqual([item.name for item in chest.items()], ["Gold"])
+        self.assertEqual(engine.player.inventory.items()[-1].name, "Stick")
+        self.assertEqual(engine.turns, 0)
+
+        engine.step(WAIT)
+        self.assertIsNone(engine.opened_chest)
+
+    def test_buy(self):
+        engine = create_engine()
+        bandages = engine.shop_items()[0]
+        engine.player.gold = engine.price(bandages)
+
+        # only in the shop
+        engine.step(Action(ActionType.BUY, item=0))
+        self.assertEqual(engine.player.gold, engine.price(bandages))
+
+        engine.current_room = next(
+            room for room in engine.worldmap.rooms if room.attrs & Room.ATTR_SHOP_ROOM
+        )
+        engine.step(Action(ActionType.BUY, item=0))
+        self.assertEqual(engine.player.gold, 0)
+        self.assertEqual(engine.player.inventory.count(), 7)
+        self.assertEqual(engine.game.stats().gold_spent, engine.price(bandages))
+
+        # can't afford another
+        engine.step(Action(ActionType.BUY, item=0))
+        self.assertEqual(engine.player.inventory.count(), 7)
+
+    def test_inventory_actions(self):
+        engine = create_engine()
+        stick = Weapon("Stick", 20, 2)
+        engine.player.give(stick)
+
+        engine.step(Action(ActionType.WIELD, item=engine.player.inventory.count() - 1))
+        self.assertIs(engine.player.wieldpoints["hands"], stick)
+        self.assertNotIn(stick, engine.player.inventory.items())
+
+        engine.player.hitpoints = 1
+        engine.step(Action(ActionType.USE, item=0))
+        self.assertGreater(engine.player.hitpoints, 1)
+        self.assertEqual(engine.player.inventory.count(), 5)
+
+        engine.step(Action(ActionType.DESTROY, item=0))
+        engine.step(Action(ActionType.DESTROY, item=99))
+        self.assertEqual(engine.player.inventory.count(), 4)
+        self.assertEqual(engine.turns, 0)
+
+    def test_no_display_needed(self):
+        code = (
+            "import sys; import game.engine; "
+            "print(any(m in sys.modules for m in ('pygame', 'pygame_gui')))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(game.__file__)),
+        ).stdout
+
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Tests for the game state"""
+# pylint: disable=missing-docstring
+
+import unittest
+
+from game.dice import Dice
+from game.game import RNG_COMBAT, RNG_MAPGEN, Game, derive_rng
+
+
+class TestGame(unittest.TestCase):
+    def test_streams_are_reproducible(self):
+        first = [Game(seed=7).rng(RNG_MAPGEN).random() for _ in range(2)]
+        self.assertEqual(first[0], first[1])
+        self.assertEqual(first[0], derive_rng(7, RNG_MAPGEN).random())
+        self.assertNotEqual(first[0], Game(seed=8).rng(RNG_MAPGEN).random())
+
+    def test_streams_are_independent(self):
+        game = Game(seed=7)
+        other = Game(seed=7)
+
+        # drawing from one stream doesn't change the others
+        for _ in range(100):
+            game.rng(RNG_COMBAT).random()
+            game.random().random()
+
+        self.assertIs(game.rng(RNG_MAPGEN), game.rng(RNG_MAPGEN))
+        self.assertEqual(game.rng(RNG_MAPGEN).random(), other.rng(RNG_MAPGEN).random())
+        self.assertNotEqual(
+            game.rng(RNG_MAPGEN).random(), game.rng(RNG_COMBAT).random()
+        )
+
+    def test_dice_use_their_stream(self):
+        game = Game(seed=7)
+        dice = Dice(game.rng(RNG_COMBAT))
+        rolls = [dice.roll() for _ in range(10)]
+
+        stream = derive_rng(7, RNG_COMBAT)
+        self.assertEqual(rolls, [stream.randint(1, 20) for _ in range(10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for how long the game takes to import"""
+# pylint: disable=missing-docstring
+
+import os
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+# Most time that importing game.online can take, as a multiple of the time
+# numpy takes to import, so it holds on any machine. It takes around 0.6x
+# without the generated API and around 2x with it.
+ONLINE_IMPORT_BUDGET = 1.2
+
+# Module that game.online's import time is compared against.
+REFERENCE_MODULE = "numpy"
+
+# Modules that are only imported once an online request is made.
+LAZY_MODULES = ("api", "urllib3", "dateutil")
+
+SURVIVE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Import a module in a fresh interpreter with -X importtime.
+
+    Returns the time (in microseconds) that each module imported along with
+    it took, including the modules it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SURVIVE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def assertNotImported(self, times: Dict[str, int]):  # pylint: disable=C0103
+        for name in times:
+            for lazy in LAZY_MODULES:
+                self.assertFalse(
+                    name == lazy or name.startswith(lazy + "."),
+                    f"{name} was imported",
+                )
+
+    def test_online_is_lazy(self):
+        self.assertNotImported(import_times("game.online"))
+
+    def test_online_budget(self):
+        # the quickest of a few tries, so a busy machine doesn't fail this
+        online = min(import_times("game.online")["game.online"] for _ in range(3))
+        reference = min(
+            import_times(REFERENCE_MODULE)[REFERENCE_MODULE] for _ in range(3)
+        )
+        self.assertLess(online, reference * ONLINE_IMPORT_BUDGET)
+
+    def test_game_start(self):
+        self.assertNotImported(import_times("game.run"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for the dungeon item pool"""
+# pylint: disable=missing-docstring
+
+import random
+import unittest
+from unittest import mock
+
+from game.game import Game, set_game
+from game.item import Armor, Weapon
+from game.itempool import ARMOR_POOL_SIZE, SHOP_ITEMS, WEAPON_POOL_SIZE, ItemPool
+from game.procgen import NameGenerator
+
+
+def create_pool(seed: int = 1) -> ItemPool:
+    return ItemPool(seed, NameGenerator(random.Random(seed)))
+
+
+class TestItemPool(unittest.TestCase):
+    def setUp(self) -> None:
+        game = Game()
+        set_game(game)
+
+    def test_items_are_deterministic(self):
+        pool = create_pool()
+        other = create_pool()
+
+        # build items in a different order in each pool
+        weapon = pool.weapon(10)
+        other.weapon(3)
+        self.assertEqual(other.weapon(10).describe(), weapon.describe())
+        self.assertEqual(other.weapon(10).value, weapon.value)
+
+        self.assertIsInstance(pool.armor(10), Armor)
+        self.assertIs(pool.weapon(10), weapon)
+        self.assertNotEqual(create_pool(2).weapon(10).describe(), weapon.describe())
+
+    def test_take(self):
+        pool = create_pool()
+        rng = random.Random(1)
+
+        taken = [pool.take_weapon(rng) for _ in range(WEAPON_POOL_SIZE)]
+        self.assertEqual(len(set(map(id, taken))), WEAPON_POOL_SIZE)
+        self.assertTrue(all(isinstance(weapon, Weapon) for weapon in taken))
+
+        with self.assertRaises(ValueError):
+            pool.take_weapon(rng)
+
+        pool.take_armor(rng)
+
+    def test_names_are_unique(self):
+        pool = create_pool()
+        names = [pool.armor(index).name for index in range(ARMOR_POOL_SIZE)]
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_names_are_rerolled(self):
+        name_generator = NameGenerator(random.Random(1))
+        weapon = ItemPool(1, name_generator).weapon(10)
+
+        # the same weapon from another pool can't reuse the name
+        other = ItemPool(1, name_generator).weapon(10)
+        self.assertNotEqual(other.name, weapon.name)
+        self.assertEqual(other.value, weapon.value)
+
+    def test_shop_has_the_most_valuable_items(self):
+        name_generator = NameGenerator(random.Random(1))
+        pool = ItemPool(1, name_generator)
+        with mock.patch.object(
+            name_generator, "generate_name", wraps=name_generator.generate_name
+        ) as generate_name:
+            weapons = pool.shop_weapons()
+            armors = pool.shop_armors()
+
+        every_weapon = sorted(
+            (create_pool().weapon(index) for index in range(WEAPON_POOL_SIZE)),
+            key=lambda weapon: weapon.value,
+            reverse=True,
+        )
+        self.assertEqual(
+            [weapon.value for weapon in weapons],
+            [weapon.value for weapon in every_weapon[:SHOP_ITEMS]],
+        )
+
+        every_armor = sorted(
+            (create_pool().armor(index) for index in range(ARMOR_POOL_SIZE)),
+            key=lambda armor: armor.value,
+            reverse=True,
+        )
+        self.assertEqual(
+            [armor.value for armor in armors],
+            [armor.value for armor in every_armor[:SHOP_ITEMS]],
+        )
+
+        # the shop doesn't build anything else
+        self.assertIs(pool.shop_weapons(), weapons)
+        self.assertEqual(generate_name.call_count, 2 * SHOP_ITEMS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Tests for map rendering"""
+# pylint: disable=missing-docstring
+
+import random
+import unittest
+
+import numpy as np
+import pygame
+from game.mapgen import generate_map
+from game.maprender import (
+    CHUNK_CACHE_SIZE,
+    CHUNK_TILES,
+    FOG_EXPLORED,
+    FOG_UNEXPLORED,
+    FOG_VISIBLE,
+    TILE_SIZE,
+    MapRenderer,
+    neighbour_passable,
+)
+from game.sprites import SpriteSet
+from game.worldmap import Cell
+
+
+def create_spriteset() -> SpriteSet:
+    def sprite():
+        surface = pygame.Surface((32, 32))
+        surface.fill((255, 255, 255))
+        return surface
+
+    return SpriteSet(
+        sprite(),
+        [sprite()],
+        [sprite() for _ in range(4)],
+        sprite(),
+        sprite(),
+        [sprite(), sprite()],
+        [sprite() for _ in range(3)],
+        [sprite() for _ in range(3)],
+        sprite(),
+    )
+
+
+class TestMapRenderer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.worldmap = generate_map(random.Random(1))
+        self.spriteset = create_spriteset()
+
+    def test_neighbour_passable(self):
+        passable = self.worldmap.passable()
+        width, height = passable.shape
+        for dx, dy in ((0, -1), (-1, 0), (1, 0), (0, 1)):
+            result = neighbour_passable(passable, dx, dy)
+            for x in range(width):
+                for y in range(height):
+                    nx, ny = x + dx, y + dy
+                    expected = 0 <= nx < width and 0 <= ny < height
+                    expected = expected and bool(passable[nx, ny])
+                    self.assertEqual(result[x, y], expected)
+
+    def test_layers(self):
+        pos = self.worldmap.positions_of(Cell.TYPE_ROOM)[0]
+        self.worldmap.clutter[pos] = 1
+
+        layers = MapRenderer(self.worldmap, self.spriteset).build_layers()
+
+        self.assertEqual(
+            layers[pos],
+            (self.spriteset.get_floor(), self.spriteset.get_clutter()[1]),
+        )
+
+        # a wall directly above a passable tile is drawn as its north wall
+        passable = self.worldmap.passable()
+        xs, ys = np.nonzero(~passable[:, :-1] & passable[:, 1:])
+        above = (int(xs[0]), int(ys[0]))
+        self.assertIn(self.spriteset.get_wall(SpriteSet.WALL_N), layers[above])
+
+        # nothing is drawn far from any passable tile
+        self.assertNotIn((0, 0), layers)
+
+    def test_draw_only_explored(self):
+        renderer = MapRenderer(self.worldmap, self.spriteset)
+        surface = pygame.Surface((320, 320))
+
+        room = self.worldmap.rooms[0]
+        left_x, top_y = room.room_to_world((0, 0))
+
+        renderer.draw(surface, left_x, left_x + 10, top_y, top_y + 10)
+        self.assertFalse(np.any(pygame.surfarray.array2d(surface)))
+
+        renderer.update_fog(self.worldmap.update_fov(*room.room_to_world((1, 1))))
+        renderer.draw(surface, left_x, left_x + 10, top_y, top_y + 10)
+        self.assertTrue(np.any(pygame.surfarray.array2d(surface)))
+
+    def fog_alpha(self, renderer: MapRenderer) -> np.ndarray:
+        """Stitch together the per-tile fog of every chunk of the map."""
+        alpha = np.zeros(self.worldmap.cell_types.shape, dtype=np.uint8)
+        for cx in range(0, self.worldmap.width, CHUNK_TILES):
+            for cy in range(0, self.worldmap.height, CHUNK_TILES):
+                chunk = renderer.chunk((cx // CHUNK_TILES, cy // CHUNK_TILES))
+                tiles = pygame.surfarray.array_alpha(chunk.fog)[
+                    ::TILE_SIZE, ::TILE_SIZE
+                ]
+                alpha[cx : cx + tiles.shape[0], cy : cy + tiles.shape[1]] = tiles
+        return alpha
+
+    def test_fog(self):
+        renderer = MapRenderer(self.worldmap, self.spriteset)
+        self.assertTrue(np.all(self.fog_alpha(renderer) == FOG_UNEXPLORED))
+
+        room = self.worldmap.rooms[0]
+        rects = renderer.update_fog(
+            self.worldmap.update_fov(*room.room_to_world((1, 1)))
+        )
+        self.assertEqual(len(rects), np.count_nonzero(self.worldmap.explored))
+
+        alpha = self.fog_alpha(renderer)
+        np.testing.assert_array_equal(alpha == FOG_VISIBLE, self.worldmap.visible)
+        np.testing.assert_array_equal(alpha != FOG_UNEXPLORED, self.worldmap.explored)
+
+        # moving away leaves the previously seen tiles explored
+        other = self.worldmap.rooms[-1]
+        renderer.update_fog(self.worldmap.update_fov(*other.room_to_world((1, 1)), 8))
+        alpha = self.fog_alpha(renderer)
+        np.testing.assert_array_equal(alpha == FOG_VISIBLE, self.worldmap.visible)
+        np.testing.assert_array_equal(
+            alpha == FOG_EXPLORED, self.worldmap.explored & ~self.worldmap.visible
+        )
+
+    def test_fog_change_invalidates_touched_chunks(self):
+        renderer = MapRenderer(self.worldmap, self.spriteset)
+        self.fog_alpha(renderer)
+
+        room = self.worldmap.rooms[0]
+        change = self.worldmap.update_fov(*room.room_to_world((1, 1)), 8)
+        renderer.update_fog(change)
+
+        touched = {(x // CHUNK_TILES, y // CHUNK_TILES) for x, y in change.positions()}
+        self.assertTrue(touched)
+        for key, chunk in renderer.chunks.items():
+            self.assertEqual(chunk.fog_stale, key in touched)
+
+    def test_chunk_cache_is_bounded(self):
+        worldmap = generate_map(random.Random(1), world_x=192, world_y=160)
+        renderer = MapRenderer(worldmap, self.spriteset)
+        surface = pygame.Surface((45 * TILE_SIZE, 27 * TILE_SIZE))
+
+        for y in range(0, worldmap.height, 8):
+            for x in range(0, worldmap.width, 8):
+                renderer.draw(surface, x - 22, x + 23, y - 13, y + 14)
+                self.assertLessEqual(len(renderer.chunks), CHUNK_CACHE_SIZE)
+
+        # the most recently drawn chunks are kept
+        self.assertIn(
+            ((worldmap.width - 1) // CHUNK_TILES, (worldmap.height - 1) // CHUNK_TILES),
+            renderer.chunks,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for the occupancy index"""
+# pylint: disable=missing-docstring
+
+import datetime
+import unittest
+
+from game.game import Game, set_game
+from game.item import Chest
+from game.occupancy import Occupancy
+from game.online import Tombstone
+
+from .util import create_creature
+
+
+class TestOccupancy(unittest.TestCase):
+    def setUp(self) -> None:
+        # every test may need a game object to exist
+        game = Game()
+        set_game(game)
+
+        self.occupancy = Occupancy()
+
+    def test_creature_moves_are_tracked(self):
+        creature = create_creature()
+        creature.position = (2, 3)
+        self.occupancy.add_creature(creature)
+        self.assertIs(self.occupancy.creature_at((2, 3)), creature)
+
+        creature.position = (3, 3)
+        self.assertIsNone(self.occupancy.creature_at((2, 3)))
+        self.assertIs(self.occupancy.creature_at((3, 3)), creature)
+        self.assertTrue(self.occupancy.occupied((3, 3)))
+
+        self.occupancy.remove_creature(creature)
+        self.assertFalse(self.occupancy.occupied((3, 3)))
+
+        # no longer tracked after removal
+        creature.position = (4, 4)
+        self.assertFalse(self.occupancy.occupied((4, 4)))
+
+    def test_containers_block_tiles(self):
+        chest = Chest((5, 5))
+        self.occupancy.add_container(chest)
+        self.assertIs(self.occupancy.container_at((5, 5)), chest)
+        self.assertTrue(self.occupancy.occupied((5, 5)))
+
+    def test_tombstones_do_not_block_tiles(self):
+        at = datetime.datetime.now(datetime.timezone.utc)
+        self.occupancy.add_tombstone(Tombstone(player="a", x=1, y=1, at=at))
+        self.occupancy.add_tombstone(Tombstone(player="b", x=1, y=1, at=at))
+
+        self.assertEqual(len(self.occupancy.tombstones_at((1, 1))), 2)
+        self.assertEqual(self.occupancy.tombstones_at((2, 2)), [])
+        self.assertFalse(self.occupancy.occupied((1, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+"""Tests for making online requests in the background"""
+# pylint: disable=missing-docstring
+
+import concurrent.futures
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from unittest import mock
+
+import api
+import urllib3
+from game.online import RESPONSE_TTLS, Endpoint, OnlinePlay
+from game.outbox import Outbox
+from game.responsecache import (
+    RESPONSE_CACHE_MAX_AGE,
+    RESPONSE_CACHE_VERSION,
+    CachedResponse,
+    ResponseCache,
+)
+
+AT = "2023-01-01T00:00:00+00:00"
+
+TOMBSTONES = {
+    "entries": [
+        {"player": "p", "seed": 5, "x": 1, "y": 2, "last_logs": "", "at": AT},
+    ]
+}
+
+
+def completed() -> concurrent.futures.Future:
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    future.set_result(True)
+    return future
+
+
+def respond(status=200, body=None, headers=None) -> urllib3.HTTPResponse:
+    all_headers = {"content-type": "application/json"}
+    all_headers.update(headers or {})
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    return urllib3.HTTPResponse(body=data, status=status, headers=all_headers)
+
+
+class TestOnlinePlay(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.online = self.connect()
+
+    def tearDown(self) -> None:
+        self.online.shutdown()
+        self.cache_dir.cleanup()
+
+    def connect(self) -> OnlinePlay:
+        return OnlinePlay(
+            host="http://localhost:1",
+            cache=ResponseCache(self.cache_dir.name),
+            outbox=Outbox(os.path.join(self.cache_dir.name, "outbox.log")),
+        )
+
+    def serve(self, online, response):
+        """Answer requests to the server with the given response."""
+        api_client = online._client()  # pylint: disable=protected-access
+        if isinstance(response, urllib3.HTTPResponse):
+            return mock.patch.object(api_client, "call_api", return_value=response)
+        return mock.patch.object(api_client, "call_api", side_effect=response)
+
+    def test_requests_dont_block(self):
+        release = threading.Event()
+
+        def slow_seed(*_args, **_kwargs):
+            release.wait()
+            return respond(body={"seed": 1234})
+
+        with self.serve(self.online, slow_seed) as call_api:
+            future = self.online.daily_seed()
+            self.assertFalse(future.done())
+
+            # the seed is only requested once while it's on its way
+            self.assertIs(self.online.daily_seed(), future)
+
+            release.set()
+            self.assertEqual(future.result(timeout=5), 1234)
+
+            # and then comes from the cache
+            self.assertEqual(self.online.daily_seed().result(timeout=0), 1234)
+            self.assertEqual(call_api.call_count, 1)
+
+    def test_stale_while_revalidate(self):
+        stale = CachedResponse(
+            ["old"], time.time() - RESPONSE_TTLS[Endpoint.TOMBSTONE_SEED], "v1"
+        )
+        self.online._cache.put(  # pylint: disable=protected-access
+            "tombstone_seed", 5, stale
+        )
+
+        release = threading.Event()
+
+        def not_modified(*_args, **_kwargs):
+            release.wait()
+            return respond(304)
+
+        with self.serve(self.online, not_modified) as call_api:
+            # the stale copy is used straight away
+            self.assertEqual(self.online.tombstones(5).result(timeout=0), ["old"])
+
+            release.set()
+            self.online._executor.shutdown()  # pylint: disable=protected-access
+
+        headers = call_api.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], "v1")
+
+        # the server said it's still good, so it's fresh again
+        refreshed = ResponseCache(self.cache_dir.name).get("tombstone_seed", 5)
+        self.assertEqual(refreshed.value, ["old"])
+        self.assertLess(refreshed.age(), 5)
+
+    def test_cache_outlives_the_game(self):
+        with self.serve(self.online, respond(body=TOMBSTONES, headers={"ETag": "v2"})):
+            tombstones = self.online.tombstones(5).result(timeout=5)
+        self.assertEqual((tombstones[0].x, tombstones[0].y), (1, 2))
+
+        # a new game has the response even though the server is unreachable,
+        # once it's been read from the disk in the background
+        online = self.connect()
+        try:
+            with self.serve(online, urllib3.exceptions.HTTPError("offline")):
+                self.assertEqual(online.tombstones(5).result(timeout=5), tombstones)
+                self.assertEqual(online.tombstones(5).result(timeout=0), tombstones)
+        finally:
+            online.shutdown()
+
+    def test_damaged_cache(self):
+        path = os.path.join(
+            self.cache_dir.name, f"tombstone_seed-v{RESPONSE_CACHE_VERSION}-5.bin"
+        )
+        for name, data in (
+            ("garbled", b"not a response"),
+            ("renamed class", zlib.compress(b"cgame.responsecache\nNoSuchClass\n.")),
+        ):
+            with self.subTest(name):
+                with open(path, "wb") as cache:
+                    cache.write(data)
+
+                online = self.connect()
+                try:
+                    with self.serve(online, respond(body=TOMBSTONES)) as call_api:
+                        tombstones = online.tombstones(5).result(timeout=5)
+                finally:
+                    online.shutdown()
+
+                # the server is asked instead, and its answer replaces the file
+                self.assertEqual((tombstones[0].x, tombstones[0].y), (1, 2))
+                self.assertEqual(call_api.call_count, 1)
+                self.assertIsNotNone(
+                    ResponseCache(self.cache_dir.name).get("tombstone_seed", 5)
+                )
+
+    @mock.patch("game.online.ON_REPLIT", True)
+    def test_leaderboard_after_score(self):
+        self.online._player_name = "p"  # pylint: disable=protected-access
+        self.online._cache.put(  # pylint: disable=protected-access
+            "leaderboard_seed", 5, CachedResponse(None, time.time())
+        )
+
+        release = threading.Event()
+        calls = []
+
+        def slow_send(entry):
+            release.wait()
+            calls.append(("submit", entry["body"]["seed"], entry["body"]["score"]))
+            return True
+
+        def get_leaderboard(resource_path, *_args, **_kwargs):
+            calls.append(("leaderboard", resource_path))
+            return respond(
+                body={"seed": 5, "entries": [{"player": "p", "score": 100, "at": AT}]}
+            )
+
+        with mock.patch.object(self.online, "_send", slow_send), self.serve(
+            self.online, get_leaderboard
+        ):
+            submitted = self.online.submit_score(5, 100)
+
+            # the cached leaderboard doesn't have the new score yet
+            board = self.online.leaderboard(5, after=submitted)
+            self.assertFalse(board.done())
+
+            release.set()
+            self.assertEqual(board.result(timeout=5).entries[0].score, 100)
+
+        self.assertTrue(submitted.result(timeout=0))
+        self.assertEqual(calls, [("submit", 5, 100), ("leaderboard", "/leaderboard/5")])
+
+    @mock.patch("game.online.ON_REPLIT", True)
+    @mock.patch("game.online.OUTBOX_RETRY_DELAY", 0.01)
+    def test_submissions_retried(self):
+        self.online._player_name = "p"  # pylint: disable=protected-access
+
+        sent = []
+        replies = [api.ApiException(status=0), api.ApiException(status=503), None]
+
+        def flaky_submit(body):
+            reply = replies.pop(0)
+            if reply is not None:
+                raise reply
+            sent.append(body)
+
+        with mock.patch.object(
+            self.online, "_submit_tombstone", flaky_submit
+        ), mock.patch("builtins.print"):
+            submitted = self.online.submit_tombstone(5, 1, 2, "logs")
+
+            # the first try failed, but it's kept to be retried
+            self.assertFalse(submitted.result(timeout=5))
+            for _ in range(500):
+                if sent:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(len(sent), 1)
+        self.assertEqual((sent[0]["x"], sent[0]["y"]), (1, 2))
+        self.assertEqual(len(self.online._outbox), 0)  # pylint: disable=W0212
+
+    @mock.patch("game.online.ON_REPLIT", True)
+    def test_submissions_offline(self):
+        self.online._player_name = "p"  # pylint: disable=protected-access
+
+        # nothing is listening on the test host, so the connection is refused
+        with mock.patch("builtins.print"):
+            submitted = self.online.submit_score(5, 100)
+            self.assertFalse(submitted.result(timeout=30))
+
+        outbox = self.online._outbox  # pylint: disable=protected-access
+        self.assertTrue(self.online._outbox_thread.is_alive())  # pylint: disable=W0212
+        self.assertEqual(len(outbox), 1)
+
+    def test_stale_copy_offline(self):
+        self.online._cache.put(  # pylint: disable=protected-access
+            "leaderboard_seed", 5, CachedResponse(["old"], time.time() - 3600)
+        )
+
+        # nothing is listening on the test host, so the connection is refused
+        with mock.patch("builtins.print"):
+            board = self.online.leaderboard(5, after=completed())
+            self.assertEqual(board.result(timeout=30), ["old"])
+
+    def test_cache_pruned(self):
+        cache = ResponseCache(self.cache_dir.name)
+        for seed in (1, 2):
+            cache.put("tombstone_seed", seed, CachedResponse([seed], time.time()))
+
+        old = time.time() - RESPONSE_CACHE_MAX_AGE - 60
+        os.utime(
+            os.path.join(
+                self.cache_dir.name, f"tombstone_seed-v{RESPONSE_CACHE_VERSION}-1.bin"
+            ),
+            (old, old),
+        )
+        older_version = os.path.join(self.cache_dir.name, "tombstone_seed-v0-3.bin")
+        with open(older_version, "wb"):
+            pass
+
+        cache.prune()
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir.name)),
+            [f"tombstone_seed-v{RESPONSE_CACHE_VERSION}-2.bin"],
+        )
+
+    def test_fast_decoding(self):
+        online = OnlinePlay(
+            host="http://localhost:1",
+            cache=ResponseCache(os.path.join(self.cache_dir.name, "fast")),
+            outbox=Outbox(os.path.join(self.cache_dir.name, "fast.log")),
+            fast_decode=True,
+        )
+        try:
+            with self.serve(online, respond(body=TOMBSTONES)):
+                fast = online.tombstones(5).result(timeout=5)
+            with self.serve(self.online, respond(body=TOMBSTONES)):
+                validated = self.online.tombstones(5).result(timeout=5)
+            self.assertEqual(fast, validated)
+
+            # responses that aren't shaped right are still turned down
+            broken = {"entries": [{"player": "p", "x": "left", "y": 2, "at": AT}]}
+            with self.serve(online, respond(body=broken)), mock.patch("builtins.print"):
+                self.assertIsNone(online.tombstones(6).result(timeout=5))
+        finally:
+            online.shutdown()
+
+    def test_failures_complete_with_none(self):
+        with self.serve(self.online, respond(500)), mock.patch("builtins.print"):
+            self.assertIsNone(self.online.tombstones(5).result(timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
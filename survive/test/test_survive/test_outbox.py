@@ -0,0 +1,51 @@
+"""Tests for keeping submissions until they're sent"""
+# pylint: disable=missing-docstring
+
+import os
+import tempfile
+import unittest
+
+from game.outbox import Outbox
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self) -> None:
+        self.outbox_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.path = os.path.join(self.outbox_dir.name, "outbox.log")
+
+    def tearDown(self) -> None:
+        self.outbox_dir.cleanup()
+
+    def test_outlives_the_game(self):
+        outbox = Outbox(self.path)
+        first = outbox.add({"seed": 1})
+        outbox.add({"seed": 2})
+        outbox.add({"seed": 3})
+        outbox.sent([first])
+
+        reopened = Outbox(self.path)
+        self.assertEqual(
+            [entry for _, entry in reopened.pending(10)], [{"seed": 2}, {"seed": 3}]
+        )
+
+        # new submissions don't reuse the IDs of ones still waiting
+        self.assertEqual(reopened.add({"seed": 4}), 3)
+
+    def test_removed_once_sent(self):
+        outbox = Outbox(self.path)
+        outbox.sent([outbox.add({"seed": 1}), outbox.add({"seed": 2})])
+
+        self.assertEqual(len(outbox), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_half_written_entry(self):
+        outbox = Outbox(self.path)
+        outbox.add({"seed": 1})
+        with open(self.path, "a", encoding="utf-8") as data:
+            data.write('{"id": 1, "entry": {"se')
+
+        self.assertEqual(len(Outbox(self.path)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Tests for pathfinding"""
+# pylint: disable=missing-docstring
+
+import unittest
+
+import numpy as np
+from game.pathing import PathService
+
+
+def open_area(width: int = 8, height: int = 8) -> np.ndarray:
+    """Create a walkable area with a one tile wall border."""
+    transparency = np.zeros((width, height), dtype=bool, order="F")
+    transparency[1:-1, 1:-1] = True
+    return transparency
+
+
+class TestPathing(unittest.TestCase):
+    def test_path_excludes_start(self):
+        paths = PathService(open_area())
+        path = paths.path_to((1, 1), (4, 1))
+        self.assertEqual(path, [(2, 1), (3, 1), (4, 1)])
+
+    def test_path_avoids_occupants(self):
+        paths = PathService(open_area())
+        path = paths.path_to((1, 2), (5, 2), occupants=[(3, 2)])
+        self.assertNotIn((3, 2), path)
+        self.assertEqual(path[-1], (5, 2))
+
+        # the penalty is only applied for the duration of the query
+        self.assertTrue((paths.cost == open_area()).all())
+
+    def test_batch_paths_reach_end(self):
+        paths = PathService(open_area())
+        starts = [(1, 1), (6, 6), (1, 6)]
+        for start, path in zip(starts, paths.paths_to((4, 4), starts)):
+            self.assertEqual(path[-1], (4, 4))
+            self.assertEqual(len(path), max(abs(start[0] - 4), abs(start[1] - 4)))
+
+    def test_distance_field_is_reused(self):
+        paths = PathService(open_area())
+        field = paths.distance_from((4, 4), occupants=[(2, 2)])
+        self.assertIs(paths.distance_from((4, 4), occupants=[(2, 2)]), field)
+        self.assertIsNot(paths.distance_from((4, 4)), field)
+
+    def test_walls_are_unreachable(self):
+        paths = PathService(open_area())
+        field = paths.distance_from((4, 4))
+        self.assertEqual(field[0, 0], np.iinfo(field.dtype).max)
+        self.assertEqual(paths.paths_to((4, 4), [(0, 0)]), [[]])
+
+
+if __name__ == "__main__":
+    unittest.main()
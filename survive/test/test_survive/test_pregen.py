@@ -0,0 +1,107 @@
+"""Tests for generating dungeons ahead of time"""
+# pylint: disable=missing-docstring
+
+import os
+import pickle
+import tempfile
+import time
+import unittest
+import zlib
+
+from game.attributes import AttributeSet
+from game.engine import Action, ActionType, DungeonEngine, generate_dungeon
+from game.game import Game, set_game
+from game.pregen import Pregenerator, cache_path, load_generated, save_generated
+
+WAIT = Action(ActionType.WAIT)
+
+
+def snapshot(engine: DungeonEngine):
+    for _ in range(30):
+        engine.step(WAIT)
+    return (
+        [(creature.name, creature.position) for creature in engine.creatures],
+        [
+            (chest.position, [item.name for item in chest.items()])
+            for chest in engine.containers
+        ],
+        [weapon.name for weapon in engine.shop_weapons],
+    )
+
+
+class TestPregen(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+
+    def tearDown(self) -> None:
+        self.cache_dir.cleanup()
+
+    def generate(self, seed: int) -> str:
+        game = Game(seed=seed)
+        set_game(game)
+        path = cache_path(self.cache_dir.name, seed, 8, 7)
+        save_generated(path, generate_dungeon(game))
+        return path
+
+    def test_loaded_dungeon_plays_the_same(self):
+        path = self.generate(3)
+
+        game = Game(seed=3)
+        set_game(game)
+        expected = snapshot(DungeonEngine(game, AttributeSet()))
+
+        game = Game(seed=3)
+        set_game(game)
+        engine = DungeonEngine(game, AttributeSet(), generated=load_generated(path))
+        self.assertEqual(snapshot(engine), expected)
+
+    def test_wrong_seed(self):
+        path = self.generate(3)
+
+        game = Game(seed=4)
+        set_game(game)
+        with self.assertRaises(ValueError):
+            DungeonEngine(game, AttributeSet(), generated=load_generated(path))
+
+    def test_bad_cache_file(self):
+        path = os.path.join(self.cache_dir.name, "dungeon-bad.bin")
+        for name, data in (
+            ("garbled", b"not a dungeon"),
+            ("renamed class", zlib.compress(b"cgame.engine\nNoSuchDungeon\n.")),
+            ("missing module", zlib.compress(b"cno_such_module\nDungeon\n.")),
+            ("not a dungeon", zlib.compress(pickle.dumps([1, 2, 3]))),
+        ):
+            with self.subTest(name):
+                with open(path, "wb") as cache:
+                    cache.write(data)
+
+                self.assertIsNone(load_generated(path))
+                self.assertFalse(os.path.exists(path))
+
+        self.assertIsNone(load_generated(path + ".missing"))
+
+    def test_pregenerator(self):
+        pregenerator = Pregenerator(cache_dir=self.cache_dir.name, workers=1)
+        try:
+            pregenerator.request(5)
+
+            # the dungeon is only handed out once the worker has finished it
+            generated = None
+            for _ in range(600):
+                generated = pregenerator.take(5)
+                if generated is not None:
+                    break
+                time.sleep(0.1)
+        finally:
+            pregenerator.shutdown()
+
+        self.assertIsNotNone(generated)
+        self.assertEqual(generated.seed, 5)
+        self.assertIsNone(pregenerator.take(6))
+
+        pregenerator.prune([6])
+        self.assertEqual(os.listdir(self.cache_dir.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for recording and replaying runs"""
+# pylint: disable=missing-docstring
+
+import os
+import tempfile
+import unittest
+
+from game.actions import ActionLog
+from game.attributes import AttributeSet
+from game.batch import ScriptedPolicy, play
+from game.engine import DungeonEngine
+from game.game import Game, set_game
+from game.replay import OUTCOME_UNFINISHED, load_log, replay, replay_result, save_log
+
+
+def record(seed: int, max_turns: int) -> DungeonEngine:
+    game = Game(seed=seed)
+    set_game(game)
+
+    attributes = AttributeSet()
+    attributes.modify("str", 4)
+    attributes.modify("chr", -2)
+
+    engine = DungeonEngine(game, attributes)
+    policy = ScriptedPolicy()
+    while engine.outcome is None and engine.turns < max_turns:
+        engine.step(policy.act(engine))
+    return engine
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_matches_the_recorded_run(self):
+        engine = record(2, 300)
+        log = ActionLog.decode(engine.action_log.encode())
+
+        self.assertEqual(len(log), len(engine.action_log))
+        self.assertEqual(log.attributes().attrs, engine.player.attributes.attrs)
+
+        replayed = replay(log)
+        self.assertEqual(replayed.turns, engine.turns)
+        self.assertEqual(replayed.player.position, engine.player.position)
+        self.assertEqual(replayed.player.hitpoints, engine.player.hitpoints)
+        self.assertEqual(replayed.game.stats(), engine.game.stats())
+        self.assertEqual(replayed.game.get_log(8), engine.game.get_log(8))
+        self.assertEqual(replayed.action_log.encode(), engine.action_log.encode())
+
+    def test_replay_result(self):
+        expected = play(3)
+
+        game = Game(seed=3)
+        set_game(game)
+        engine = DungeonEngine(game, AttributeSet())
+        policy = ScriptedPolicy()
+        while engine.outcome is None and engine.turns < 2000:
+            engine.step(policy.act(engine))
+
+        self.assertEqual(replay_result(engine.action_log), expected)
+
+        unfinished = record(3, 5)
+        self.assertEqual(
+            replay_result(unfinished.action_log).outcome, OUTCOME_UNFINISHED
+        )
+
+    def test_log_file(self):
+        engine = record(4, 50)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.log")
+            save_log(path, engine.action_log)
+            log = load_log(path)
+
+            # a few bytes per action
+            self.assertLess(os.path.getsize(path), len(log) * 5)
+
+        self.assertEqual(list(log.actions()), list(engine.action_log.actions()))
+
+    def test_not_a_log(self):
+        with self.assertRaises(ValueError):
+            ActionLog.decode(b"not an action log")
+
+        log = record(4, 5).action_log.encode()
+        with self.assertRaises(ValueError):
+            ActionLog.decode(log[:-3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for saving and restoring dungeon runs"""
+# pylint: disable=missing-docstring
+
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+from game.attributes import AttributeSet
+from game.engine import Action, ActionType, DungeonEngine
+from game.game import Game, set_game
+from game.savegame import SAVE_HEADER, SAVE_MAGIC, load_run, save_run
+
+MOVES = [Action(ActionType.MOVE, 1, 0)] * 4 + [Action(ActionType.MOVE, 0, 1)] * 4
+
+
+def play(engine: DungeonEngine):
+    for _ in range(20):
+        for action in MOVES:
+            engine.step(action)
+            if engine.battle is not None:
+                engine.step(Action(ActionType.ATTACK))
+    return (
+        engine.player.position,
+        engine.player.hitpoints,
+        [item.name for item in engine.player.inventory.items()],
+        [(creature.name, creature.position) for creature in engine.creatures],
+        engine.turns,
+        engine.game.get_log(8),
+        engine.game.stats(),
+    )
+
+
+class TestSaveGame(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(seed=7)
+        set_game(self.game)
+        self.engine = DungeonEngine(self.game, AttributeSet())
+        for _ in range(3):
+            for action in MOVES:
+                self.engine.step(action)
+
+        self.save_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.path = os.path.join(self.save_dir.name, "run.sav")
+
+    def tearDown(self) -> None:
+        self.save_dir.cleanup()
+
+    def test_restored_run_plays_the_same(self):
+        save_run(self.path, self.engine)
+        restored = load_run(self.path)
+
+        self.assertIsNot(restored.game, self.game)
+        np.testing.assert_array_equal(
+            restored.worldmap.explored, self.engine.worldmap.explored
+        )
+        self.assertTrue(restored.worldmap.explored.flags.writeable)
+        self.assertTrue(restored.worldmap.explored.flags.f_contiguous)
+
+        expected = play(self.engine)
+
+        set_game(restored.game)
+        self.assertEqual(play(restored), expected)
+
+    def test_restored_objects_are_shared(self):
+        save_run(self.path, self.engine)
+        restored = load_run(self.path)
+
+        for creature in restored.creatures:
+            self.assertIs(restored.occupancy.creatures[creature.position], creature)
+            self.assertIs(creature.ai.creature, creature)
+        self.assertIs(restored.ai.dungeon, restored)
+
+    def test_not_a_save_file(self):
+        with open(self.path, "wb") as save:
+            save.write(b"not a save file at all")
+
+        with self.assertRaises(ValueError):
+            load_run(self.path)
+
+    def test_other_version(self):
+        save_run(self.path, self.engine)
+        with open(self.path, "r+b") as save:
+            save.seek(len(SAVE_MAGIC))
+            save.write(struct.pack("<H", 9999))
+
+        with self.assertRaisesRegex(ValueError, "version 9999"):
+            load_run(self.path)
+
+    def test_truncated(self):
+        save_run(self.path, self.engine)
+        with open(self.path, "r+b") as save:
+            save.truncate(SAVE_HEADER.size + 32)
+
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            load_run(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Tests for the world map"""
+# pylint: disable=missing-docstring
+
+import random
+import unittest
+
+import tcod
+from game.mapgen import generate_map
+from game.worldmap import NO_ROOM, Cell, Room
+
+
+class TestWorldMap(unittest.TestCase):
+    def setUp(self) -> None:
+        self.worldmap = generate_map(random.Random(1))
+
+    def test_rooms_are_painted(self):
+        for room in self.worldmap.rooms:
+            for y in range(room.dims[1]):
+                for x in range(room.dims[0]):
+                    cell = self.worldmap.cell_at(*room.room_to_world((x, y)))
+                    self.assertEqual(cell.cell_type, Cell.TYPE_ROOM)
+                    self.assertTrue(cell.is_passable())
+
+    def test_border_is_empty(self):
+        for x in range(self.worldmap.width):
+            self.assertFalse(self.worldmap.cell_at(x, 0).is_passable())
+        for y in range(self.worldmap.height):
+            self.assertFalse(self.worldmap.cell_at(0, y).is_passable())
+
+    def test_room_at_matches_room_bounds(self):
+        for y in range(-1, self.worldmap.height + 1):
+            for x in range(-1, self.worldmap.width + 1):
+                expected = None
+                for room in self.worldmap.rooms:
+                    if room.contains((x, y)):
+                        expected = room
+                        break
+
+                self.assertIs(self.worldmap.room_at(x, y), expected)
+
+    def test_room_ids_at(self):
+        rooms = self.worldmap.rooms
+        positions = [rooms[2].room_to_world((1, 1)), (0, 0), rooms[0].pos]
+        self.assertEqual(self.worldmap.room_ids_at(positions).tolist(), [2, NO_ROOM, 0])
+
+    def test_cell_is_a_view(self):
+        cell = self.worldmap.cell_at(4, 4)
+        self.assertIsNone(cell.clutter)
+
+        cell.clutter = 3
+        self.assertEqual(self.worldmap.clutter[4, 4], 3)
+        self.assertEqual(self.worldmap.cell_at(4, 4).clutter, 3)
+
+        cell.clutter = None
+        self.assertEqual(self.worldmap.clutter[4, 4], Cell.NO_CLUTTER)
+
+    def test_transparency_matches_cells(self):
+        passable = self.worldmap.passable()
+        self.assertTrue((self.worldmap.transparency == passable).all())
+
+    def test_positions_are_row_major(self):
+        halls = self.worldmap.positions_of(Cell.TYPE_HALL)
+        self.assertTrue(halls)
+        self.assertEqual(halls, sorted(halls, key=lambda pos: (pos[1], pos[0])))
+
+    def test_fov_marks_explored(self):
+        start: Room = self.worldmap.rooms[0]
+        self.worldmap.update_fov(*start.room_to_world((2, 2)))
+
+        cell = self.worldmap.cell_at(*start.room_to_world((3, 3)))
+        self.assertTrue(cell.visible)
+        self.assertTrue(cell.explored)
+
+    def test_incremental_fov_matches_full_fov(self):
+        start = self.worldmap.rooms[0].room_to_world((2, 2))
+        end = self.worldmap.rooms[-1].room_to_world((2, 2))
+
+        for pos in (start, end, start):
+            self.worldmap.update_fov(*pos, 10)
+            expected = tcod.map.compute_fov(self.worldmap.transparency, pos, 10)
+            self.assertTrue((self.worldmap.visible == expected).all())
+
+        self.assertTrue(self.worldmap.explored[end])
+
+    def test_fov_reports_changes(self):
+        pos = self.worldmap.rooms[0].room_to_world((2, 2))
+        change = self.worldmap.update_fov(*pos, 10)
+        self.assertIn(pos, change.positions())
+
+        change = self.worldmap.update_fov(*pos, 10)
+        self.assertFalse(change.changed.any())
+
+        # moving one tile changes far fewer tiles than the whole map
+        change = self.worldmap.update_fov(pos[0] + 1, pos[1], 10)
+        self.assertLessEqual(change.changed.size, 22 * 21)
+
+    def test_large_map(self):
+        worldmap = generate_map(random.Random(1), world_x=192, world_y=160)
+        self.assertEqual(worldmap.cell_types.shape, (192, 160))
+        self.assertGreater(len(worldmap.rooms), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,10 @@
 """This module provides common utilities for tests to use."""
 
-from typing import List
+from typing import List, Union
 
 from game.attributes import AttributeSet
 from game.creature import Creature
-from game.dice import Dice
+from game.dice import Dice, DiceExpr
 from game.item import Armor, Gold, InstantEffectItem, Weapon
 
 
@@ -31,7 +31,7 @@ class TestDice(Dice):
     def roll(self, _: int = 1, __: int = 20) -> int:
         return self._results.pop(0)
 
-    def rollnamed(self, _: str) -> int:
+    def rollnamed(self, _: Union[str, DiceExpr]) -> int:
         return self._results.pop(0)
 
 